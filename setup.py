@@ -17,7 +17,11 @@ setup(
     See: http://www.rapidstudy.com
     """,
     install_requires=[],
+    extras_require={'numpy': ['numpy']},
     tests_require=[],
+    entry_points={
+        'console_scripts': ['ssrf-simulator = ssrf.simulator:main'],
+    },
     author='Adam Dziendziel',
     author_email='adam.dziendziel@gmail.com',
     url='https://github.com/AdamDz/ssrf-python',
@@ -3,9 +3,19 @@ import logging
 from math import exp, log
 import sys
 from collections import namedtuple
+from timeit import default_timer as _timer
+from time import time as _wall_time
+from ssrf.tracing import PHASE_SCHEDULE, PHASE_SCHEDULE_MANY, PHASE_VALIDATION, PHASE_SCORING, \
+    PATH_REVIEWED_WITHIN_24H, PATH_ESTIMATED, PATH_ZERO_WORKLOAD, PATH_BALANCED
+try:
+    import numpy
+except ImportError:
+    numpy = None
 logger = logging.getLogger(__name__)
 
 AlgorithmResult = namedtuple('AlgorithmResult', 'next_review alg_data')
+LoadProfile = namedtuple('LoadProfile', 'workloads avg_difficulties')
+LoadSums = namedtuple('LoadSums', 'workloads difficulty_sums')
 
 GRADES = (0, 1, 2, 3, 4, 5)
 PRIORITY_LOW = -1
@@ -15,6 +25,132 @@ PRIORITIES = (PRIORITY_LOW, PRIORITY_MEDIUM, PRIORITY_HIGH)
 DEFAULT_PRIORITY = PRIORITY_MEDIUM
 MIN_GRADE = GRADES[0]
 MAX_GRADE = GRADES[len(GRADES) - 1]
+VALIDATION_FULL = 'full'
+VALIDATION_BOUNDARY = 'boundary'
+VALIDATION_OFF = 'off'
+VALIDATIONS = (VALIDATION_FULL, VALIDATION_BOUNDARY, VALIDATION_OFF)
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_SECONDS_PER_DAY = 86400
+
+# Sums of difficulties kept by global data may drift slightly below zero with rounding errors
+_DIFFICULTY_SUM_TOLERANCE = 1e-9
+
+
+def _epoch_day(value):
+    """ Returns the number of days since 1970-01-01 of a date or a datetime. """
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+def _epoch_date(day):
+    """ Returns the date of an epoch day. """
+    return date.fromordinal(day + _EPOCH_ORDINAL)
+
+
+class SSRFParameters (object):
+    """ Immutable profile of SSRF parameters used by ``SSRFAlgorithm``.
+
+    * ``priority_values`` - a dict mapping priorities to values of `P`,
+    * ``default_avg_grade`` - average grade `AG(1)` of a new LU,
+    * ``overlearning_interval`` - the minimum interval in days,
+    * ``grades`` - allowed grades; consecutive integers, the last one is the grade of the ideal LU.
+
+    Derived constants are calculated when the profile is created: scale factors ``exp(G - P)``
+    of every grade and priority and intervals of the ideal LU for the number of reviews
+    up to ``max_num_reviews``, so calculating an interval costs a few table lookups.
+    Profiles are hashable and many of them can be used at once, e.g. for A/B tests::
+
+        algorithm = SSRFAlgorithm(global_data, parameters=SSRFParameters(default_avg_grade=3.0))
+    """
+
+    __slots__ = ('priorities', 'default_avg_grade', 'overlearning_interval', 'grades', 'min_grade', 'max_grade',
+                 'max_num_reviews', '_priority_values', '_scale_factors', '_ideal_intervals', '_key', '_hash')
+
+    def __init__(self, priority_values=None, default_avg_grade=2.5, overlearning_interval=1, grades=GRADES,
+                 max_num_reviews=100):
+        if priority_values is None:
+            priority_values = {PRIORITY_LOW: 2.0, PRIORITY_MEDIUM: 3.0, PRIORITY_HIGH: 4.0}
+        grades = tuple(grades)
+        if not priority_values:
+            raise ValueError("at least one priority should be given")
+        if len(grades) < 2 or grades != tuple(range(grades[0], grades[0] + len(grades))):
+            raise ValueError("grades %s should be at least two consecutive integers" % (grades,))
+        if not grades[0] <= default_avg_grade <= grades[-1]:
+            raise ValueError("default avg. grade %s should be between min. and max. grade" % default_avg_grade)
+        if not overlearning_interval >= 1:
+            raise ValueError("overlearning interval %s should be >= 1" % overlearning_interval)
+        if not max_num_reviews >= 0:
+            raise ValueError("max. number of reviews %s should be >= 0" % max_num_reviews)
+
+        priority_values = tuple(sorted(priority_values.items()))
+        set_attr = super(SSRFParameters, self).__setattr__
+        set_attr('priorities', tuple(priority for priority, _ in priority_values))
+        set_attr('default_avg_grade', default_avg_grade)
+        set_attr('overlearning_interval', overlearning_interval)
+        set_attr('grades', grades)
+        set_attr('min_grade', grades[0])
+        set_attr('max_grade', grades[-1])
+        set_attr('max_num_reviews', max_num_reviews)
+        set_attr('_priority_values', priority_values)
+        # The min. acceptable interval is calculated for the grade below the min. grade
+        set_attr('_scale_factors', dict((priority, dict((grade, exp(grade - value))
+                                                        for grade in (grades[0] - 1,) + grades))
+                                        for priority, value in priority_values))
+        scale_factors = self._scale_factors
+        max_grade = grades[-1]
+        # Same formula as ``interval``
+        set_attr('_ideal_intervals', dict(
+            (priority, (None,) + tuple(overlearning_interval + int(round(num_reviews ** (max_grade / 2.0) *
+                                                                         scale_factors[priority][max_grade]))
+                                       for num_reviews in range(1, max_num_reviews + 1)))
+            for priority in self.priorities))
+        set_attr('_key', (priority_values, default_avg_grade, overlearning_interval, grades, max_num_reviews))
+        set_attr('_hash', hash(self._key))
+
+    @property
+    def priority_values(self):
+        return dict(self._priority_values)
+
+    def scale_factor(self, grade, priority):
+        """ Returns ``exp(grade - P)`` of a priority. """
+        return self._scale_factors[priority][grade]
+
+    def interval(self, num_reviews, prev_avg_grade, grade, priority):
+        """ Returns SSRF for the given parameters; they aren't validated. """
+        if prev_avg_grade == self.max_grade and grade == self.max_grade and 0 < num_reviews <= self.max_num_reviews \
+                and int(num_reviews) == num_reviews:
+            return self._ideal_intervals[priority][int(num_reviews)]
+        return self.overlearning_interval + int(round(num_reviews ** (prev_avg_grade / 2.0) *
+                                                      self._scale_factors[priority][grade]))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SSRF parameters are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("SSRF parameters are immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, SSRFParameters):
+            return NotImplemented
+        return self._key == other._key
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return SSRFParameters, (self.priority_values, self.default_avg_grade, self.overlearning_interval,
+                                self.grades, self.max_num_reviews)
+
+    def __repr__(self):
+        return 'SSRFParameters(priority_values=%r, default_avg_grade=%r, overlearning_interval=%r, grades=%r)' % (
+            self.priority_values, self.default_avg_grade, self.overlearning_interval, self.grades)
+
+
+DEFAULT_PARAMETERS = SSRFParameters()
 
 class SSRFAlgorithmGlobalData (object):
     """ Defines operations which gather data not associated with the current
@@ -25,7 +161,14 @@ class SSRFAlgorithmGlobalData (object):
     Other may need a more global data which is known after some intermediate calculations
     (at the beginning of the calculations the algorithm doesn't know if it is
     doing to request more data and what additional data is required).
+
+    The algorithm works with epoch days (days since 1970-01-01) internally and passes
+    ``date`` objects to the methods. Global data setting ``epoch_days`` to True gets
+    epoch days (ints) instead and ``find_last_free_day`` returns an epoch day,
+    so no dates are created on the way.
     """
+
+    epoch_days = False
     
     def get_workloads(self, from_date, to_date, user_data):
         """ Returns a list with number of items scheduled between from and to date. 
@@ -43,6 +186,298 @@ class SSRFAlgorithmGlobalData (object):
         
         raise NotImplementedError()
 
+    def get_load_profile(self, from_date, to_date, user_data):
+        """ Returns a ``LoadProfile`` with workloads and average difficulties of items
+        scheduled between from and to date.
+
+        Optional; if implemented, the algorithm fetches both sequences with a single call
+        instead of calling ``get_workloads`` and ``get_avg_difficulties``.
+        """
+
+        raise NotImplementedError()
+
+    def get_load_sums(self, from_date, to_date, user_data):
+        """ Returns a ``LoadSums`` with workloads and sums of difficulties of items
+        scheduled between from and to date.
+
+        Optional; if implemented, the algorithm uses it instead of the methods returning
+        average difficulties and averages the sums only when it scores the dates,
+        so a backend can keep per-day sums up to date with ``add_review``,
+        ``remove_review`` and ``move_review`` without recalculating averages.
+        """
+
+        raise NotImplementedError()
+
+    def find_last_free_day(self, from_date, to_date, user_data):
+        """ Returns the latest date between from and to date with no items scheduled
+        or None if every day has some items scheduled.
+
+        Optional; if implemented, the algorithm asks for the free day before fetching workloads
+        and doesn't fetch them at all if there is one, so a backend can answer from an index.
+        """
+
+        raise NotImplementedError()
+
+    def add_review(self, review_date, difficulty, user_data):
+        """ Records a repetition with the given difficulty scheduled on ``review_date``.
+
+        Required only if the algorithm records its placements (``record_placements=True``).
+        """
+
+        raise NotImplementedError()
+
+    def remove_review(self, review_date, difficulty, user_data):
+        """ Removes a repetition with the given difficulty scheduled on ``review_date``. """
+
+        raise NotImplementedError()
+
+    def move_review(self, old_date, old_difficulty, new_date, new_difficulty, user_data):
+        """ Moves a repetition from ``old_date`` to ``new_date`` updating its difficulty.
+
+        Required only if the algorithm records its placements (``record_placements=True``).
+        """
+
+        self.remove_review(old_date, old_difficulty, user_data)
+        self.add_review(new_date, new_difficulty, user_data)
+
+
+def _implements(global_data, method_name):
+    """ Checks if the global data implements an optional method of ``SSRFAlgorithmGlobalData``. """
+    method = getattr(type(global_data), method_name, None)
+    if method is None:
+        return False
+    default_method = getattr(SSRFAlgorithmGlobalData, method_name)
+    return getattr(method, '__func__', method) is not getattr(default_method, '__func__', default_method)
+
+
+_Call = namedtuple('_Call', 'method_name args')
+
+# Indexes of epoch days in arguments of global data calls
+_DAY_ARGS = {
+    'get_workloads': (0, 1),
+    'get_avg_difficulties': (0, 1),
+    'get_load_profile': (0, 1),
+    'get_load_sums': (0, 1),
+    'find_last_free_day': (0, 1),
+    'add_review': (0,),
+    'remove_review': (0,),
+    'move_review': (0, 2),
+}
+
+
+def _uses_epoch_days(global_data):
+    # Compared with True, so mocks don't use epoch days
+    return getattr(global_data, 'epoch_days', False) is True
+
+
+def _call(global_data, call, user_data):
+    """ Calls a global data method described with ``_Call``.
+
+    Days of calls are epoch days; they are converted to dates unless the global data uses epoch days.
+    """
+    args = call.args
+    if not _uses_epoch_days(global_data):
+        day_args = _DAY_ARGS.get(call.method_name, ())
+        args = tuple(_epoch_date(arg) if ind in day_args else arg for ind, arg in enumerate(args))
+    return getattr(global_data, call.method_name)(*(args + (user_data,)))
+
+
+def _run_steps(steps, global_data, user_data, tracer=None):
+    """ Runs scheduling steps calling the global data synchronously; returns the last step. """
+    step = next(steps)
+    while isinstance(step, _Call):
+        if tracer is None:
+            reply = _call(global_data, step, user_data)
+        else:
+            call_start = _timer()
+            reply = _call(global_data, step, user_data)
+            tracer.on_phase(step.method_name, _timer() - call_start)
+        step = steps.send(reply)
+    steps.close()
+    return step
+
+
+class _NoLock (object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NO_LOCK = _NoLock()
+
+
+class _LoadWindow (SSRFAlgorithmGlobalData):
+    """ In-memory snapshot of daily workloads and average difficulties of a single user
+    for a fixed range of epoch days starting with ``first_day``.
+
+    Used to schedule many LUs with a single fetch from the global data.
+    Scheduled repetitions are applied to the snapshot; changes of days
+    out of the window are ignored.
+    """
+
+    epoch_days = True
+
+    def __init__(self, first_day, workloads, avg_difficulties):
+        self.first_day = first_day
+        self.workloads = workloads
+        self.avg_difficulties = avg_difficulties
+
+    def _columns(self):
+        return self.workloads, self.avg_difficulties
+
+    def widen(self, window):
+        """ Adds days of an adjacent window of the same type before or after the days of this window. """
+        if window.first_day < self.first_day:
+            for column, added_column in zip(self._columns(), window._columns()):
+                column[:0] = added_column
+            self.first_day = window.first_day
+        else:
+            for column, added_column in zip(self._columns(), window._columns()):
+                column.extend(added_column)
+
+    def avg_difficulty(self, ind):
+        """ Returns the average difficulty of the day at ``ind``. """
+        return self.avg_difficulties[ind]
+
+    def _slice(self, from_day, to_day):
+        start = from_day - self.first_day
+        stop = to_day - self.first_day + 1
+        if not 0 <= start <= stop <= len(self.workloads):
+            raise AssertionError("days %s - %s are out of the window" % (from_day, to_day))
+        return slice(start, stop)
+
+    def get_workloads(self, from_day, to_day, user_data):
+        return self.workloads[self._slice(from_day, to_day)]
+
+    def get_avg_difficulties(self, from_day, to_day, user_data):
+        return self.avg_difficulties[self._slice(from_day, to_day)]
+
+    def get_load_profile(self, from_day, to_day, user_data):
+        window = self._slice(from_day, to_day)
+        return LoadProfile(self.workloads[window], self.avg_difficulties[window])
+
+    def add_review(self, review_day, difficulty, user_data=None):
+        ind = review_day - self.first_day
+        if not 0 <= ind < len(self.workloads):
+            return
+        workload = self.workloads[ind]
+        self.avg_difficulties[ind] = (workload * self.avg_difficulties[ind] + difficulty) / (workload + 1)
+        self.workloads[ind] = workload + 1
+
+    def remove_review(self, review_day, difficulty, user_data=None):
+        ind = review_day - self.first_day
+        if not 0 <= ind < len(self.workloads) or self.workloads[ind] == 0:
+            return
+        workload = self.workloads[ind]
+        if workload > 1:
+            self.avg_difficulties[ind] = (workload * self.avg_difficulties[ind] - difficulty) / (workload - 1)
+        else:
+            self.avg_difficulties[ind] = 0.0
+        self.workloads[ind] = workload - 1
+
+
+class _LoadSumsWindow (_LoadWindow):
+    """ ``_LoadWindow`` keeping sums of difficulties, used with global data implementing ``get_load_sums``. """
+
+    def __init__(self, first_day, workloads, difficulty_sums):
+        self.first_day = first_day
+        self.workloads = workloads
+        self.difficulty_sums = difficulty_sums
+
+    def _columns(self):
+        return self.workloads, self.difficulty_sums
+
+    def avg_difficulty(self, ind):
+        workload = self.workloads[ind]
+        return self.difficulty_sums[ind] / workload if workload else 0.0
+
+    def get_avg_difficulties(self, from_day, to_day, user_data):
+        window = self._slice(from_day, to_day)
+        return [difficulty_sum / workload if workload else 0.0
+                for workload, difficulty_sum in zip(self.workloads[window], self.difficulty_sums[window])]
+
+    def get_load_profile(self, from_day, to_day, user_data):
+        return LoadProfile(self.get_workloads(from_day, to_day, user_data),
+                           self.get_avg_difficulties(from_day, to_day, user_data))
+
+    def get_load_sums(self, from_day, to_day, user_data):
+        window = self._slice(from_day, to_day)
+        return LoadSums(self.workloads[window], self.difficulty_sums[window])
+
+    def add_review(self, review_day, difficulty, user_data=None):
+        ind = review_day - self.first_day
+        if not 0 <= ind < len(self.workloads):
+            return
+        self.workloads[ind] += 1
+        self.difficulty_sums[ind] += difficulty
+
+    def remove_review(self, review_day, difficulty, user_data=None):
+        ind = review_day - self.first_day
+        if not 0 <= ind < len(self.workloads) or self.workloads[ind] == 0:
+            return
+        self.workloads[ind] -= 1
+        # Reset accumulated rounding errors when the last review is removed and don't let
+        # them drive the sum of the remaining reviews below zero
+        self.difficulty_sums[ind] = max(self.difficulty_sums[ind] - difficulty, 0.0) if self.workloads[ind] else 0.0
+
+
+def _load_window_steps(global_data, first_day, last_day):
+    """ Steps fetching the load of epoch days between first and last day (both inclusive);
+    the last yielded value is a window with the load.
+    """
+    if _implements(global_data, 'get_load_sums'):
+        workloads, difficulty_sums = yield _Call('get_load_sums', (first_day, last_day))
+        yield _LoadSumsWindow(first_day, list(workloads), list(difficulty_sums))
+        return
+    if _implements(global_data, 'get_load_profile'):
+        workloads, avg_difficulties = yield _Call('get_load_profile', (first_day, last_day))
+    else:
+        workloads = yield _Call('get_workloads', (first_day, last_day))
+        avg_difficulties = yield _Call('get_avg_difficulties', (first_day, last_day))
+    yield _LoadWindow(first_day, list(workloads), list(avg_difficulties))
+
+
+class _DatetimeClock (object):
+    """ Review times of ``schedule``: datetimes. """
+
+    @staticmethod
+    def day(review_time):
+        return _epoch_day(review_time)
+
+    @staticmethod
+    def reviewed_within_24h(last_review, now):
+        return bool(last_review) and last_review >= now - timedelta(hours=24)
+
+    @staticmethod
+    def day_later(now):
+        return now + timedelta(hours=24)
+
+    @staticmethod
+    def after_days(now, today, days):
+        """ Returns the time of ``now`` on the day ``days`` after ``today`` (the epoch day of ``now``). """
+        return datetime.combine(_epoch_date(today + days), now.timetz())
+
+
+class _EpochClock (object):
+    """ Review times of ``schedule_epoch``: seconds since the epoch. """
+
+    @staticmethod
+    def day(review_time):
+        return review_time // _SECONDS_PER_DAY
+
+    @staticmethod
+    def reviewed_within_24h(last_review, now):
+        return last_review is not None and last_review >= now - _SECONDS_PER_DAY
+
+    @staticmethod
+    def day_later(now):
+        return now + _SECONDS_PER_DAY
+
+    @staticmethod
+    def after_days(now, today, days):
+        return now + days * _SECONDS_PER_DAY
+
 
 class SSRFAlgorithm (object):
     """ 
@@ -220,6 +655,9 @@ class SSRFAlgorithm (object):
     
     Priority of material P = 3.0 (alternative value, not used in this implementation - average priority of all items)
 
+    These values, values of priorities, grades and the overlearning correction interval
+    are defaults of ``SSRFParameters``; pass another profile to use different ones.
+
     SSRF algorithm parameters for a single learning unit:
     * ``grade`` - see SSRFAlgorithm documentation for allowed values
     * ``num_reviews`` - number of review; starts from 1 for a new LU
@@ -229,208 +667,598 @@ class SSRFAlgorithm (object):
 
     """
 
-    _PRIORITY_MAP = {
-        PRIORITY_LOW: 2.0,
-        PRIORITY_MEDIUM: 3.0,
-        PRIORITY_HIGH: 4.0
-    }
+    # Windows with fewer days are scored in pure Python even with the NumPy backend, since
+    # creating the arrays costs more than the per-day loop there; both take ~75us at 40 days
+    _MIN_VECTORIZED_DAYS = 48
+
+    def __init__(self, global_data, vectorized=None, interval_cache=None, validation=VALIDATION_FULL,
+                 record_placements=False, tracer=None, user_locks=None, parameters=DEFAULT_PARAMETERS):
+        """ ``vectorized`` selects the NumPy backend for the load reduction search in wide
+        windows of acceptable intervals; by default it is used when NumPy is installed.
+
+        ``interval_cache`` is an optional ``ssrf.cache.IntervalCache`` which memoizes
+        calculated intervals. It's used only with ``VALIDATION_FULL``; without the checks
+        calculating an interval is cheaper than looking it up.
+
+        ``validation`` is one of:
+
+        * ``VALIDATION_FULL`` - checks all preconditions and postconditions,
+        * ``VALIDATION_BOUNDARY`` - checks only the input of ``schedule`` and ``schedule_many``
+          (grade, priority, LU algorithm data and lengths of data returned by the global data),
+        * ``VALIDATION_OFF`` - checks nothing.
+
+        Failed checks raise ``AssertionError`` regardless of the ``-O`` interpreter option.
+
+        If ``record_placements`` is set, every change of ``next_review`` made by ``schedule``
+        (except estimated scheduling) is recorded in the global data with ``add_review``
+        or ``move_review``.
+
+        ``tracer`` is an optional ``ssrf.tracing.Tracer`` which receives durations of
+        scheduling phases, widths of acceptable interval windows and scheduling paths.
 
-    _DEFAULT_AVG_GRADE = 2.5
+        ``user_locks`` is an optional ``ssrf.locking.StripedLocks`` for algorithms shared by
+        many threads. ``schedule`` and ``schedule_many`` hold the lock of ``user_data`` while
+        they read the load of the user, choose the next review and record the placement,
+        so concurrent calls for the same user see each other's placements. It requires
+        ``record_placements``.
 
-    def __init__(self, global_data):
+        ``parameters`` is a ``SSRFParameters`` profile; grades, priorities and average grades
+        are validated against it.
+        """
         self.global_data = global_data
+        self.parameters = parameters
+        self.tracer = tracer
+        self.record_placements = record_placements
+        if user_locks is not None and not record_placements:
+            raise ValueError("user locks require recording placements")
+        self.user_locks = user_locks
+        self.interval_cache = interval_cache
+        if vectorized is None:
+            vectorized = numpy is not None
+        if vectorized and numpy is None:
+            raise ValueError("vectorized backend requires NumPy")
+        self.vectorized = vectorized
+        if validation not in VALIDATIONS:
+            raise ValueError("validation %s should be one of %s" % (validation, VALIDATIONS))
+        self.validation = validation
+        self._check_boundary = validation != VALIDATION_OFF
+        self._check_inner = validation == VALIDATION_FULL
 
     def schedule(self, grade, alg_data=None, priority=DEFAULT_PRIORITY, now=None, estimated=False, user_data=None):
         """ Calculates next repetition for a LU and sets ``next_review`` field.
         
+        ``alg_data`` is a dict or a ``ssrf.state.LearningUnitState``; the result contains
+        a copy of the same type.
+
         See the class docstring for an exact description of the scheduling algorithm. 
         """
+        if now is None:
+            now = datetime.utcnow()
+        return self._run_locked(self._schedule_steps(self.global_data, grade, alg_data, priority, now, estimated,
+                                                     self.record_placements),
+                                user_data, PHASE_SCHEDULE)
+
+    def schedule_epoch(self, grade, alg_data=None, priority=DEFAULT_PRIORITY, now=None, estimated=False,
+                       user_data=None):
+        """ Version of ``schedule`` for callers storing review times as integer seconds since the epoch.
+
+        ``now``, ``last_review`` and ``next_review`` of ``alg_data`` and ``next_review``
+        of the result and its ``alg_data`` are seconds since the epoch; days start
+        at midnight UTC. No datetime is created. Global data using epoch days
+        (see ``SSRFAlgorithmGlobalData``) gets no dates either.
+        """
+        if now is None:
+            now = int(_wall_time())
+        return self._run_locked(self._schedule_steps(self.global_data, grade, alg_data, priority, now, estimated,
+                                                     self.record_placements, _EpochClock),
+                                user_data, PHASE_SCHEDULE)
+
+    def schedule_many(self, items, now=None, estimated=False, user_data=None):
+        """ Calculates next repetitions for a sequence of LUs of a single user.
+
+        ``items`` is a sequence of ``(grade, alg_data, priority)`` records.
+        Returns a list of ``AlgorithmResult`` in the order of ``items``.
+
+        Workloads and average difficulties for the union of all acceptable
+        intervals are fetched from the global data once. Every placement is
+        applied to that in-memory window before the next item is scheduled,
+        so the results are identical to calling ``schedule()`` item by item
+        with ``record_placements`` enabled.
+        """
+        if now is None:
+            now = datetime.utcnow()
+        return self._run_locked(self._schedule_many_steps(self.global_data, items, now, estimated),
+                                user_data, PHASE_SCHEDULE_MANY)
+
+    def _run_locked(self, steps, user_data, phase):
+        """ Runs steps holding the lock of a user; the run is reported to the tracer as ``phase``. """
+        with self._lock_for(user_data):
+            if self.tracer is None:
+                return _run_steps(steps, self.global_data, user_data)
+            start = _timer()
+            result = _run_steps(steps, self.global_data, user_data, self.tracer)
+            self.tracer.on_phase(phase, _timer() - start)
+            return result
+
+    def preview(self, alg_data=None, priority=DEFAULT_PRIORITY, windows=False):
+        """ Returns intervals (in days) which ``schedule(..., estimated=True)`` would give
+        the LU for every grade of its parameters, e.g. to label grade buttons.
+
+        If ``windows`` is set, returns ``(min_interval, max_interval)`` acceptable
+        interval windows instead. Nothing is changed and the global data isn't used;
+        the 24h rule of ``schedule`` isn't applied.
+        """
+        parameters = self.parameters
+        if alg_data is None:
+            num_reviews, avg_grade = 1, parameters.default_avg_grade
+        else:
+            num_reviews = alg_data.get('num_reviews', 1)
+            avg_grade = alg_data.get('avg_grade', parameters.default_avg_grade)
+        if self._check_boundary:
+            self._assert_num_reviews(num_reviews)
+            self._assert_avg_grade(avg_grade)
+            self._assert_priority(priority)
+
+        # The min. interval of a grade is the max. interval of the grade below
+        intervals = [self._calculate_interval(num_reviews, avg_grade, grade, priority)
+                     for grade in (parameters.min_grade - 1,) + parameters.grades]
+        if windows:
+            return tuple(zip(intervals[:-1], intervals[1:]))
+        return tuple(intervals[1:])
+
+    def preview_many(self, items, windows=False):
+        """ Returns ``preview`` results for a sequence of ``(alg_data, priority)`` records. """
+        return [self.preview(alg_data, priority, windows) for alg_data, priority in items]
+
+    def _lock_for(self, user_data):
+        """ Returns the lock of a user or a no-op lock if locking is disabled. """
+        if self.user_locks is None:
+            return _NO_LOCK
+        return self.user_locks.lock_for(user_data)
+
+    def _schedule_many_steps(self, global_data, items, now, estimated):
+        """ Steps of ``schedule_many``; see ``_schedule_steps``. """
+        today = _epoch_day(now)
+
+        items = [(grade, self._prepare_alg_data(alg_data), priority) for grade, alg_data, priority in items]
+
+        # Find the union of acceptable intervals of the LUs which need balancing
+        min_interval = max_interval = None
+        if not estimated:
+            for grade, alg_data, priority in items:
+                if self._check_boundary:
+                    self._assert_input(grade, priority, alg_data)
+                if self._reviewed_within_24h(alg_data, now):
+                    continue
+                item_min_interval = self._calculate_interval(alg_data['num_reviews'],
+                    alg_data['avg_grade'], grade - 1, priority)
+                item_max_interval = self._calculate_interval(alg_data['num_reviews'],
+                    alg_data['avg_grade'], grade, priority)
+                if min_interval is None or item_min_interval < min_interval:
+                    min_interval = item_min_interval
+                if max_interval is None or item_max_interval > max_interval:
+                    max_interval = item_max_interval
+
+        if min_interval is None:
+            window = _LoadWindow(today, [], [])
+        else:
+            steps = _load_window_steps(global_data, today + min_interval, today + max_interval)
+            step = next(steps)
+            while isinstance(step, _Call):
+                step = steps.send((yield step))
+            window = step
+            if self._check_boundary:
+                workloads, difficulties = window._columns()
+                self._assert_workloads_length(workloads, min_interval, max_interval)
+                self._assert_avg_difficulties_length(difficulties, workloads)
+
+        results = []
+        for grade, alg_data, priority in items:
+            result = _run_steps(self._schedule_steps(window, grade, alg_data, priority, now, estimated, False),
+                                window, None)
+            placement = self._placement_call(alg_data, result) if not estimated else None
+            if placement is not None:
+                _call(window, placement, None)
+                if self.record_placements:
+                    yield placement
+            results.append(result)
+        yield results
+
+    def _placement_call(self, alg_data, result, clock=_DatetimeClock):
+        """ Returns a call of the global data which records a change of the next review of a LU
+        from ``alg_data`` to ``result``, or None if the next review hasn't changed.
+        """
+        old_next_review = alg_data.get('next_review') if alg_data is not None else None
+        if old_next_review is None:
+            return _Call('add_review', (clock.day(result.next_review), result.alg_data['difficulty']))
+        elif old_next_review != result.next_review:
+            return _Call('move_review', (clock.day(old_next_review), alg_data['difficulty'],
+                                         clock.day(result.next_review), result.alg_data['difficulty']))
+        return None
+
+    def _prepare_alg_data(self, alg_data):
+        """ Returns a filled copy of the input LU algorithm data. """
         if alg_data is None:
             alg_data = {}
         else:
             alg_data = alg_data.copy()
-        alg_data = self._fill_initial_algorithm_data(alg_data)
+        return self._fill_initial_algorithm_data(alg_data)
+
+    def _reviewed_within_24h(self, alg_data, now, clock=_DatetimeClock):
+        return clock.reviewed_within_24h(alg_data.get('last_review'), now)
+
+    def _schedule_steps(self, global_data, grade, alg_data, priority, now, estimated, record_placement,
+                        clock=_DatetimeClock):
+        """ Steps of ``schedule``.
+
+        The generator doesn't call the global data. It yields a ``_Call`` for every
+        global data operation it needs and expects its result to be sent back.
+        The last yielded value is the ``AlgorithmResult``. The same steps are run
+        by synchronous and asynchronous schedulers.
 
-        logger.debug("Input LU data: %s", alg_data)
+        Days are epoch days; ``clock`` converts review times (datetimes or seconds
+        since the epoch) to days and back, so only the review times of the input
+        and the result are of the caller's type.
+        """
+        input_alg_data = alg_data
+        alg_data = self._prepare_alg_data(alg_data)
+
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Input LU data: %s", alg_data)
         
         # Check preconditions
-        self._assert_grade(grade)
-        self._assert_priority(priority)
-        self._assert_alg_data(alg_data)
+        if self._check_boundary:
+            if self.tracer is None:
+                self._assert_input(grade, priority, alg_data)
+            else:
+                validation_start = _timer()
+                self._assert_input(grade, priority, alg_data)
+                self.tracer.on_phase(PHASE_VALIDATION, _timer() - validation_start)
         
-        if now is None:
-            now = datetime.utcnow()
-        today = now.date()
+        today = clock.day(now)
 
-        last_review = alg_data.get('last_review')
-        if last_review and last_review >= now - timedelta(hours=24):
-            logger.debug("Already reviewed within 24h")
+        if clock.reviewed_within_24h(alg_data.get('last_review'), now):
+            if debug:
+                logger.debug("Already reviewed within 24h")
+            if self.tracer is not None:
+                self.tracer.on_path(PATH_REVIEWED_WITHIN_24H)
             alg_data['last_review'] = now
-            if alg_data['next_review'] <= now + timedelta(hours=24):
-                alg_data['next_review'] = now + timedelta(hours=24)
-            return AlgorithmResult(alg_data['next_review'], alg_data)
-
-        # Calculate maximum acceptable repetion interval
-        max_interval = self._calculate_interval(alg_data['num_reviews'],
-            alg_data['avg_grade'], grade, priority)
-        if estimated:
-            ideal_interval = max_interval
+            day_later = clock.day_later(now)
+            if alg_data['next_review'] <= day_later:
+                alg_data['next_review'] = day_later
+            result = AlgorithmResult(alg_data['next_review'], alg_data)
         else:
-            ideal_interval = self._find_ideal_interval_balancing_workload(alg_data, grade, max_interval, priority, today,
-                user_data)
+            # Calculate maximum acceptable repetion interval
+            max_interval = self._calculate_interval(alg_data['num_reviews'],
+                alg_data['avg_grade'], grade, priority)
+            if estimated:
+                if self.tracer is not None:
+                    self.tracer.on_path(PATH_ESTIMATED)
+                ideal_interval = max_interval
+            else:
+                steps = self._find_ideal_interval_balancing_workload(global_data, alg_data, grade, max_interval,
+                    priority, today)
+                step = next(steps)
+                while isinstance(step, _Call):
+                    step = steps.send((yield step))
+                ideal_interval = step
 
-        # Set a new schedule date based on the ideal interval
-        next_review = datetime.combine(today + timedelta(ideal_interval), now.timetz())
+            # Set a new schedule date based on the ideal interval
+            next_review = clock.after_days(now, today, ideal_interval)
 
-        # Update LU algorithm parameters
-        self._update_alg_data_after_scheduling(alg_data, now, ideal_interval, grade, priority, next_review)
+            # Update LU algorithm parameters
+            self._update_alg_data_after_scheduling(alg_data, now, ideal_interval, grade, priority, next_review)
 
-        logger.debug("Output algorithm data: %s", alg_data)
-        
-        # Check postconditions
-        self._assert_alg_data(alg_data)
+            if debug:
+                logger.debug("Output algorithm data: %s", alg_data)
+            
+            # Check postconditions
+            if self._check_inner:
+                self._assert_alg_data(alg_data)
 
-        return AlgorithmResult(next_review, alg_data)
+            result = AlgorithmResult(next_review, alg_data)
 
-    def _find_ideal_interval_balancing_workload(self, alg_data, grade, max_interval, priority, today, user_data):
+        if record_placement and not estimated:
+            placement = self._placement_call(input_alg_data, result, clock)
+            if placement is not None:
+                yield placement
+        yield result
+
+    def _find_ideal_interval_balancing_workload(self, global_data, alg_data, grade, max_interval, priority, today):
+        """ Steps finding the ideal interval; ``today`` is an epoch day. The last yielded value is the interval. """
         # Calculate minimum acceptable repetition interval
         min_interval = self._calculate_interval(alg_data['num_reviews'],
             alg_data['avg_grade'], grade - 1, priority)
-        logger.debug("Min/max acceptable intervals: %d/%d", min_interval, max_interval)
-        assert min_interval <= max_interval,\
-        "min. interval %s > max. interval %s" % (min_interval, max_interval)
-
-        # Get daily workloads for dates between min. and max. interval
-        date_from = today + timedelta(min_interval)
-        date_to = today + timedelta(max_interval)
-        workloads = self.global_data.get_workloads(date_from, date_to, user_data)
-        logger.debug("Workloads (from/to: %s/%s): %s", date_from, date_to, workloads)
-        assert len(workloads) == max_interval - min_interval + 1,\
-            "Workloads length doesn't match the number of days between min. and max. interval"
-
-        # Check if there is a day with no workload
-        zero_workload_ind = self._find_last_zero_workload_ind(workloads)
-        if zero_workload_ind != None:
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Min/max acceptable intervals: %d/%d", min_interval, max_interval)
+        if self._check_inner and not min_interval <= max_interval:
+            raise AssertionError("min. interval %s > max. interval %s" % (min_interval, max_interval))
+        if self.tracer is not None:
+            self.tracer.on_window(max_interval - min_interval + 1)
+
+        # Get daily workloads for days between min. and max. interval
+        first_day = today + min_interval
+        last_day = today + max_interval
+        free_day_query = _implements(global_data, 'find_last_free_day')
+        zero_workload_ind = None
+        if free_day_query:
+            # Check if there is a day with no workload without fetching workloads
+            free_day = yield _Call('find_last_free_day', (first_day, last_day))
+            if free_day is not None:
+                if isinstance(free_day, date):
+                    # Returned by global data using dates
+                    free_day = _epoch_day(free_day)
+                zero_workload_ind = free_day - first_day
+                if self._check_boundary and not 0 <= zero_workload_ind <= max_interval - min_interval:
+                    raise AssertionError("Free day %s should be between %s and %s" % (free_day, first_day, last_day))
+        avg_difficulties = difficulty_sums = None
+        if zero_workload_ind is None:
+            if _implements(global_data, 'get_load_sums'):
+                workloads, difficulty_sums = yield _Call('get_load_sums', (first_day, last_day))
+            elif _implements(global_data, 'get_load_profile'):
+                workloads, avg_difficulties = yield _Call('get_load_profile', (first_day, last_day))
+            else:
+                workloads = yield _Call('get_workloads', (first_day, last_day))
+            if debug:
+                logger.debug("Workloads (from/to: %s/%s): %s", first_day, last_day, workloads)
+            if self._check_boundary:
+                self._assert_workloads_length(workloads, min_interval, max_interval)
+
+            # Check if there is a day with no workload
+            if not free_day_query:
+                zero_workload_ind = self._find_last_zero_workload_ind(workloads)
+        if zero_workload_ind is not None:
             # If true, this is the ideal interval
             ideal_interval = min_interval + zero_workload_ind
+            if self.tracer is not None:
+                self.tracer.on_path(PATH_ZERO_WORKLOAD)
         else:
             # Get daily difficulties for dates between min. and max. interval
-            avg_difficulties = self.global_data.get_avg_difficulties(date_from, date_to, user_data)
-            logger.debug("Avg. difficulties (from/to: %s/%s): %s",
-                date_from, date_to, avg_difficulties)
-            assert len(avg_difficulties) == len(workloads),\
-            "Avg. difficulties length doesn't match the workloads length"
+            if difficulty_sums is not None:
+                if debug:
+                    logger.debug("Difficulty sums (from/to: %s/%s): %s",
+                        first_day, last_day, difficulty_sums)
+                if self._check_boundary:
+                    self._assert_avg_difficulties_length(difficulty_sums, workloads)
+            else:
+                if avg_difficulties is None:
+                    avg_difficulties = yield _Call('get_avg_difficulties', (first_day, last_day))
+                if debug:
+                    logger.debug("Avg. difficulties (from/to: %s/%s): %s",
+                        first_day, last_day, avg_difficulties)
+                if self._check_boundary:
+                    self._assert_avg_difficulties_length(avg_difficulties, workloads)
 
             # Find the ideal interval with the maximum load reduction
+            if self.tracer is not None:
+                scoring_start = _timer()
             max_load_reduction_ind = self._find_max_load_reduction_ind(alg_data,
                 range(min_interval, max_interval + 1),
                 workloads,
-                avg_difficulties, priority)
+                avg_difficulties, priority, difficulty_sums)
             ideal_interval = min_interval + max_load_reduction_ind
-        assert min_interval <= ideal_interval <= max_interval,\
-        "ideal interval should be between min. and max. interval"
-        logger.debug("Ideal interval: %d", ideal_interval)
-        return ideal_interval
-
+            if self.tracer is not None:
+                self.tracer.on_phase(PHASE_SCORING, _timer() - scoring_start)
+                self.tracer.on_path(PATH_BALANCED)
+        if self._check_inner and not min_interval <= ideal_interval <= max_interval:
+            raise AssertionError("ideal interval should be between min. and max. interval")
+        if debug:
+            logger.debug("Ideal interval: %d", ideal_interval)
+        yield ideal_interval
 
     def _calculate_interval(self, num_reviews, prev_avg_grade, grade, priority):
         """ Calculates a maximum acceptable value of inter-repetition interval (SSRF). 
          
         See the class docstring for an exact description of the method. 
         """
+        if not self._check_inner:
+            return self.parameters.interval(num_reviews, prev_avg_grade, grade, priority)
+        if self.interval_cache is not None:
+            return self.interval_cache.get_interval(num_reviews, prev_avg_grade, grade, priority,
+                                                    self._compute_interval, self.parameters)
+        return self._compute_interval(num_reviews, prev_avg_grade, grade, priority)
+
+    def _compute_interval(self, num_reviews, prev_avg_grade, grade, priority):
         # Check preconditions
-        self._assert_num_reviews(num_reviews)
-        self._assert_avg_grade(prev_avg_grade)
-        assert grade in (MIN_GRADE - 1,) + GRADES, \
-            "grade %s should be -1 or one of allowed grades" % grade
-        self._assert_priority(priority)
+        if self._check_inner:
+            self._assert_num_reviews(num_reviews)
+            self._assert_avg_grade(prev_avg_grade)
+            if grade != self.parameters.min_grade - 1:
+                self._assert_grade(grade)
+            self._assert_priority(priority)
         
-        overlearning_factor = 1
-        base_interval = num_reviews ** (prev_avg_grade / 2.0)
-        ssrf_priority = self._PRIORITY_MAP[priority]
-        scale_factor = exp(grade - ssrf_priority)
-        interval = overlearning_factor + int(round(base_interval * scale_factor))
+        interval = self.parameters.interval(num_reviews, prev_avg_grade, grade, priority)
         
         # Check postconditions
-        self._assert_interval(interval)
+        if self._check_inner:
+            self._assert_interval(interval)
         
         return interval 
 
     def _find_last_zero_workload_ind(self, workloads):
         """ Finds an index of the last zero workload or None if all workloads are greater than 0. """
         # Check preconditions
-        self._assert_workloads(workloads)
+        if self._check_inner:
+            self._assert_workloads(workloads)
 
         # If there is no zero workload 0, return None
         if 0 not in workloads:
             return None
         
-        # Return last zero workload index 
-        rev_workloads = workloads[:]
-        rev_workloads.reverse()
-        last_zero_workload_ind = (len(workloads) - 1) - rev_workloads.index(0)
+        # Return last zero workload index scanning backwards without copying workloads
+        last_zero_workload_ind = len(workloads) - 1
+        while workloads[last_zero_workload_ind] != 0:
+            last_zero_workload_ind -= 1
         
         # Check postconditions
-        assert 0 <= last_zero_workload_ind <= (len(workloads) - 1), \
-            "Zero workload index %s should one of the valid workload indexes"  % last_zero_workload_ind
+        if self._check_inner and not 0 <= last_zero_workload_ind <= (len(workloads) - 1):
+            raise AssertionError("Zero workload index %s should one of the valid workload indexes"
+                                 % last_zero_workload_ind)
 
         return last_zero_workload_ind
         
-    def _find_max_load_reduction_ind(self, alg_data, intervals, workloads, avg_difficulties, priority):
+    def _find_max_load_reduction_ind(self, alg_data, intervals, workloads, avg_difficulties, priority,
+                                     difficulty_sums=None):
         """ Finds an index of the maximum load reduction in case the repetition 
         of the current LU was added to the schedule described with workloads and avg. difficulties.
+
+        If ``difficulty_sums`` are given, they are used instead of ``avg_difficulties``
+        and averaged here; otherwise sums are calculated from the averages.
         """
+        use_sums = difficulty_sums is not None
+        difficulties = difficulty_sums if use_sums else avg_difficulties
+
         # Check preconditions
-        self._assert_alg_data(alg_data)
-        self._assert_intervals(intervals)
-        self._assert_workloads(workloads)
-        self._assert_avg_difficulties(avg_difficulties)
+        if self._check_inner:
+            self._assert_alg_data(alg_data)
+            self._assert_intervals(intervals)
+            self._assert_workloads(workloads)
+            if use_sums:
+                self._assert_difficulty_sums(difficulty_sums)
+            else:
+                self._assert_avg_difficulties(avg_difficulties)
+            self._assert_avg_difficulties_length(difficulties, workloads)
 
-        # Calculate load coefficients for each date
-        load_coeffs = self._calculate_load_coeffs(workloads, avg_difficulties)
-        logger.debug("Load coefficients: %s", load_coeffs)
+        if self.vectorized and len(workloads) >= self._MIN_VECTORIZED_DAYS:
+            return self._find_max_load_reduction_ind_vectorized(alg_data, intervals, workloads,
+                                                                avg_difficulties, priority, difficulty_sums)
+
+        # The ideal interval and minimums of the current load are the same for every date,
+        # so they are calculated once and every date costs only a few float operations
+        check_inner = self._check_inner
+        max_grade = self.parameters.max_grade
+        ideal_interval_1 = self._calculate_interval(alg_data['num_reviews'], max_grade, max_grade, priority) + 1.0
+        min_workload = float(min(workloads))
+        if use_sums:
+            min_difficulty = float(min(difficulty_sum / workload if workload else 0.0
+                                       for workload, difficulty_sum in zip(workloads, difficulty_sums)))
+        else:
+            min_difficulty = float(min(avg_difficulties))
+        # Adding a repetition to every date increases the min. workload by 1
+        new_min_workload = float(min(workloads) + 1)
+
+        # First pass: find the min. average difficulty in case the repetition of current LU
+        # was scheduled on min. - max. interval dates
+        new_min_difficulty = None
+        for interval, workload, difficulty in zip(intervals, workloads, difficulties):
+            new_difficulty = log(ideal_interval_1 / (interval + 1.0))
+            if check_inner and not new_difficulty >= 0.0:
+                raise AssertionError("difficulty %s should be >= 0.0" % new_difficulty)
+            difficulty_sum = difficulty if use_sums else workload * difficulty
+            new_avg_difficulty = (difficulty_sum + new_difficulty) / (workload + 1)
+            if new_min_difficulty is None or new_avg_difficulty < new_min_difficulty:
+                new_min_difficulty = new_avg_difficulty
+        new_min_difficulty = float(new_min_difficulty)
+
+        # Second pass: calculate load coefficients with and without the repetition and choose
+        # the latest date with the maximum load coefficient reduction
+        max_load_reduction_ind = None
+        min_load_coeff_rel = None
+        for ind, (interval, workload, difficulty) in enumerate(zip(intervals, workloads, difficulties)):
+            if use_sums:
+                avg_difficulty = difficulty / workload if workload else 0.0
+                difficulty_sum = difficulty
+            else:
+                avg_difficulty = difficulty
+                difficulty_sum = workload * difficulty
+            load_coeff = (((min_workload / workload - 1) ** 2 if workload != 0 else 0.0) +
+                          ((min_difficulty / avg_difficulty - 1) ** 2 if avg_difficulty != 0.0 else 0.0)) / 2
+            new_workload = workload + 1
+            new_avg_difficulty = (difficulty_sum + log(ideal_interval_1 / (interval + 1.0))) / new_workload
+            new_load_coeff = (((new_min_workload / new_workload - 1) ** 2) +
+                              ((new_min_difficulty / new_avg_difficulty - 1) ** 2
+                               if new_avg_difficulty != 0.0 else 0.0)) / 2
+            if check_inner and not (0.0 <= load_coeff <= 1.0 and 0.0 <= new_load_coeff <= 1.0):
+                raise AssertionError("load coefficients %s and %s should be between 0.0 and 1.0"
+                                     % (load_coeff, new_load_coeff))
+            load_coeff_rel = new_load_coeff / load_coeff if load_coeff != 0 else sys.maxsize
+            if min_load_coeff_rel is None or load_coeff_rel <= min_load_coeff_rel:
+                min_load_coeff_rel = load_coeff_rel
+                max_load_reduction_ind = ind
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Max. load reduction (new to old load coefficient relation %s) at the index %s",
+                         min_load_coeff_rel, max_load_reduction_ind)
         
-        # Calculate daily workloads and average difficulties in case 
-        # the repetition of current LU was scheduled on min. - max. interval dates
-        new_workloads = list(map(lambda workload: workload + 1, workloads))
-        logger.debug("New workloads: %s", new_workloads)
-        def new_avg_difficulty(interval, workload, avg_difficulty, new_workload):
-            new_difficulty = self._calculate_difficulty(alg_data['num_reviews'],
-                                              priority,
-                                              interval)
-            logger.debug("New difficulty for the interval %d: %s", interval, new_difficulty)
-            return (workload * avg_difficulty + new_difficulty) / new_workload 
-        new_avg_difficulties = list(map(new_avg_difficulty,
-                                   intervals, workloads, avg_difficulties, new_workloads))
-        logger.debug("New avg. difficulties: %s", new_avg_difficulties)
+        # Check postconditions
+        if self._check_inner and not (max_load_reduction_ind is not None
+                                      and 0 <= max_load_reduction_ind <= len(workloads) - 1):
+            raise AssertionError("Max. load coefficient reduction index %s should one of the valid "
+                                 "load coefficient indexes" % max_load_reduction_ind)
         
+        return max_load_reduction_ind
+
+    def _find_max_load_reduction_ind_vectorized(self, alg_data, intervals, workloads, avg_difficulties, priority,
+                                                difficulty_sums=None):
+        """ NumPy version of ``_find_max_load_reduction_ind``.
+
+        Performs the same calculations as array operations, so both versions choose the same index.
+        """
+        workloads = numpy.asarray(workloads, dtype=float)
+        intervals = numpy.asarray(intervals, dtype=float)
+        if difficulty_sums is not None:
+            difficulty_sums = numpy.asarray(difficulty_sums, dtype=float)
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                avg_difficulties = numpy.where(workloads != 0, difficulty_sums / workloads, 0.0)
+        else:
+            avg_difficulties = numpy.asarray(avg_difficulties, dtype=float)
+            difficulty_sums = workloads * avg_difficulties
+
+        # Calculate load coefficients for each date
+        load_coeffs = self._calculate_load_coeffs_vectorized(workloads, avg_difficulties)
+
+        # Calculate daily workloads and average difficulties in case
+        # the repetition of current LU was scheduled on min. - max. interval dates
+        new_workloads = workloads + 1
+        max_grade = self.parameters.max_grade
+        ideal_interval = self._calculate_interval(alg_data['num_reviews'], max_grade, max_grade, priority)
+        new_difficulties = numpy.log((ideal_interval + 1.0) / (intervals + 1.0))
+        if self._check_inner and not (new_difficulties >= 0.0).all():
+            raise AssertionError("all difficulties %s should be >= 0.0" % new_difficulties)
+        new_avg_difficulties = (difficulty_sums + new_difficulties) / new_workloads
+
         # Calculate load coefficient for each date in case of LU repeated on this date
-        new_load_coeffs = self._calculate_load_coeffs(new_workloads, new_avg_difficulties)
-        logger.debug("New load coefficients: %s", new_load_coeffs)
-        
-        # Choose the date with the maximum load coefficient reduction
-        load_coeff_rel = list(map(lambda coeff1, coeff2: coeff1 / coeff2 if coeff2 != 0 else sys.maxsize,
-                             new_load_coeffs, load_coeffs))
-        logger.debug("Load coefficient relations (new to old): %s", load_coeff_rel)
-        load_coeff_rel.reverse()
-        max_load_reduction_ind = (len(load_coeff_rel) - 1) - load_coeff_rel.index(min(load_coeff_rel))
-        
+        new_load_coeffs = self._calculate_load_coeffs_vectorized(new_workloads, new_avg_difficulties)
+
+        # Choose the latest date with the maximum load coefficient reduction
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            load_coeff_rel = numpy.where(load_coeffs != 0, new_load_coeffs / load_coeffs, float(sys.maxsize))
+        max_load_reduction_ind = (len(load_coeff_rel) - 1) - int(numpy.argmin(load_coeff_rel[::-1]))
+
         # Check postconditions
-        assert 0 <= max_load_reduction_ind <= len(load_coeffs) - 1, \
-            "Max. load coefficient reduction index %s should one of the valid load coefficient indexes"  % max_load_reduction_ind
-        
+        if self._check_inner and not 0 <= max_load_reduction_ind <= len(load_coeffs) - 1:
+            raise AssertionError("Max. load coefficient reduction index %s should one of the valid "
+                                 "load coefficient indexes" % max_load_reduction_ind)
+
         return max_load_reduction_ind
 
+    def _calculate_load_coeffs_vectorized(self, workloads, avg_difficulties):
+        """ NumPy version of ``_calculate_load_coeffs`` working on float arrays. """
+        min_workload = workloads.min()
+        min_difficulty = avg_difficulties.min()
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            workload_errors = numpy.where(workloads != 0, (min_workload / workloads - 1) ** 2, 0.0)
+            difficulty_errors = numpy.where(avg_difficulties != 0.0, (min_difficulty / avg_difficulties - 1) ** 2, 0.0)
+        load_coeffs = (workload_errors + difficulty_errors) / 2
+
+        # Check postconditions
+        if self._check_inner and not ((0.0 <= load_coeffs) & (load_coeffs <= 1.0)).all():
+            raise AssertionError("all load coefficients %s should be between 0.0 and 1.0" % load_coeffs)
+
+        return load_coeffs
+
     def _calculate_load_coeffs(self, workloads, avg_difficulties):
         """ Calcuates load coefficients based on workloads and averages difficulties.
          
         See the class docstring for an exact description of the method. 
         """
         # Check preconditions
-        self._assert_workloads(workloads)
-        self._assert_avg_difficulties(avg_difficulties)
-        assert len(avg_difficulties) == len(workloads), \
-             "Avg. difficulties length doesn't match the workloads length"
+        if self._check_inner:
+            self._assert_workloads(workloads)
+            self._assert_avg_difficulties(avg_difficulties)
+            self._assert_avg_difficulties_length(avg_difficulties, workloads)
         
         min_workload = float(min(workloads))
         min_difficulty = float(min(avg_difficulties))
@@ -440,14 +1268,16 @@ class SSRFAlgorithm (object):
         load_coeffs = list(map(calculate_load_coeffs, workloads, avg_difficulties))
 
         # Check postconditions
-        self._assert_load_coeffs(load_coeffs)
+        if self._check_inner:
+            self._assert_load_coeffs(load_coeffs)
         
         return load_coeffs 
 
     def _update_alg_data_after_scheduling(self, alg_data, now, ideal_interval, grade, priority, next_review):
         """ Updates the LU algorithm parameters after a successful scheduling. """
         # Check preconditions
-        self._assert_alg_data(alg_data)
+        if self._check_inner:
+            self._assert_alg_data(alg_data)
         
         new_num_reviews = alg_data['num_reviews'] + 1
         new_avg_grade = (alg_data['avg_grade'] * alg_data['num_reviews'] + grade) / new_num_reviews
@@ -461,7 +1291,8 @@ class SSRFAlgorithm (object):
         alg_data['next_review'] = next_review
 
         # Check postconditions
-        self._assert_alg_data(alg_data)
+        if self._check_inner:
+            self._assert_alg_data(alg_data)
 
     def _calculate_difficulty(self, num_reviews, priority, last_interval):
         """ Calcuates a difficulty of a LU.
@@ -469,38 +1300,47 @@ class SSRFAlgorithm (object):
         See the class docstring for an exact description of the method. 
         """
         # Check preconditions
-        self._assert_num_reviews(num_reviews)
-        self._assert_priority(priority)
-        self._assert_interval(last_interval)
+        if self._check_inner:
+            self._assert_num_reviews(num_reviews)
+            self._assert_priority(priority)
+            self._assert_interval(last_interval)
         
         ideal_interval = self._calculate_interval(num_reviews, 
-                                        MAX_GRADE, 
-                                        MAX_GRADE, 
+                                        self.parameters.max_grade, 
+                                        self.parameters.max_grade, 
                                         priority)
         difficulty = log((ideal_interval + 1.0) / (last_interval + 1.0))
         
         # Check postconditions
-        self._assert_difficulty(difficulty)
+        if self._check_inner:
+            self._assert_difficulty(difficulty)
         
         return difficulty
 
+    def _assert_input(self, grade, priority, alg_data):
+        self._assert_grade(grade)
+        self._assert_priority(priority)
+        self._assert_alg_data(alg_data)
+
     def _assert_grade(self, grade):
-        assert grade in GRADES, \
-            "grade %s should be one of allowed grades" % grade
+        if grade not in self.parameters.grades:
+            raise AssertionError("grade %s should be one of allowed grades" % grade)
     
     def _assert_num_reviews(self, num_reviews):
-        assert num_reviews > 0, "number of reviews %s should be > 0" % num_reviews
+        if not num_reviews > 0:
+            raise AssertionError("number of reviews %s should be > 0" % num_reviews)
     
     def _assert_avg_grade(self, avg_grade):
-        assert MIN_GRADE <= avg_grade <= MAX_GRADE, \
-            "avg. grade %s should be between min. and max. allowed grade" % avg_grade
+        if not self.parameters.min_grade <= avg_grade <= self.parameters.max_grade:
+            raise AssertionError("avg. grade %s should be between min. and max. allowed grade" % avg_grade)
 
     def _assert_priority(self, priority):
-        assert priority in PRIORITIES, \
-            "priority %s should be one of allowed priorities" % priority
+        if priority not in self.parameters.priorities:
+            raise AssertionError("priority %s should be one of allowed priorities" % priority)
 
     def _assert_difficulty(self, difficulty):
-        assert difficulty >= 0.0, "difficulty %s should be >= 0.0" % difficulty
+        if not difficulty >= 0.0:
+            raise AssertionError("difficulty %s should be >= 0.0" % difficulty)
     
     def _assert_alg_data(self, alg_data):
         self._assert_num_reviews(alg_data['num_reviews'])
@@ -508,7 +1348,8 @@ class SSRFAlgorithm (object):
         self._assert_difficulty(alg_data['difficulty'])
 
     def _assert_interval(self, interval):
-        assert interval >= 1, "interval %s should be >= 1" % interval
+        if not interval >= 1:
+            raise AssertionError("interval %s should be >= 1" % interval)
 
     def _assert_intervals(self, intervals):
         for interval in intervals:
@@ -516,27 +1357,42 @@ class SSRFAlgorithm (object):
         
     def _assert_workloads(self, workloads):
         for workload in workloads:
-            assert workload >= 0, "all workloads %s should be >= 0" % workloads
+            if not workload >= 0:
+                raise AssertionError("all workloads %s should be >= 0" % workloads)
+
+    def _assert_workloads_length(self, workloads, min_interval, max_interval):
+        if len(workloads) != max_interval - min_interval + 1:
+            raise AssertionError("Workloads length doesn't match the number of days between min. and max. interval")
     
     def _assert_avg_difficulties(self, avg_difficulties):
         for avg_difficulty in avg_difficulties:
-            assert avg_difficulty >= 0.0, \
-                "all avg. difficulties %s should be >= 0"  % avg_difficulties
+            if not avg_difficulty >= 0.0:
+                raise AssertionError("all avg. difficulties %s should be >= 0" % avg_difficulties)
+
+    def _assert_difficulty_sums(self, difficulty_sums):
+        for difficulty_sum in difficulty_sums:
+            if not difficulty_sum >= -_DIFFICULTY_SUM_TOLERANCE:
+                raise AssertionError("all difficulty sums %s should be >= 0" % difficulty_sums)
+
+    def _assert_avg_difficulties_length(self, avg_difficulties, workloads):
+        if len(avg_difficulties) != len(workloads):
+            raise AssertionError("Avg. difficulties length doesn't match the workloads length")
 
     def _assert_load_coeffs(self, load_coeffs):
         for load_coeff in load_coeffs:
-            assert 0.0 <= load_coeff <= 1.0, \
-                "all load coefficients %s should be between 0.0 and 1.0"  % load_coeffs
+            if not 0.0 <= load_coeff <= 1.0:
+                raise AssertionError("all load coefficients %s should be between 0.0 and 1.0" % load_coeffs)
 
     def _fill_initial_algorithm_data(self, alg_data=None):
         """ Fills the initial SSRF algorithm parameters for a newly created LU. """
         alg_data = alg_data if alg_data is not None else {}
         alg_data.setdefault('num_reviews', 1)
-        alg_data.setdefault('avg_grade', SSRFAlgorithm._DEFAULT_AVG_GRADE)
+        alg_data.setdefault('avg_grade', self.parameters.default_avg_grade)
         alg_data.setdefault('difficulty', 0.0)
 
         # check postconditions
-        self._assert_alg_data(alg_data)
+        if self._check_inner:
+            self._assert_alg_data(alg_data)
         return alg_data
 
     def get_difficulty(self, alg_data):
@@ -0,0 +1,101 @@
+""" Scheduling with asynchronous global data; requires Python 3.5+. """
+import asyncio
+import inspect
+from datetime import datetime
+
+from ssrf.algorithm import SSRFAlgorithm, DEFAULT_PRIORITY, _Call, _EpochClock, _call, _timer, _wall_time
+from ssrf.tracing import PHASE_SCHEDULE, PHASE_SCHEDULE_MANY
+
+
+async def _run_steps_async(steps, global_data, user_data, tracer=None):
+    """ Runs scheduling steps awaiting the global data; returns the last step.
+
+    Global data methods may be coroutines or plain functions.
+    """
+    step = next(steps)
+    while isinstance(step, _Call):
+        if tracer is not None:
+            call_start = _timer()
+        reply = _call(global_data, step, user_data)
+        if inspect.isawaitable(reply):
+            reply = await reply
+        if tracer is not None:
+            tracer.on_phase(step.method_name, _timer() - call_start)
+        step = steps.send(reply)
+    steps.close()
+    return step
+
+
+class AsyncSSRFAlgorithm (SSRFAlgorithm):
+    """ SSRF algorithm for asyncio applications.
+
+    Methods of the global data (``get_workloads``, ``get_avg_difficulties``, ``get_load_profile``
+    and, when placements are recorded, ``add_review`` and ``move_review``) may be coroutines;
+    they are awaited instead of blocking the event loop. The scheduling math is shared
+    with ``SSRFAlgorithm``, so both give the same results for the same global data.
+
+    ``user_locks`` aren't supported: holding a thread lock while awaiting the global data
+    would block the event loop. ``schedule_users`` schedules LUs of every user one after another.
+    """
+
+    def __init__(self, global_data, *args, **kwargs):
+        SSRFAlgorithm.__init__(self, global_data, *args, **kwargs)
+        if self.user_locks is not None:
+            raise ValueError("user locks aren't supported by the asynchronous algorithm")
+
+    async def schedule(self, grade, alg_data=None, priority=DEFAULT_PRIORITY, now=None, estimated=False,
+                       user_data=None):
+        """ Coroutine version of ``SSRFAlgorithm.schedule``. """
+        if now is None:
+            now = datetime.utcnow()
+        start = _timer()
+        result = await _run_steps_async(self._schedule_steps(self.global_data, grade, alg_data, priority, now,
+                                                             estimated, self.record_placements),
+                                        self.global_data, user_data, self.tracer)
+        if self.tracer is not None:
+            self.tracer.on_phase(PHASE_SCHEDULE, _timer() - start)
+        return result
+
+    async def schedule_epoch(self, grade, alg_data=None, priority=DEFAULT_PRIORITY, now=None, estimated=False,
+                             user_data=None):
+        """ Coroutine version of ``SSRFAlgorithm.schedule_epoch``. """
+        if now is None:
+            now = int(_wall_time())
+        start = _timer()
+        result = await _run_steps_async(self._schedule_steps(self.global_data, grade, alg_data, priority, now,
+                                                             estimated, self.record_placements, _EpochClock),
+                                        self.global_data, user_data, self.tracer)
+        if self.tracer is not None:
+            self.tracer.on_phase(PHASE_SCHEDULE, _timer() - start)
+        return result
+
+    async def schedule_many(self, items, now=None, estimated=False, user_data=None):
+        """ Coroutine version of ``SSRFAlgorithm.schedule_many``. """
+        if now is None:
+            now = datetime.utcnow()
+        start = _timer()
+        results = await _run_steps_async(self._schedule_many_steps(self.global_data, items, now, estimated),
+                                         self.global_data, user_data, self.tracer)
+        if self.tracer is not None:
+            self.tracer.on_phase(PHASE_SCHEDULE_MANY, _timer() - start)
+        return results
+
+    async def schedule_users(self, users_items, now=None, estimated=False, concurrency=10):
+        """ Schedules LUs of many users concurrently.
+
+        ``users_items`` is a sequence of ``(user_data, items)`` pairs with distinct users,
+        where ``items`` are passed to ``schedule_many``. LUs of a single user are scheduled
+        one after another, while different users are scheduled concurrently with at most
+        ``concurrency`` users at a time. Returns lists of ``AlgorithmResult`` in the order of ``users_items``.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency %s should be >= 1" % concurrency)
+        if now is None:
+            now = datetime.utcnow()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def schedule_user(user_data, items):
+            async with semaphore:
+                return await self.schedule_many(items, now=now, estimated=estimated, user_data=user_data)
+
+        return await asyncio.gather(*[schedule_user(user_data, items) for user_data, items in users_items])
@@ -0,0 +1,147 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from ssrf.algorithm import SSRFAlgorithm
+from ssrf.global_data import WorkloadCalendar
+
+BulkProgress = namedtuple('BulkProgress', 'users items elapsed')
+
+_worker_algorithm = None
+
+
+def _init_worker(algorithm_options):
+    """ Creates the algorithm and the calendar local to a worker process. """
+    global _worker_algorithm
+    _worker_algorithm = SSRFAlgorithm(WorkloadCalendar(), **algorithm_options)
+
+
+def _reschedule_user(task):
+    """ Reschedules all LUs of a single user in a worker process. """
+    user_data, items, now, estimated = task
+    calendar = _worker_algorithm.global_data
+    # Load current repetitions of the user, so they are moved while rebalancing
+    for _, _, alg_data, _ in items:
+        if alg_data is not None and alg_data.get('next_review') is not None:
+            calendar.add_review(alg_data['next_review'].date(), alg_data['difficulty'], user_data)
+    try:
+        results = _worker_algorithm.schedule_many([(grade, alg_data, priority)
+                                                   for _, grade, alg_data, priority in items],
+                                                  now=now, estimated=estimated, user_data=user_data)
+    finally:
+        calendar.discard_user(user_data)
+    return user_data, [(lu_id, result) for (lu_id, _, _, _), result in zip(items, results)]
+
+
+def _gated(tasks, semaphore, stopped):
+    """ Yields tasks, taking the semaphore before reading every task; stops when ``stopped`` is set. """
+    tasks = iter(tasks)
+    while True:
+        semaphore.acquire()
+        if stopped.is_set():
+            return
+        try:
+            task = next(tasks)
+        except StopIteration:
+            return
+        yield task
+
+
+class BulkRescheduler (object):
+    """ Reschedules LUs of many users in a pool of processes.
+
+    Calendars of users are independent, so the work is partitioned by users.
+    A worker process loads the current repetitions of a user into its local
+    ``WorkloadCalendar`` and reschedules the LUs of the user one after another
+    with ``SSRFAlgorithm.schedule_many``.
+
+    ``algorithm_options`` are keyword arguments of ``SSRFAlgorithm`` used by workers.
+    ``processes`` is the number of worker processes (by default the number of CPUs);
+    0 reschedules in the current process. At most ``max_pending`` users (by default
+    twice the number of processes) are read from the input ahead of the consumed
+    results, so the items of all users aren't queued in memory when the workers
+    fall behind. ``progress`` is called with ``BulkProgress`` after every rescheduled user.
+
+    If ``checkpoint_path`` is given, keys of rescheduled users are appended to that file
+    after their results are consumed, and users found there are skipped when
+    the rescheduling is run again, e.g. after a crash. User keys must be JSON serializable
+    in that case.
+    """
+
+    def __init__(self, algorithm_options=None, processes=None, checkpoint_path=None, progress=None,
+                 max_pending=None):
+        self.algorithm_options = algorithm_options or {}
+        self.processes = processes if processes is not None else multiprocessing.cpu_count()
+        if self.processes < 0:
+            raise ValueError("number of processes %s should be >= 0" % self.processes)
+        self.max_pending = max_pending if max_pending is not None else max(2 * self.processes, 1)
+        if self.max_pending <= 0:
+            raise ValueError("max. number of pending users %s should be > 0" % self.max_pending)
+        self.checkpoint_path = checkpoint_path
+        self.progress = progress
+
+    def reschedule(self, users_items, now=None, estimated=False):
+        """ Reschedules LUs of users and yields ``(user_data, results)`` pairs.
+
+        ``users_items`` is an iterable of ``(user_data, items)`` pairs, where ``items``
+        is a list of ``(lu_id, grade, alg_data, priority)`` records of a single user.
+        ``results`` is a list of ``(lu_id, AlgorithmResult)`` pairs in the order of ``items``.
+        Users are yielded in the order they are completed.
+        """
+        if now is None:
+            now = datetime.utcnow()
+        completed = self._load_checkpoint()
+        tasks = ((user_data, items, now, estimated) for user_data, items in users_items
+                 if self._checkpoint_key(user_data) not in completed)
+
+        semaphore = stopped = None
+        if self.processes == 0:
+            _init_worker(self.algorithm_options)
+            user_results = (_reschedule_user(task) for task in tasks)
+            pool = None
+        else:
+            # The pool reads tasks in its own thread; the semaphore blocks it
+            # when max_pending users are waiting for their results to be consumed
+            semaphore = threading.Semaphore(self.max_pending)
+            stopped = threading.Event()
+            pool = multiprocessing.Pool(self.processes, _init_worker, (self.algorithm_options,))
+            user_results = pool.imap_unordered(_reschedule_user, _gated(tasks, semaphore, stopped))
+
+        start_time = time.time()
+        num_users = num_items = 0
+        try:
+            for user_data, results in user_results:
+                yield user_data, results
+                self._save_checkpoint(user_data)
+                if semaphore is not None:
+                    semaphore.release()
+                num_users += 1
+                num_items += len(results)
+                if self.progress is not None:
+                    self.progress(BulkProgress(num_users, num_items, time.time() - start_time))
+        finally:
+            if pool is not None:
+                # Wake up the reading thread, so the pool can be terminated
+                stopped.set()
+                semaphore.release()
+                pool.terminate()
+                pool.join()
+
+    def _checkpoint_key(self, user_data):
+        return json.dumps(user_data) if self.checkpoint_path is not None else None
+
+    def _load_checkpoint(self):
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return set()
+        with open(self.checkpoint_path) as checkpoint:
+            return set(line.rstrip('\n') for line in checkpoint if line.endswith('\n'))
+
+    def _save_checkpoint(self, user_data):
+        if self.checkpoint_path is None:
+            return
+        with open(self.checkpoint_path, 'a') as checkpoint:
+            checkpoint.write(json.dumps(user_data) + '\n')
@@ -0,0 +1,209 @@
+import time
+from collections import namedtuple, OrderedDict
+
+from ssrf.algorithm import DEFAULT_PARAMETERS, SSRFAlgorithmGlobalData, LoadSums, _Call, _call, _epoch_day, \
+    _implements, _load_window_steps, _run_steps
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses size max_size')
+
+
+class IntervalCache (object):
+    """ Memoizes inter-repetition intervals (SSRF) calculated by ``SSRFAlgorithm``
+    with ``VALIDATION_FULL``, so a hit skips the checks of the calculation.
+
+    Intervals of the ideal LU (average grade and current grade equal to the max. grade),
+    which are needed for every difficulty calculation, are looked up in the table
+    of ``SSRFParameters`` and aren't cached again. All other intervals depend on
+    the continuous average grade, so they are kept in a LRU cache bounded to
+    ``max_size`` entries. Intervals are cached separately for every ``SSRFParameters``
+    profile, so algorithms with different parameters can share a cache.
+
+    Pass an instance to ``SSRFAlgorithm`` to enable it::
+
+        algorithm = SSRFAlgorithm(global_data, interval_cache=IntervalCache())
+    """
+
+    def __init__(self, max_size=10000):
+        if max_size <= 0:
+            raise ValueError("max. size %s should be > 0" % max_size)
+        self.max_size = max_size
+        self._intervals = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_interval(self, num_reviews, prev_avg_grade, grade, priority, calculate_interval,
+                     parameters=DEFAULT_PARAMETERS):
+        """ Returns the interval for the given parameters.
+
+        On a miss the interval is calculated with ``calculate_interval``, which takes
+        the same arguments as ``SSRFAlgorithm._calculate_interval`` and uses ``parameters``.
+        """
+        max_grade = parameters.max_grade
+        if prev_avg_grade == max_grade and grade == max_grade and 0 < num_reviews <= parameters.max_num_reviews \
+                and int(num_reviews) == num_reviews and priority in parameters.priorities:
+            # Valid arguments of the table of ideal intervals
+            return parameters.interval(num_reviews, prev_avg_grade, grade, priority)
+
+        key = (num_reviews, prev_avg_grade, grade, priority, parameters)
+        interval = self._intervals.pop(key, None)
+        if interval is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            interval = calculate_interval(num_reviews, prev_avg_grade, grade, priority)
+            if len(self._intervals) >= self.max_size:
+                self._intervals.popitem(last=False)
+        self._intervals[key] = interval
+        return interval
+
+    def info(self):
+        """ Returns hit/miss counters and the current size of the LRU cache. """
+        return CacheInfo(self.hits, self.misses, len(self._intervals), self.max_size)
+
+    def clear(self):
+        """ Removes all cached intervals and resets the counters. """
+        self._intervals.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class SessionCache (SSRFAlgorithmGlobalData):
+    """ Caches workloads and difficulties fetched from the global data for a study session.
+
+    Wraps the global data and keeps a contiguous range of days fetched for every user.
+    When the algorithm asks for days out of the range, only the missing days are fetched
+    and the range is widened. Repetitions recorded by the algorithm are applied to
+    the cached days in place and passed to the wrapped global data if it implements
+    ``add_review``, ``remove_review`` or ``move_review``; so the next ``schedule``
+    sees its own placements without fetching them again::
+
+        session_cache = SessionCache(global_data)
+        algorithm = SSRFAlgorithm(session_cache, record_placements=True)
+
+    Changes made by anyone else are seen after ``invalidate`` or when the cached days
+    of a user get older than ``ttl`` seconds (None disables the expiration).
+    At most ``max_users`` users are cached; the least recently used are evicted.
+    ``clock`` returns the current time in seconds.
+
+    Cached days are epoch days; dates received from the algorithm are converted,
+    so the wrapped global data may use dates or epoch days (see ``SSRFAlgorithmGlobalData``)
+    in fetches as well as in recorded repetitions.
+    """
+
+    def __init__(self, global_data, max_users=1000, ttl=300.0, clock=time.time):
+        if max_users <= 0:
+            raise ValueError("max. number of users %s should be > 0" % max_users)
+        if ttl is not None and ttl <= 0:
+            raise ValueError("TTL %s should be None or > 0" % ttl)
+        self.global_data = global_data
+        self.max_users = max_users
+        self.ttl = ttl
+        self.clock = clock
+        # user_data -> (window, expiration time)
+        self._windows = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _fetch(self, first_day, last_day, user_data):
+        """ Returns a window of epoch days fetched from the global data; it keeps difficulty sums
+        if the global data implements ``get_load_sums``, average difficulties otherwise.
+        """
+        return _run_steps(_load_window_steps(self.global_data, first_day, last_day), self.global_data, user_data)
+
+    def _get_window(self, user_data):
+        """ Returns a cached window of a user or None; expired windows are dropped. """
+        entry = self._windows.pop(user_data, None)
+        if entry is None:
+            return None
+        window, expires = entry
+        if expires is not None and self.clock() >= expires:
+            return None
+        self._windows[user_data] = entry
+        return window
+
+    def _get_window_covering(self, first_day, last_day, user_data):
+        """ Returns a window of a user covering the epoch days, fetching the missing days. """
+        window = self._get_window(user_data)
+        if window is None:
+            self.misses += 1
+            window = self._fetch(first_day, last_day, user_data)
+            if len(self._windows) >= self.max_users:
+                self._windows.popitem(last=False)
+            self._windows[user_data] = (window, self.clock() + self.ttl if self.ttl is not None else None)
+            return window
+
+        window_last_day = window.first_day + len(window.workloads) - 1
+        if window.first_day <= first_day and last_day <= window_last_day:
+            self.hits += 1
+            return window
+        self.misses += 1
+        if first_day < window.first_day:
+            window.widen(self._fetch(first_day, window.first_day - 1, user_data))
+        if last_day > window_last_day:
+            window.widen(self._fetch(window_last_day + 1, last_day, user_data))
+        return window
+
+    def _window_days(self, from_date, to_date, user_data):
+        """ Returns a window covering the dates and the epoch days of the dates. """
+        first_day, last_day = _epoch_day(from_date), _epoch_day(to_date)
+        return self._get_window_covering(first_day, last_day, user_data), first_day, last_day
+
+    def get_workloads(self, from_date, to_date, user_data):
+        window, first_day, last_day = self._window_days(from_date, to_date, user_data)
+        return window.get_workloads(first_day, last_day, user_data)
+
+    def get_avg_difficulties(self, from_date, to_date, user_data):
+        window, first_day, last_day = self._window_days(from_date, to_date, user_data)
+        return window.get_avg_difficulties(first_day, last_day, user_data)
+
+    def get_load_profile(self, from_date, to_date, user_data):
+        window, first_day, last_day = self._window_days(from_date, to_date, user_data)
+        return window.get_load_profile(first_day, last_day, user_data)
+
+    def get_load_sums(self, from_date, to_date, user_data):
+        window, first_day, last_day = self._window_days(from_date, to_date, user_data)
+        if _implements(window, 'get_load_sums'):
+            return window.get_load_sums(first_day, last_day, user_data)
+        # The wrapped global data keeps only average difficulties
+        workloads, avg_difficulties = window.get_load_profile(first_day, last_day, user_data)
+        return LoadSums(workloads, [workload * avg_difficulty
+                                    for workload, avg_difficulty in zip(workloads, avg_difficulties)])
+
+    def add_review(self, review_date, difficulty, user_data):
+        day = _epoch_day(review_date)
+        if _implements(self.global_data, 'add_review'):
+            _call(self.global_data, _Call('add_review', (day, difficulty)), user_data)
+        window = self._get_window(user_data)
+        if window is not None:
+            window.add_review(day, difficulty)
+
+    def remove_review(self, review_date, difficulty, user_data):
+        day = _epoch_day(review_date)
+        if _implements(self.global_data, 'remove_review'):
+            _call(self.global_data, _Call('remove_review', (day, difficulty)), user_data)
+        window = self._get_window(user_data)
+        if window is not None:
+            window.remove_review(day, difficulty)
+
+    def move_review(self, old_date, old_difficulty, new_date, new_difficulty, user_data):
+        old_day, new_day = _epoch_day(old_date), _epoch_day(new_date)
+        if _implements(self.global_data, 'move_review') or _implements(self.global_data, 'remove_review'):
+            _call(self.global_data, _Call('move_review', (old_day, old_difficulty, new_day, new_difficulty)),
+                  user_data)
+        window = self._get_window(user_data)
+        if window is not None:
+            window.remove_review(old_day, old_difficulty)
+            window.add_review(new_day, new_difficulty)
+
+    def invalidate(self, user_data=None):
+        """ Drops cached days of a user or of all users if ``user_data`` is None. """
+        if user_data is None:
+            self._windows.clear()
+        else:
+            self._windows.pop(user_data, None)
+
+    def info(self):
+        """ Returns counters of calls answered from the cache (hits) and calls which fetched days (misses)
+        and the number of cached users.
+        """
+        return CacheInfo(self.hits, self.misses, len(self._windows), self.max_users)
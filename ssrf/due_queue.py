@@ -0,0 +1,93 @@
+import heapq
+import itertools
+
+
+class DueQueue (object):
+    """ Queue of LUs of a single user ordered by their next review.
+
+    A binary heap with lazy removal: pushing, rescheduling and popping a LU cost
+    O(log n), removing a LU costs O(1). Removed entries are dropped from the heap
+    when they reach its top or when they outnumber the queued LUs.
+
+    Push scheduling results and pop the due LUs::
+
+        queue.push_result(lu_id, algorithm.schedule(grade, alg_data))
+        for lu_id, next_review in queue.pop_due(datetime.utcnow(), limit=20):
+            ...
+
+    A popped LU leaves the queue until it is pushed again after its review.
+    ``schedule`` sets the next review at least 24h ahead of a repeated review,
+    so a LU pushed back after reviewing it again within 24h is not due before then.
+    """
+
+    _REMOVED = object()
+
+    def __init__(self):
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, lu_id):
+        return lu_id in self._entries
+
+    def push(self, lu_id, next_review):
+        """ Adds a LU or changes the next review of a queued LU. """
+        if lu_id in self._entries:
+            self._invalidate(lu_id)
+        entry = [next_review, next(self._counter), lu_id]
+        self._entries[lu_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def push_result(self, lu_id, result):
+        """ Adds or updates a LU with an ``AlgorithmResult`` of scheduling it. """
+        self.push(lu_id, result.next_review)
+
+    def remove(self, lu_id):
+        """ Removes a LU from the queue. """
+        if lu_id not in self._entries:
+            raise KeyError(lu_id)
+        self._invalidate(lu_id)
+
+    def get_next_review(self, lu_id):
+        """ Returns the next review of a queued LU. """
+        return self._entries[lu_id][0]
+
+    def peek(self):
+        """ Returns ``(lu_id, next_review)`` of the most urgent LU or None if the queue is empty. """
+        self._drop_removed()
+        if not self._heap:
+            return None
+        next_review, _, lu_id = self._heap[0]
+        return lu_id, next_review
+
+    def pop_due(self, now, limit=None):
+        """ Removes and returns LUs with the next review before or at ``now``.
+
+        Returns a list of at most ``limit`` ``(lu_id, next_review)`` pairs,
+        the most overdue LUs first.
+        """
+        due = []
+        while limit is None or len(due) < limit:
+            self._drop_removed()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            next_review, _, lu_id = heapq.heappop(self._heap)
+            del self._entries[lu_id]
+            due.append((lu_id, next_review))
+        return due
+
+    def _invalidate(self, lu_id):
+        self._entries.pop(lu_id)[2] = self._REMOVED
+        if len(self._heap) > 2 * len(self._entries) + 16:
+            self._compact()
+
+    def _drop_removed(self):
+        while self._heap and self._heap[0][2] is self._REMOVED:
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if entry[2] is not self._REMOVED]
+        heapq.heapify(self._heap)
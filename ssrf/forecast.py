@@ -0,0 +1,110 @@
+""" Forecasts of daily workloads.
+
+Projects how many reviews a deck will have on each of the next days if
+the user keeps grading with a given grade distribution::
+
+    expected_reviews = forecast_workloads(algorithm, states, days=90)
+
+Every LU is reviewed on its next review day, graded at random and scheduled
+with the maximum acceptable interval (``_calculate_interval``, as in
+``schedule(..., estimated=True)``) until it leaves the horizon. The counts of
+reviews are averaged over ``runs`` seeded simulations. The global data isn't used.
+"""
+import random
+from datetime import datetime
+
+from ssrf.algorithm import DEFAULT_PRIORITY, numpy
+from ssrf.simulator import DEFAULT_GRADE_WEIGHTS
+
+
+def forecast_workloads(algorithm, states, days, now=None, grade_weights=DEFAULT_GRADE_WEIGHTS,
+                       priority=DEFAULT_PRIORITY, runs=10, seed=0):
+    """ Returns a list with the expected number of reviews on each of ``days`` days starting today.
+
+    ``states`` is a sequence of ``alg_data`` dicts or ``LearningUnitState`` instances (None for
+    a new LU). LUs without the next review and overdue LUs are due today. ``grade_weights``
+    are weights of grades of ``algorithm.parameters``. The same ``seed`` gives the same forecast; the NumPy
+    backend (used if ``algorithm.vectorized`` is set) draws different grades than the pure
+    Python one.
+    """
+    parameters = algorithm.parameters
+    if len(grade_weights) != len(parameters.grades):
+        raise ValueError("grade weights %s should have one weight for every grade" % (grade_weights,))
+    if priority not in parameters.priorities:
+        raise ValueError("priority %s should be one of allowed priorities" % priority)
+    if days < 0 or runs <= 0:
+        raise ValueError("number of days %s should be >= 0 and number of runs %s should be > 0" % (days, runs))
+    if now is None:
+        now = datetime.utcnow()
+    today = now.date()
+
+    num_reviews = []
+    avg_grades = []
+    next_days = []
+    for alg_data in states:
+        alg_data = algorithm._prepare_alg_data(alg_data)
+        next_review = alg_data.get('next_review')
+        next_day = max((next_review.date() - today).days, 0) if next_review is not None else 0
+        if next_day < days:
+            num_reviews.append(alg_data['num_reviews'])
+            avg_grades.append(alg_data['avg_grade'])
+            next_days.append(next_day)
+
+    if algorithm.vectorized:
+        counts = _forecast_vectorized(parameters, num_reviews, avg_grades, next_days, days, grade_weights,
+                                      priority, runs, seed)
+    else:
+        counts = _forecast(algorithm, num_reviews, avg_grades, next_days, days, grade_weights, priority, runs, seed)
+    return [float(count) / runs for count in counts]
+
+
+def _forecast(algorithm, num_reviews, avg_grades, next_days, days, grade_weights, priority, runs, seed):
+    rnd = random.Random(seed)
+    cumulative_weights = []
+    total_weight = 0.0
+    for weight in grade_weights:
+        total_weight += weight
+        cumulative_weights.append(total_weight)
+
+    grades = algorithm.parameters.grades
+    counts = [0] * days
+    for _ in range(runs):
+        for lu_num_reviews, avg_grade, day in zip(num_reviews, avg_grades, next_days):
+            while day < days:
+                counts[day] += 1
+                point = rnd.random() * total_weight
+                grade = grades[-1]
+                for candidate_grade, cumulative_weight in zip(grades, cumulative_weights):
+                    if point < cumulative_weight:
+                        grade = candidate_grade
+                        break
+                day += algorithm._calculate_interval(lu_num_reviews, avg_grade, grade, priority)
+                avg_grade = (avg_grade * lu_num_reviews + grade) / (lu_num_reviews + 1)
+                lu_num_reviews += 1
+    return counts
+
+
+def _forecast_vectorized(parameters, num_reviews, avg_grades, next_days, days, grade_weights, priority, runs, seed):
+    """ NumPy version of ``_forecast`` advancing all LUs of all runs at once. """
+    rng = numpy.random.RandomState(seed)
+    probabilities = numpy.asarray(grade_weights, dtype=float)
+    probabilities /= probabilities.sum()
+    grades = numpy.asarray(parameters.grades)
+    scale_factors = numpy.array([parameters.scale_factor(grade, priority) for grade in parameters.grades])
+
+    num_reviews = numpy.tile(numpy.asarray(num_reviews, dtype=float), runs)
+    avg_grades = numpy.tile(numpy.asarray(avg_grades, dtype=float), runs)
+    next_days = numpy.tile(numpy.asarray(next_days, dtype=numpy.int64), runs)
+    counts = numpy.zeros(days, dtype=numpy.int64)
+    while len(next_days):
+        counts += numpy.bincount(next_days, minlength=days)
+        grade_inds = rng.choice(len(grades), size=len(next_days), p=probabilities)
+        # Same formula as SSRFParameters.interval
+        intervals = parameters.overlearning_interval + \
+            numpy.rint(num_reviews ** (avg_grades / 2.0) * scale_factors[grade_inds]).astype(numpy.int64)
+        next_days = next_days + intervals
+        avg_grades = (avg_grades * num_reviews + grades[grade_inds]) / (num_reviews + 1)
+        num_reviews = num_reviews + 1
+        active = next_days < days
+        num_reviews, avg_grades, next_days = num_reviews[active], avg_grades[active], next_days[active]
+    return counts.tolist()
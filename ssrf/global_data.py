@@ -0,0 +1,257 @@
+from array import array
+from datetime import date
+
+from ssrf.algorithm import SSRFAlgorithmGlobalData, LoadProfile, LoadSums
+
+
+class _FenwickTree (object):
+    """ Binary indexed tree over a sequence of numbers answering prefix sums in O(log n). """
+
+    def __init__(self, typecode, values):
+        self._size = len(values)
+        self._tree = array(typecode, [0]) + array(typecode, values)
+        for i in range(1, self._size + 1):
+            parent = i + (i & -i)
+            if parent <= self._size:
+                self._tree[parent] += self._tree[i]
+
+    def add(self, ind, delta):
+        """ Adds ``delta`` to the value at ``ind``. """
+        i = ind + 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, stop):
+        """ Returns the sum of values at indexes ``[0, stop)``. """
+        total = 0
+        i = min(max(stop, 0), self._size)
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def range_sum(self, start, stop):
+        """ Returns the sum of values at indexes ``[start, stop)``. """
+        return self.prefix_sum(stop) - self.prefix_sum(start)
+
+
+class _DailyLoads (object):
+    """ Daily workloads and difficulty sums of a single user.
+
+    Days are stored as offsets from ``origin`` (a day number: a proleptic Gregorian
+    ordinal or an epoch day) in arrays which grow on demand.
+    """
+
+    def __init__(self, origin, size=64, counts=None, difficulty_sums=None):
+        self.origin = origin
+        self.counts = array('l', counts if counts is not None else [0] * size)
+        self.difficulty_sums = array('d', difficulty_sums if difficulty_sums is not None else [0.0] * size)
+        self._build_trees()
+
+    def _build_trees(self):
+        self._count_tree = _FenwickTree('l', self.counts)
+        self._difficulty_sum_tree = _FenwickTree('d', self.difficulty_sums)
+        # Counts days with any reviews, so ranges without free days are recognized in O(log n)
+        self._busy_day_tree = _FenwickTree('l', [1 if count else 0 for count in self.counts])
+
+    def _index(self, day):
+        """ Returns an index of ``day``, growing the arrays if the day is out of them. """
+        ind = day - self.origin
+        size = len(self.counts)
+        if 0 <= ind < size:
+            return ind
+        if ind < 0:
+            grow = max(-ind, size)
+            self.counts = array('l', [0] * grow) + self.counts
+            self.difficulty_sums = array('d', [0.0] * grow) + self.difficulty_sums
+            self.origin -= grow
+            ind += grow
+        else:
+            grow = max(ind - size + 1, size)
+            self.counts.extend([0] * grow)
+            self.difficulty_sums.extend([0.0] * grow)
+        self._build_trees()
+        return ind
+
+    def add(self, day, count, difficulty):
+        ind = self._index(day)
+        old_count = self.counts[ind]
+        new_count = old_count + count
+        if new_count < 0:
+            raise ValueError("no review scheduled on day %s" % day)
+        old_difficulty_sum = self.difficulty_sums[ind]
+        # Reset accumulated rounding errors when the last review is removed and don't let
+        # them drive the sum of the remaining reviews below zero
+        new_difficulty_sum = max(old_difficulty_sum + difficulty, 0.0) if new_count else 0.0
+        self.counts[ind] = new_count
+        self.difficulty_sums[ind] = new_difficulty_sum
+        self._count_tree.add(ind, count)
+        self._difficulty_sum_tree.add(ind, new_difficulty_sum - old_difficulty_sum)
+        if (old_count == 0) != (new_count == 0):
+            self._busy_day_tree.add(ind, 1 if new_count else -1)
+
+    def _slice(self, values, first_day, last_day):
+        """ Returns an array with values for days between first and last day (both inclusive). """
+        start = first_day - self.origin
+        stop = last_day - self.origin + 1
+        size = len(values)
+        if 0 <= start and stop <= size:
+            return values[start:stop]
+        result = array(values.typecode, [0] * (stop - start))
+        copy_start, copy_stop = max(start, 0), min(stop, size)
+        if copy_start < copy_stop:
+            result[copy_start - start:copy_stop - start] = values[copy_start:copy_stop]
+        return result
+
+    def get_counts(self, first_day, last_day):
+        return self._slice(self.counts, first_day, last_day)
+
+    def get_difficulty_sums(self, first_day, last_day):
+        return self._slice(self.difficulty_sums, first_day, last_day)
+
+    def get_avg_difficulties(self, first_day, last_day):
+        return array('d', [difficulty_sum / count if count else 0.0
+                           for count, difficulty_sum in zip(self.get_counts(first_day, last_day),
+                                                            self.get_difficulty_sums(first_day, last_day))])
+
+    def get_total_count(self, first_day, last_day):
+        return self._count_tree.range_sum(first_day - self.origin, last_day - self.origin + 1)
+
+    def get_total_difficulty_sum(self, first_day, last_day):
+        return self._difficulty_sum_tree.range_sum(first_day - self.origin, last_day - self.origin + 1)
+
+    def find_last_free_day(self, first_day, last_day):
+        """ Returns the latest day without reviews between first and last day (both inclusive) or None. """
+        start = first_day - self.origin
+        ind = last_day - self.origin
+        if ind >= len(self.counts) or start > ind:
+            return last_day if start <= ind else None
+        if self._busy_day_tree.range_sum(start, ind + 1) == ind - start + 1:
+            return None
+        while ind >= 0 and self.counts[ind]:
+            ind -= 1
+        return self.origin + ind
+
+
+class WorkloadCalendar (SSRFAlgorithmGlobalData):
+    """ In-memory global data keeping daily workloads and difficulty sums of every user.
+
+    Daily values of a user are kept in arrays indexed by days together with
+    Fenwick trees, so:
+
+    * ``get_workloads``, ``get_avg_difficulties``, ``get_load_profile`` and ``get_load_sums``
+      return a slice of the arrays,
+    * ``get_total_workload`` and ``get_total_difficulty`` sum any range of days in O(log n),
+    * ``find_last_free_day`` rejects ranges without free days in O(log n),
+    * ``add_review``, ``remove_review`` and ``move_review`` update a single day in O(log n).
+
+    ``user_data`` must be hashable; it identifies the calendar of a user.
+    Days are dates, or epoch days (ints) if ``epoch_days`` is set; the algorithm
+    then passes epoch days without creating dates.
+
+    To keep the calendar up to date, create the algorithm with ``record_placements=True``::
+
+        calendar = WorkloadCalendar()
+        algorithm = SSRFAlgorithm(calendar, record_placements=True)
+    """
+
+    def __init__(self, epoch_days=False):
+        self.epoch_days = epoch_days
+        self._users = {}
+
+    def _day(self, value):
+        """ Returns the day number of a date or an epoch day. """
+        return value if self.epoch_days else value.toordinal()
+
+    def _get_daily_loads(self, user_data, day=None):
+        daily_loads = self._users.get(user_data)
+        if daily_loads is None and day is not None:
+            daily_loads = self._users[user_data] = _DailyLoads(day)
+        return daily_loads
+
+    def get_workloads(self, from_date, to_date, user_data):
+        first_day, last_day = self._day(from_date), self._day(to_date)
+        daily_loads = self._get_daily_loads(user_data)
+        if daily_loads is None:
+            return [0] * (last_day - first_day + 1)
+        return daily_loads.get_counts(first_day, last_day).tolist()
+
+    def get_avg_difficulties(self, from_date, to_date, user_data):
+        first_day, last_day = self._day(from_date), self._day(to_date)
+        daily_loads = self._get_daily_loads(user_data)
+        if daily_loads is None:
+            return [0.0] * (last_day - first_day + 1)
+        return daily_loads.get_avg_difficulties(first_day, last_day).tolist()
+
+    def get_load_profile(self, from_date, to_date, user_data):
+        """ Returns a ``LoadProfile`` of two arrays: workloads (``'l'``) and average difficulties (``'d'``). """
+        first_day, last_day = self._day(from_date), self._day(to_date)
+        daily_loads = self._get_daily_loads(user_data)
+        if daily_loads is None:
+            num_days = last_day - first_day + 1
+            return LoadProfile(array('l', [0] * num_days), array('d', [0.0] * num_days))
+        return LoadProfile(daily_loads.get_counts(first_day, last_day),
+                           daily_loads.get_avg_difficulties(first_day, last_day))
+
+    def get_load_sums(self, from_date, to_date, user_data):
+        """ Returns a ``LoadSums`` of two arrays: workloads (``'l'``) and difficulty sums (``'d'``). """
+        first_day, last_day = self._day(from_date), self._day(to_date)
+        daily_loads = self._get_daily_loads(user_data)
+        if daily_loads is None:
+            num_days = last_day - first_day + 1
+            return LoadSums(array('l', [0] * num_days), array('d', [0.0] * num_days))
+        return LoadSums(daily_loads.get_counts(first_day, last_day),
+                        daily_loads.get_difficulty_sums(first_day, last_day))
+
+    def get_total_workload(self, from_date, to_date, user_data):
+        """ Returns the number of reviews scheduled between from and to date (both inclusive). """
+        daily_loads = self._get_daily_loads(user_data)
+        if daily_loads is None:
+            return 0
+        return daily_loads.get_total_count(self._day(from_date), self._day(to_date))
+
+    def get_total_difficulty(self, from_date, to_date, user_data):
+        """ Returns the sum of difficulties of reviews scheduled between from and to date (both inclusive). """
+        daily_loads = self._get_daily_loads(user_data)
+        if daily_loads is None:
+            return 0.0
+        return daily_loads.get_total_difficulty_sum(self._day(from_date), self._day(to_date))
+
+    def find_last_free_day(self, from_date, to_date, user_data):
+        daily_loads = self._get_daily_loads(user_data)
+        if daily_loads is None:
+            return to_date
+        day = daily_loads.find_last_free_day(self._day(from_date), self._day(to_date))
+        if day is None or self.epoch_days:
+            return day
+        return date.fromordinal(day)
+
+    def discard_user(self, user_data):
+        """ Removes all reviews of a user. """
+        self._users.pop(user_data, None)
+
+    def load_user(self, from_date, workloads, difficulty_sums, user_data):
+        """ Replaces all reviews of a user with daily workloads and difficulty sums
+        of consecutive days starting with ``from_date``.
+        """
+        if len(workloads) != len(difficulty_sums):
+            raise ValueError("%d workloads don't match %d difficulty sums" % (len(workloads), len(difficulty_sums)))
+        self._users[user_data] = _DailyLoads(self._day(from_date), counts=workloads, difficulty_sums=difficulty_sums)
+
+    def add_review(self, review_date, difficulty, user_data):
+        day = self._day(review_date)
+        self._get_daily_loads(user_data, day).add(day, 1, difficulty)
+
+    def remove_review(self, review_date, difficulty, user_data):
+        """ Removes a review; removing a review from a day without reviews is ignored,
+        e.g. the previous repetition of a LU scheduled before the calendar was filled.
+        """
+        day = self._day(review_date)
+        daily_loads = self._get_daily_loads(user_data)
+        if daily_loads is not None and daily_loads.get_total_count(day, day):
+            daily_loads.add(day, -1, -difficulty)
+
+    def move_review(self, old_date, old_difficulty, new_date, new_difficulty, user_data):
+        self.remove_review(old_date, old_difficulty, user_data)
+        self.add_review(new_date, new_difficulty, user_data)
@@ -0,0 +1,24 @@
+import threading
+
+
+class StripedLocks (object):
+    """ Locks of users for ``SSRFAlgorithm`` running in many threads.
+
+    Users are hashed onto a fixed number of locks (stripes), so the memory used
+    doesn't grow with the number of users. A user always gets the same lock;
+    different users share a lock only when their hashes collide, which is rare
+    with enough stripes.
+
+    ``user_data`` must be hashable::
+
+        algorithm = SSRFAlgorithm(global_data, record_placements=True, user_locks=StripedLocks())
+    """
+
+    def __init__(self, stripes=256):
+        if stripes <= 0:
+            raise ValueError("number of stripes %s should be > 0" % stripes)
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def lock_for(self, user_data):
+        """ Returns the lock of a user. """
+        return self._locks[hash(user_data) % len(self._locks)]
@@ -0,0 +1,162 @@
+from datetime import datetime
+
+from ssrf.algorithm import AlgorithmResult, _DatetimeClock, _call, _epoch_day, _load_window_steps, _run_steps
+
+
+class _MinTree (object):
+    """ Segment tree answering the minimum key of a range of days in O(log n). """
+
+    _EMPTY = (float('inf'),)
+
+    def __init__(self, keys):
+        size = 1
+        while size < len(keys):
+            size *= 2
+        self._size = size
+        self._tree = [self._EMPTY] * (2 * size)
+        self._tree[size:size + len(keys)] = keys
+        for i in range(size - 1, 0, -1):
+            self._tree[i] = min(self._tree[2 * i], self._tree[2 * i + 1])
+
+    def update(self, ind, key):
+        i = ind + self._size
+        self._tree[i] = key
+        i //= 2
+        while i:
+            self._tree[i] = min(self._tree[2 * i], self._tree[2 * i + 1])
+            i //= 2
+
+    def min(self, start, stop):
+        """ Returns the minimum key at indexes ``[start, stop)``. """
+        result = self._EMPTY
+        low, high = start + self._size, stop + self._size
+        while low < high:
+            if low & 1:
+                result = min(result, self._tree[low])
+                low += 1
+            if high & 1:
+                high -= 1
+                result = min(result, self._tree[high])
+            low //= 2
+            high //= 2
+        return result
+
+
+class JointPlanner (object):
+    """ Schedules many LUs of a single user jointly instead of one after another.
+
+    ``SSRFAlgorithm.schedule_many`` places every LU on the day with the maximum
+    load reduction given the LUs placed before it, so the result depends on
+    the order of LUs. The planner calculates the acceptable intervals of all LUs
+    first (with ``_calculate_interval``, as ``schedule`` does) and assigns days
+    to the most constrained LUs (with the narrowest windows) first. Every LU gets
+    the least loaded day of its window: the day with the lowest workload, then
+    the lowest average difficulty, then the latest one.
+
+    This ordering approximates the load coefficients of ``schedule``
+    (``_calculate_load_coeffs``). Both take the last day without workload of the window
+    if there is one. Otherwise ``schedule`` takes the day where adding the repetition
+    reduces the load coefficient the most, and that coefficient is relative to the
+    min. workload and min. average difficulty of the window and includes the difficulty
+    of the LU. The planner ignores the difficulty of the LU and never prefers a busier
+    day with easier reviews, so on windows without free days it may choose other days
+    than ``schedule``. The minima change with every placement, so the coefficients
+    can't be kept in the segment tree.
+
+    Days are kept in a segment tree, so planning N LUs over a horizon of H days
+    costs O(N log N + N log H) and doesn't depend on the order of ``items``.
+
+    The planner uses the global data and options of ``algorithm``; if the algorithm
+    records placements, the planned repetitions are recorded as well::
+
+        planner = JointPlanner(SSRFAlgorithm(calendar, record_placements=True))
+        results = planner.plan(items, user_data=user)
+    """
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+
+    def plan(self, items, now=None, user_data=None):
+        """ Calculates next repetitions for a sequence of LUs of a single user.
+
+        ``items`` is a sequence of ``(grade, alg_data, priority)`` records.
+        Returns a list of ``AlgorithmResult`` in the order of ``items``.
+        LUs already reviewed within 24h keep their schedule, as in ``schedule``.
+        """
+        if now is None:
+            now = datetime.utcnow()
+        with self.algorithm._lock_for(user_data):
+            return self._plan(items, now, user_data)
+
+    def _plan(self, items, now, user_data):
+        algorithm = self.algorithm
+        global_data = algorithm.global_data
+        today = _epoch_day(now)
+
+        input_items = list(items)
+        items = [(grade, algorithm._prepare_alg_data(alg_data), priority) for grade, alg_data, priority in input_items]
+
+        # Calculate acceptable intervals of the LUs which need balancing
+        windows = []
+        min_interval = max_interval = None
+        for grade, alg_data, priority in items:
+            if algorithm._check_boundary:
+                algorithm._assert_input(grade, priority, alg_data)
+            if algorithm._reviewed_within_24h(alg_data, now):
+                windows.append(None)
+                continue
+            item_min_interval = algorithm._calculate_interval(alg_data['num_reviews'],
+                alg_data['avg_grade'], grade - 1, priority)
+            item_max_interval = algorithm._calculate_interval(alg_data['num_reviews'],
+                alg_data['avg_grade'], grade, priority)
+            windows.append((item_min_interval, item_max_interval))
+            if min_interval is None or item_min_interval < min_interval:
+                min_interval = item_min_interval
+            if max_interval is None or item_max_interval > max_interval:
+                max_interval = item_max_interval
+
+        intervals = [None] * len(items)
+        if min_interval is not None:
+            first_day = today + min_interval
+            window = _run_steps(_load_window_steps(global_data, first_day, today + max_interval), global_data,
+                                user_data)
+            if algorithm._check_boundary:
+                workloads, difficulties = window._columns()
+                algorithm._assert_workloads_length(workloads, min_interval, max_interval)
+                algorithm._assert_avg_difficulties_length(difficulties, workloads)
+
+            # Take out the current repetitions of the planned LUs, they are planned again
+            for (_, alg_data, _), item_window in zip(items, windows):
+                if item_window is not None and alg_data.get('next_review') is not None:
+                    window.remove_review(_epoch_day(alg_data['next_review']), alg_data['difficulty'])
+
+            tree = _MinTree([(workload, window.avg_difficulty(ind), -ind)
+                             for ind, workload in enumerate(window.workloads)])
+            order = sorted((ind for ind, item_window in enumerate(windows) if item_window is not None),
+                           key=lambda ind: (windows[ind][1] - windows[ind][0], windows[ind][0],
+                                            items[ind][1]['num_reviews'], items[ind][2], ind))
+            for ind in order:
+                item_min_interval, item_max_interval = windows[ind]
+                _, alg_data, priority = items[ind]
+                day = -tree.min(item_min_interval - min_interval, item_max_interval - min_interval + 1)[2]
+                intervals[ind] = min_interval + day
+                window.add_review(first_day + day,
+                                  algorithm._calculate_difficulty(alg_data['num_reviews'], priority, intervals[ind]))
+                tree.update(day, (window.workloads[day], window.avg_difficulty(day), -day))
+
+        results = []
+        for (grade, alg_data, priority), (_, input_alg_data, _), interval in zip(items, input_items, intervals):
+            if interval is None:
+                # Reviewed within 24h, no global data is needed
+                result = _run_steps(algorithm._schedule_steps(None, grade, input_alg_data, priority, now,
+                                                              False, False), None, None)
+            else:
+                next_review = _DatetimeClock.after_days(now, today, interval)
+                algorithm._update_alg_data_after_scheduling(alg_data, now, interval, grade, priority, next_review)
+                result = AlgorithmResult(next_review, alg_data)
+            if algorithm.record_placements:
+                placement = algorithm._placement_call(input_alg_data, result)
+                if placement is not None:
+                    _call(global_data, placement, user_data)
+            results.append(result)
+        return results
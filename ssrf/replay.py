@@ -0,0 +1,150 @@
+""" Replay of review logs.
+
+Rebuilds states of LUs from their grade history, e.g. after changing options
+of the algorithm or to recover lost states::
+
+    replayer = ReviewLogReplayer()
+    replayer.replay(review_log)
+    states, calendar = replayer.states, replayer.calendar
+
+The log is a time-ordered iterable of ``(lu_id, reviewed_at, grade, priority)``
+records. It is consumed in a streaming way, so only the current state of every LU
+and the in-memory calendar of their next reviews are kept, whatever the length
+of the log. A long log may be replayed in chunks by calling ``replay`` repeatedly.
+"""
+from ssrf.algorithm import AlgorithmResult, SSRFAlgorithm, VALIDATION_BOUNDARY, _DatetimeClock, _LoadSumsWindow, \
+    _epoch_date
+from ssrf.global_data import WorkloadCalendar
+
+
+class ReviewLogReplayer (object):
+    """ Replays review logs of a single user with ``SSRFAlgorithm.schedule``.
+
+    Every review is scheduled at its own time, so the 24h rule applies as it did when
+    the LU was reviewed, and the next review is placed in an in-memory window of daily
+    loads instead of the production global data. A new review of a LU moves its previous
+    next review, so the window contains only the current next reviews of the LUs.
+
+    The steps of ``schedule`` are run directly on the window, without global data calls
+    in between, and give the same results as ``schedule`` with a ``WorkloadCalendar``.
+    ``calendar`` returns such a calendar built from the window.
+
+    ``algorithm_options`` are keyword arguments of ``SSRFAlgorithm``; by default only
+    the input is validated (``VALIDATION_BOUNDARY``). Placements are always recorded.
+    A tracer isn't supported. ``states`` maps LU ids to ``alg_data`` of LUs reviewed
+    before the log starts; their next reviews are added to the window.
+    """
+
+    def __init__(self, algorithm_options=None, user_data=None, states=None):
+        algorithm_options = dict(algorithm_options or {})
+        if algorithm_options.get('tracer') is not None:
+            raise ValueError("replay doesn't support a tracer")
+        algorithm_options.setdefault('validation', VALIDATION_BOUNDARY)
+        algorithm_options['record_placements'] = True
+        # The global data isn't called; reviews are placed in the window
+        self.algorithm = SSRFAlgorithm(None, **algorithm_options)
+        self.user_data = user_data
+        self.states = {}
+        self.count = 0
+        self.last_reviewed_at = None
+        self._window = _LoadSumsWindow(None, [], [])
+        for lu_id, alg_data in (states or {}).items():
+            self.states[lu_id] = alg_data
+            if alg_data is not None and alg_data.get('next_review') is not None:
+                review_day = _DatetimeClock.day(alg_data['next_review'])
+                self._widen(review_day, review_day)
+                self._window.add_review(review_day, alg_data['difficulty'])
+
+    @property
+    def calendar(self):
+        """ A new ``WorkloadCalendar`` with the next reviews of the LUs. """
+        calendar = WorkloadCalendar()
+        window = self._window
+        if window.workloads:
+            calendar.load_user(_epoch_date(window.first_day), window.workloads, window.difficulty_sums,
+                               self.user_data)
+        return calendar
+
+    def replay(self, log):
+        """ Replays ``(lu_id, reviewed_at, grade, priority)`` records and returns their number.
+
+        ``reviewed_at`` is a datetime; records must be ordered by it (ties are allowed),
+        also across calls. A record out of order raises ``ValueError``; the records
+        before it stay replayed.
+        """
+        schedule = self._schedule
+        states = self.states
+        last_reviewed_at = self.last_reviewed_at
+        count = 0
+        try:
+            for lu_id, reviewed_at, grade, priority in log:
+                if last_reviewed_at is not None and reviewed_at < last_reviewed_at:
+                    raise ValueError("review of LU %r at %s is older than the previous review at %s"
+                                     % (lu_id, reviewed_at, last_reviewed_at))
+                states[lu_id] = schedule(grade, states.get(lu_id), priority, reviewed_at).alg_data
+                last_reviewed_at = reviewed_at
+                count += 1
+        finally:
+            self.last_reviewed_at = last_reviewed_at
+            self.count += count
+        return count
+
+    def _widen(self, first_day, last_day):
+        """ Widens the window, so it contains epoch days between first and last day (both inclusive). """
+        window = self._window
+        if not window.workloads:
+            window.first_day = first_day
+        num_days = len(window.workloads)
+        if first_day < window.first_day:
+            added_days = max(window.first_day - first_day, num_days)
+            window.widen(_LoadSumsWindow(window.first_day - added_days, [0] * added_days, [0.0] * added_days))
+            num_days += added_days
+        if last_day >= window.first_day + num_days:
+            added_days = max(last_day - window.first_day - num_days + 1, num_days)
+            window.widen(_LoadSumsWindow(window.first_day + num_days, [0] * added_days, [0.0] * added_days))
+
+    def _schedule(self, grade, alg_data, priority, now):
+        """ Steps of ``SSRFAlgorithm.schedule`` run on the window; returns the ``AlgorithmResult``. """
+        algorithm = self.algorithm
+        window = self._window
+        input_alg_data = alg_data
+        alg_data = algorithm._prepare_alg_data(alg_data)
+        if algorithm._check_boundary:
+            algorithm._assert_input(grade, priority, alg_data)
+
+        if _DatetimeClock.reviewed_within_24h(alg_data.get('last_review'), now):
+            alg_data['last_review'] = now
+            day_later = _DatetimeClock.day_later(now)
+            if alg_data['next_review'] <= day_later:
+                alg_data['next_review'] = day_later
+        else:
+            today = _DatetimeClock.day(now)
+            num_reviews, avg_grade = alg_data['num_reviews'], alg_data['avg_grade']
+            min_interval = algorithm._calculate_interval(num_reviews, avg_grade, grade - 1, priority)
+            max_interval = algorithm._calculate_interval(num_reviews, avg_grade, grade, priority)
+            if algorithm._check_inner and not min_interval <= max_interval:
+                raise AssertionError("min. interval %s > max. interval %s" % (min_interval, max_interval))
+
+            first_day, last_day = today + min_interval, today + max_interval
+            self._widen(first_day, last_day)
+            workloads, difficulty_sums = window.get_load_sums(first_day, last_day, None)
+            zero_workload_ind = algorithm._find_last_zero_workload_ind(workloads)
+            if zero_workload_ind is not None:
+                ideal_interval = min_interval + zero_workload_ind
+            else:
+                ideal_interval = min_interval + algorithm._find_max_load_reduction_ind(
+                    alg_data, range(min_interval, max_interval + 1), workloads, None, priority, difficulty_sums)
+
+            next_review = _DatetimeClock.after_days(now, today, ideal_interval)
+            algorithm._update_alg_data_after_scheduling(alg_data, now, ideal_interval, grade, priority, next_review)
+
+        # Same placement as of _placement_call
+        old_next_review = input_alg_data.get('next_review') if input_alg_data is not None else None
+        next_review = alg_data['next_review']
+        if old_next_review != next_review:
+            if old_next_review is not None:
+                window.remove_review(_DatetimeClock.day(old_next_review), input_alg_data['difficulty'])
+            review_day = _DatetimeClock.day(next_review)
+            self._widen(review_day, review_day)
+            window.add_review(review_day, alg_data['difficulty'])
+        return AlgorithmResult(next_review, alg_data)
@@ -0,0 +1,178 @@
+""" Deterministic workload simulator and benchmark of ``SSRFAlgorithm``.
+
+Synthetic users study their decks day by day: every day they start a session
+at a random time, review the due LUs and learn a number of new LUs, grading them
+at random with a configured grade distribution. The algorithm schedules against
+an in-memory ``WorkloadCalendar``.
+
+Run ``python -m ssrf.simulator --help`` for the command line options.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from ssrf.algorithm import SSRFAlgorithm, GRADES, PRIORITIES, DEFAULT_PRIORITY, VALIDATIONS, VALIDATION_FULL
+from ssrf.due_queue import DueQueue
+from ssrf.global_data import WorkloadCalendar
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_GRADE_WEIGHTS = (0.05, 0.05, 0.10, 0.20, 0.30, 0.30)
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return None
+    ind = int(round(percent / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[ind]
+
+
+def _variance(values):
+    if not values:
+        return 0.0
+    mean = float(sum(values)) / len(values)
+    return sum((value - mean) ** 2 for value in values) / len(values)
+
+
+def simulate(users=10, deck_size=500, new_per_day=20, days=365, grade_weights=DEFAULT_GRADE_WEIGHTS,
+             priority=DEFAULT_PRIORITY, seed=0, start=datetime(2013, 1, 1, 9, 0), trace_memory=False,
+             algorithm_factory=SSRFAlgorithm, **algorithm_options):
+    """ Runs a simulation and returns a report dict.
+
+    ``algorithm_factory`` is called with the global data and ``algorithm_options``
+    (``record_placements`` is always enabled). Grades and priorities are those of
+    the ``parameters`` of the algorithm. Everything but the timings and memory
+    usage is reproducible for the same ``seed``.
+    """
+    algorithm_options['record_placements'] = True
+    calendar = WorkloadCalendar()
+    algorithm = algorithm_factory(calendar, **algorithm_options)
+    grades = algorithm.parameters.grades
+    if len(grade_weights) != len(grades):
+        raise ValueError("grade weights %s should have one weight for every grade" % (grade_weights,))
+    if priority not in algorithm.parameters.priorities:
+        raise ValueError("priority %s should be one of allowed priorities" % priority)
+
+    rnd = random.Random(seed)
+    cumulative_weights = []
+    total_weight = 0.0
+    for weight in grade_weights:
+        total_weight += weight
+        cumulative_weights.append(total_weight)
+
+    def draw_grade():
+        point = rnd.random() * total_weight
+        for grade, cumulative_weight in zip(grades, cumulative_weights):
+            if point < cumulative_weight:
+                return grade
+        return grades[-1]
+
+    queues = [DueQueue() for _ in range(users)]
+    states = [{} for _ in range(users)]
+    new_lus = [0] * users
+    daily_workloads = [[] for _ in range(users)]
+    latencies = []
+
+    if trace_memory and tracemalloc is not None:
+        tracemalloc.start()
+    start_time = _timer()
+    for day in range(days):
+        for user in range(users):
+            # Users start their daily session at different times within 3 hours from ``start``
+            now = start + timedelta(day, minutes=rnd.randint(0, 180))
+            due = [lu_id for lu_id, _ in queues[user].pop_due(now)]
+            num_new = min(new_per_day, deck_size - new_lus[user])
+            due.extend(range(new_lus[user], new_lus[user] + num_new))
+            new_lus[user] += num_new
+            for lu_id in due:
+                grade = draw_grade()
+                call_start = _timer()
+                result = algorithm.schedule(grade, states[user].get(lu_id), priority, now=now, user_data=user)
+                latencies.append(_timer() - call_start)
+                states[user][lu_id] = result.alg_data
+                queues[user].push_result(lu_id, result)
+            daily_workloads[user].append(len(due))
+    elapsed = _timer() - start_time
+
+    if trace_memory and tracemalloc is not None:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    elif resource is not None:
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    else:
+        peak_memory = None
+
+    latencies.sort()
+    return {
+        'config': {
+            'users': users,
+            'deck_size': deck_size,
+            'new_per_day': new_per_day,
+            'days': days,
+            'grade_weights': list(grade_weights),
+            'priority': priority,
+            'seed': seed,
+        },
+        'schedules': len(latencies),
+        'elapsed': elapsed,
+        'schedules_per_sec': len(latencies) / elapsed if elapsed > 0 else None,
+        'latency': {
+            'p50': _percentile(latencies, 50),
+            'p90': _percentile(latencies, 90),
+            'p99': _percentile(latencies, 99),
+            'max': latencies[-1] if latencies else None,
+        },
+        'peak_memory': peak_memory,
+        'peak_memory_traced': bool(trace_memory and tracemalloc is not None),
+        'daily_workload': {
+            'mean': float(sum(map(sum, daily_workloads))) / (users * days) if users and days else 0.0,
+            'max': max(max(workloads) for workloads in daily_workloads) if users and days else 0,
+            'variance': sum(_variance(workloads) for workloads in daily_workloads) / users if users else 0.0,
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulates users studying with the SSRF algorithm "
+                                                 "and reports scheduling throughput and workload balance.")
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--deck-size', type=int, default=500)
+    parser.add_argument('--new-per-day', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--grade-weights', type=float, nargs=len(GRADES), default=DEFAULT_GRADE_WEIGHTS,
+                        metavar='WEIGHT', help="weights of grades %s" % (GRADES,))
+    parser.add_argument('--priority', type=int, choices=PRIORITIES, default=DEFAULT_PRIORITY)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--validation', choices=VALIDATIONS, default=VALIDATION_FULL)
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="measure peak memory with tracemalloc (slows down the simulation)")
+    parser.add_argument('--output', help="write the JSON report to this file instead of the standard output")
+    args = parser.parse_args(argv)
+
+    report = simulate(users=args.users, deck_size=args.deck_size, new_per_day=args.new_per_day, days=args.days,
+                      grade_weights=tuple(args.grade_weights), priority=args.priority, seed=args.seed,
+                      trace_memory=args.trace_memory, validation=args.validation)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+""" Binary snapshots of states of many LUs.
+
+A snapshot starts with a header (magic bytes and the byte order) followed by
+blocks of at most ``block_size`` LUs. A block is the number of its LUs (8 bytes)
+followed by five columns of 8 byte values: ``num_reviews`` (signed integers),
+``avg_grade`` (doubles, NaN if missing), ``difficulty`` (doubles), ``last_review``
+and ``next_review`` (signed integers, seconds since the epoch or ``NO_TIME``).
+Review dates have the precision of one second, as in ``LearningUnitStore``.
+
+Write a snapshot in a streaming way::
+
+    with StateWriter(open(path, 'wb')) as writer:
+        for alg_data in states:
+            writer.write(alg_data)
+
+Load it into a ``LearningUnitStore`` with ``read_store(path)`` or read it in place
+with ``MappedStates(path)`` (Python 3.3+). Values are written with ``struct``,
+so snapshots are written on every supported version of Python. ``read_store``
+copies columns into the arrays of the store as raw bytes (byte-swapped if the
+snapshot has the other byte order) and unpacks them with ``struct`` only if
+the arrays don't hold 8 byte items, e.g. the ``'l'`` arrays on Windows.
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+from ssrf.state import LearningUnitState, LearningUnitStore, _from_stored_avg_grade, from_epoch_seconds
+
+MAGIC = b'SSRFLUS1'
+DEFAULT_BLOCK_SIZE = 65536
+
+_BYTE_ORDERS = {b'<': 'little', b'>': 'big'}
+_NATIVE_ORDER = b'<' if sys.byteorder == 'little' else b'>'
+_HEADER = struct.Struct('8sc7x')
+#: Columns in the order they are stored and their ``struct`` formats
+_COLUMNS = (('num_reviews', 'q'), ('avg_grade', 'd'), ('difficulty', 'd'), ('last_review', 'q'),
+            ('next_review', 'q'))
+_ITEM_SIZE = 8
+
+# array.fromstring was renamed to frombytes in Python 3.2 and removed in 3.9
+_frombytes = array.frombytes if hasattr(array, 'frombytes') else array.fromstring
+
+
+def _column_format(order, count, typecode):
+    """ Returns a ``struct`` format of a column of ``count`` values. """
+    return '%s%d%s' % (order.decode('ascii'), count, typecode)
+
+
+class StateWriter (object):
+    """ Writes states of LUs to a binary file object block by block.
+
+    Accepts ``LearningUnitState`` instances, ``alg_data`` dicts or None (the initial state).
+    At most ``block_size`` states are kept in memory. Call ``close`` (or use the writer
+    as a context manager) to write the last block; it doesn't close the file object.
+    """
+
+    def __init__(self, fileobj, block_size=DEFAULT_BLOCK_SIZE):
+        if block_size <= 0:
+            raise ValueError("block size %s should be > 0" % block_size)
+        self.fileobj = fileobj
+        self.block_size = block_size
+        self.count = 0
+        self._pending = LearningUnitStore()
+        self._block_header = struct.Struct(_column_format(_NATIVE_ORDER, 1, 'q'))
+        fileobj.write(_HEADER.pack(MAGIC, _NATIVE_ORDER))
+
+    def write(self, state):
+        """ Adds a state of a LU. """
+        self._pending.append(state)
+        if len(self._pending) >= self.block_size:
+            self.flush()
+
+    def write_store(self, store):
+        """ Adds all states of a ``LearningUnitStore`` without converting them to states. """
+        self.flush()
+        for start in range(0, len(store), self.block_size):
+            stop = min(start + self.block_size, len(store))
+            self._write_block(stop - start, [getattr(store, name)[start:stop] for name, _ in _COLUMNS])
+
+    def flush(self):
+        """ Writes the pending states as a block. """
+        if len(self._pending):
+            self._write_block(len(self._pending), [getattr(self._pending, name) for name, _ in _COLUMNS])
+            self._pending = LearningUnitStore()
+
+    def _write_block(self, count, columns):
+        self.fileobj.write(self._block_header.pack(count))
+        for (_, typecode), values in zip(_COLUMNS, columns):
+            self.fileobj.write(struct.pack(_column_format(_NATIVE_ORDER, count, typecode), *values))
+        self.count += count
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+
+def write_states(fileobj, states, block_size=DEFAULT_BLOCK_SIZE):
+    """ Writes a snapshot of states (or a ``LearningUnitStore``) and returns the number of written LUs. """
+    writer = StateWriter(fileobj, block_size)
+    if isinstance(states, LearningUnitStore):
+        writer.write_store(states)
+    else:
+        for state in states:
+            writer.write(state)
+    writer.close()
+    return writer.count
+
+
+def _read_blocks(buffer):
+    """ Returns the byte order (``b'<'`` or ``b'>'``) and ``(count, offset)`` of every block;
+    validates the layout of the snapshot.
+    """
+    if len(buffer) < _HEADER.size:
+        raise ValueError("snapshot is truncated")
+    magic, order = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or order not in _BYTE_ORDERS:
+        raise ValueError("not a snapshot of LU states")
+    block_header = struct.Struct(_column_format(order, 1, 'q'))
+    offset = _HEADER.size
+    blocks = []
+    while offset < len(buffer):
+        if offset + block_header.size > len(buffer):
+            raise ValueError("snapshot is truncated")
+        count, = block_header.unpack_from(buffer, offset)
+        offset += block_header.size
+        end = offset + count * _ITEM_SIZE * len(_COLUMNS)
+        if count < 0 or end > len(buffer):
+            raise ValueError("snapshot is truncated")
+        blocks.append((count, offset))
+        offset = end
+    return order, blocks
+
+
+def _extend_column(column, order, count, typecode, buffer, offset):
+    """ Appends ``count`` values of a column stored at ``offset`` of the buffer to an array. """
+    if column.itemsize != _ITEM_SIZE:
+        column.extend(struct.unpack_from(_column_format(order, count, typecode), buffer, offset))
+    elif order == _NATIVE_ORDER:
+        _frombytes(column, buffer[offset:offset + count * _ITEM_SIZE])
+    else:
+        values = array(column.typecode)
+        _frombytes(values, buffer[offset:offset + count * _ITEM_SIZE])
+        values.byteswap()
+        column.extend(values)
+
+
+def _map_file(path):
+    with open(path, 'rb') as snapshot:
+        return mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_store(path):
+    """ Loads a snapshot into a new ``LearningUnitStore``. """
+    store = LearningUnitStore()
+    mapped = _map_file(path)
+    try:
+        order, blocks = _read_blocks(mapped)
+        for count, offset in blocks:
+            for ind, (name, typecode) in enumerate(_COLUMNS):
+                _extend_column(getattr(store, name), order, count, typecode, mapped, offset + ind * count * _ITEM_SIZE)
+    finally:
+        mapped.close()
+    return store
+
+
+class MappedStates (object):
+    """ Read-only states of LUs of a snapshot mapped into memory.
+
+    Columns are memoryviews of the mapped file, so opening a snapshot doesn't read
+    or copy the states. The snapshot must have the byte order of the platform.
+    Close it (or use it as a context manager) when the views are no longer used.
+    Casting memoryviews requires Python 3.3+; use ``read_store`` on Python 2.
+    """
+
+    def __init__(self, path):
+        if not hasattr(memoryview, 'cast'):
+            raise ValueError("mapped states require Python 3.3+, read the snapshot with read_store")
+        self._mapped = _map_file(path)
+        self._view = memoryview(self._mapped)
+        try:
+            order, blocks = _read_blocks(self._view)
+            if order != _NATIVE_ORDER:
+                raise ValueError("snapshot has %s endian byte order, read it with read_store" % _BYTE_ORDERS[order])
+        except ValueError:
+            self.close()
+            raise
+        self._starts = []
+        self._blocks = []
+        start = 0
+        for count, offset in blocks:
+            size = count * _ITEM_SIZE
+            self._starts.append(start)
+            self._blocks.append(tuple(self._view[offset + ind * size:offset + (ind + 1) * size].cast(typecode)
+                                      for ind, (_, typecode) in enumerate(_COLUMNS)))
+            start += count
+        self._len = start
+
+    def __len__(self):
+        return self._len
+
+    def blocks(self):
+        """ Returns a list of blocks; every block is a tuple of column views
+        (``num_reviews``, ``avg_grade``, ``difficulty``, ``last_review``, ``next_review``).
+        """
+        return list(self._blocks)
+
+    def __getitem__(self, ind):
+        if ind < 0:
+            ind += self._len
+        if not 0 <= ind < self._len:
+            raise IndexError("LU index %s out of range" % ind)
+        # Find the last block starting at or before the index
+        low, high = 0, len(self._starts) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._starts[middle] <= ind:
+                low = middle
+            else:
+                high = middle - 1
+        num_reviews, avg_grade, difficulty, last_review, next_review = self._blocks[low]
+        ind -= self._starts[low]
+        return LearningUnitState(num_reviews[ind], _from_stored_avg_grade(avg_grade[ind]), difficulty[ind],
+                                 from_epoch_seconds(last_review[ind]), from_epoch_seconds(next_review[ind]))
+
+    def __iter__(self):
+        for ind in range(self._len):
+            yield self[ind]
+
+    def close(self):
+        for block in getattr(self, '_blocks', ()):
+            for column in block:
+                column.release()
+        self._blocks = []
+        self._view.release()
+        self._mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,182 @@
+import calendar
+from array import array
+from datetime import datetime, timedelta
+
+NO_TIME = -2 ** 63
+#: ``avg_grade`` of LUs without an average grade in ``LearningUnitStore`` (NaN)
+NO_AVG_GRADE = float('nan')
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch_seconds(value):
+    """ Converts a datetime to seconds since the epoch; naive datetimes are treated as UTC. """
+    if value is None:
+        return NO_TIME
+    return calendar.timegm(value.utctimetuple())
+
+
+def from_epoch_seconds(seconds):
+    """ Converts seconds since the epoch to a naive UTC datetime. """
+    if seconds == NO_TIME:
+        return None
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+def _to_stored_avg_grade(avg_grade):
+    return NO_AVG_GRADE if avg_grade is None else avg_grade
+
+
+def _from_stored_avg_grade(avg_grade):
+    # NaN is the only value not equal to itself
+    return avg_grade if avg_grade == avg_grade else None
+
+
+class LearningUnitState (object):
+    """ SSRF algorithm parameters of a single LU.
+
+    A compact alternative to ``alg_data`` dicts: ``schedule`` accepts a state
+    and returns a state in ``AlgorithmResult.alg_data``, since the state supports
+    the item access used by the algorithm (``state['num_reviews']``, ``get``,
+    ``setdefault`` and ``copy``). A missing ``avg_grade``, ``last_review`` or
+    ``next_review`` is None; the algorithm fills a missing ``avg_grade`` with
+    the default average grade of its ``SSRFParameters``.
+    """
+
+    __slots__ = ('num_reviews', 'avg_grade', 'difficulty', 'last_review', 'next_review')
+
+    def __init__(self, num_reviews=1, avg_grade=None, difficulty=0.0, last_review=None, next_review=None):
+        self.num_reviews = num_reviews
+        self.avg_grade = avg_grade
+        self.difficulty = difficulty
+        self.last_review = last_review
+        self.next_review = next_review
+
+    @classmethod
+    def from_dict(cls, alg_data):
+        """ Creates a state from an ``alg_data`` dict. """
+        state = cls()
+        for key, value in alg_data.items():
+            state[key] = value
+        return state
+
+    def to_dict(self):
+        """ Returns an ``alg_data`` dict; missing values are omitted. """
+        return dict((key, getattr(self, key)) for key in self.__slots__ if getattr(self, key) is not None)
+
+    def _check_key(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+
+    def __getitem__(self, key):
+        self._check_key(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._check_key(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return getattr(self, key)
+
+    def copy(self):
+        return LearningUnitState(self.num_reviews, self.avg_grade, self.difficulty,
+                                 self.last_review, self.next_review)
+
+    def __eq__(self, other):
+        if not isinstance(other, LearningUnitState):
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return tuple(getattr(self, key) for key in self.__slots__)
+
+    def __setstate__(self, values):
+        for key, value in zip(self.__slots__, values):
+            setattr(self, key, value)
+
+    def __repr__(self):
+        return 'LearningUnitState(%s)' % ', '.join('%s=%r' % (key, getattr(self, key)) for key in self.__slots__)
+
+
+class LearningUnitStore (object):
+    """ Columnar store of states of many LUs.
+
+    Every parameter is kept in its own array: ``num_reviews`` (``'l'``), ``avg_grade``
+    (``'d'``, ``NO_AVG_GRADE`` if missing), ``difficulty`` (``'d'``) and ``last_review``
+    and ``next_review`` as seconds since the epoch (``'l'``, ``NO_TIME`` if missing).
+    The ``'l'`` arrays hold 64-bit integers on 64-bit POSIX platforms; ``'q'`` isn't
+    available on Python 2. Review dates are stored with a precision of one second;
+    naive datetimes are treated as UTC.
+
+    LUs are identified by their indexes; indexing returns a ``LearningUnitState``
+    and assigning a state (or an ``alg_data`` dict) updates the columns::
+
+        result = algorithm.schedule(grade, store[ind])
+        store[ind] = result.alg_data
+    """
+
+    def __init__(self):
+        self.num_reviews = array('l')
+        self.avg_grade = array('d')
+        self.difficulty = array('d')
+        self.last_review = array('l')
+        self.next_review = array('l')
+
+    def __len__(self):
+        return len(self.num_reviews)
+
+    def append(self, state=None):
+        """ Adds a LU and returns its index. """
+        state = self._as_state(state)
+        self.num_reviews.append(state.num_reviews)
+        self.avg_grade.append(_to_stored_avg_grade(state.avg_grade))
+        self.difficulty.append(state.difficulty)
+        self.last_review.append(to_epoch_seconds(state.last_review))
+        self.next_review.append(to_epoch_seconds(state.next_review))
+        return len(self) - 1
+
+    def extend(self, states):
+        for state in states:
+            self.append(state)
+
+    def __getitem__(self, ind):
+        return LearningUnitState(self.num_reviews[ind], _from_stored_avg_grade(self.avg_grade[ind]),
+                                 self.difficulty[ind], from_epoch_seconds(self.last_review[ind]),
+                                 from_epoch_seconds(self.next_review[ind]))
+
+    def __setitem__(self, ind, state):
+        state = self._as_state(state)
+        self.num_reviews[ind] = state.num_reviews
+        self.avg_grade[ind] = _to_stored_avg_grade(state.avg_grade)
+        self.difficulty[ind] = state.difficulty
+        self.last_review[ind] = to_epoch_seconds(state.last_review)
+        self.next_review[ind] = to_epoch_seconds(state.next_review)
+
+    def __iter__(self):
+        for ind in range(len(self)):
+            yield self[ind]
+
+    def _as_state(self, state):
+        if state is None:
+            return LearningUnitState()
+        if isinstance(state, LearningUnitState):
+            return state
+        return LearningUnitState.from_dict(state)
@@ -1,13 +1,21 @@
 import logging
-from unittest import TestCase
-from datetime import date, timedelta
+import math
+import os
+import pickle
+import random
+import subprocess
+import sys
+from unittest import TestCase, skipUnless
+from datetime import date, datetime, timedelta
 from ssrf.algorithm import *
+from ssrf.algorithm import numpy, _LoadSumsWindow
+from ssrf.global_data import WorkloadCalendar
 logging.basicConfig(format=logging.BASIC_FORMAT, level=logging.DEBUG)
 
 try:
-    from unittest.mock import Mock
+    from unittest.mock import Mock, patch
 except ImportError:
-    from mock import Mock
+    from mock import Mock, patch
 
 class TestSSRFAlgorithm (TestCase):
     def setUp(self):
@@ -64,6 +72,98 @@ class TestSSRFAlgorithm (TestCase):
         self._algorithm._calculate_interval(1, 0.0, 5, PRIORITY_HIGH)
         self.assertRaises(AssertionError, self._algorithm._calculate_interval, 1, 0.0, 0, 3)
 
+    def test__find_last_zero_workload_ind(self):
+        self.assertEquals(None, self._algorithm._find_last_zero_workload_ind([1, 2, 3]))
+        self.assertEquals(2, self._algorithm._find_last_zero_workload_ind([0, 1, 0, 3]))
+        self.assertEquals(0, self._algorithm._find_last_zero_workload_ind([0, 1, 2]))
+
+    def test_schedule_with_free_day_query(self):
+        global_data = _FreeDayGlobalData(date(2013, 1, 7))
+        algorithm = SSRFAlgorithm(global_data)
+        result = algorithm.schedule(5, None, now=datetime(2013, 1, 1, 12, 0))
+
+        self.assertEquals(datetime(2013, 1, 7, 12, 0), result.next_review)
+        self.assertEquals([], global_data.fetched)
+
+    def test_schedule_with_free_day_query_no_free_day(self):
+        global_data = _FreeDayGlobalData(None)
+        algorithm = SSRFAlgorithm(global_data)
+        result = algorithm.schedule(5, None, now=datetime(2013, 1, 1, 12, 0))
+
+        self.assertEquals(['get_workloads', 'get_avg_difficulties'], global_data.fetched)
+        self.assertEquals(datetime(2013, 1, 9, 12, 0), result.next_review)
+
+    def test__find_max_load_reduction_ind_same_as_list_based(self):
+        rnd = random.Random(2)
+        for _ in range(300):
+            alg_data = dict(num_reviews=rnd.randint(1, 30), avg_grade=rnd.uniform(0.0, 5.0), difficulty=0.0)
+            priority = rnd.choice(PRIORITIES)
+            grade = rnd.choice(GRADES)
+            intervals = range(self._algorithm._calculate_interval(alg_data['num_reviews'], alg_data['avg_grade'],
+                                                                  grade - 1, priority),
+                              self._algorithm._calculate_interval(alg_data['num_reviews'], alg_data['avg_grade'],
+                                                                  grade, priority) + 1)
+            workloads = [rnd.choice((0, 1, rnd.randint(0, 9))) for _ in intervals]
+            avg_difficulties = [rnd.choice((0.0, 0.5, rnd.uniform(0.0, 3.0))) if workload else 0.0
+                                for workload in workloads]
+
+            self.assertEquals(
+                _list_based_max_load_reduction_ind(self._algorithm, alg_data, intervals, workloads,
+                                                   avg_difficulties, priority),
+                self._algorithm._find_max_load_reduction_ind(alg_data, intervals, workloads,
+                                                             avg_difficulties, priority))
+
+    def test__find_max_load_reduction_ind_with_difficulty_sums(self):
+        rnd = random.Random(3)
+        for _ in range(300):
+            alg_data = dict(num_reviews=rnd.randint(1, 30), avg_grade=rnd.uniform(0.0, 5.0), difficulty=0.0)
+            priority = rnd.choice(PRIORITIES)
+            grade = rnd.choice(GRADES)
+            intervals = range(self._algorithm._calculate_interval(alg_data['num_reviews'], alg_data['avg_grade'],
+                                                                  grade - 1, priority),
+                              self._algorithm._calculate_interval(alg_data['num_reviews'], alg_data['avg_grade'],
+                                                                  grade, priority) + 1)
+            workloads = [rnd.choice((0, 1, rnd.randint(0, 9))) for _ in intervals]
+            # Sums of halves are exact, so averaging them gives the same averages
+            difficulty_sums = [rnd.randint(1, 8) * 0.5 if workload else 0.0 for workload in workloads]
+            avg_difficulties = [difficulty_sum / workload if workload else 0.0
+                                for workload, difficulty_sum in zip(workloads, difficulty_sums)]
+
+            self.assertEquals(
+                self._algorithm._find_max_load_reduction_ind(alg_data, intervals, workloads,
+                                                             avg_difficulties, priority),
+                self._algorithm._find_max_load_reduction_ind(alg_data, intervals, workloads,
+                                                             None, priority, difficulty_sums))
+
+    def test_schedule_with_load_sums(self):
+        global_data = _LoadSumsGlobalData(LoadSums([1, 2, 1, 1, 3], [1.0, 1.0, 0.5, 0.5, 3.0]))
+        result = SSRFAlgorithm(global_data).schedule(5, None, PRIORITY_MEDIUM, now=datetime(2013, 1, 1, 12, 0))
+
+        expected = SSRFAlgorithm(_LoadProfileGlobalData(LoadProfile([1, 2, 1, 1, 3], [1.0, 0.5, 0.5, 0.5, 1.0]))) \
+            .schedule(5, None, PRIORITY_MEDIUM, now=datetime(2013, 1, 1, 12, 0))
+        self.assertEquals(expected, result)
+        self.assertEquals([(date(2013, 1, 5), date(2013, 1, 9), None)], global_data.calls)
+
+    def test__find_max_load_reduction_ind_difficulty_sums_rounding_errors(self):
+        alg_data = self._algorithm._fill_initial_algorithm_data()
+        self.assertEquals(self._algorithm._find_max_load_reduction_ind(alg_data, [1, 2], [1, 2], None,
+                                                                       PRIORITY_MEDIUM, [0.5, 0.0]),
+                          self._algorithm._find_max_load_reduction_ind(alg_data, [1, 2], [1, 2], None,
+                                                                       PRIORITY_MEDIUM, [0.5, -1e-16]))
+        self.assertRaises(AssertionError, self._algorithm._find_max_load_reduction_ind, alg_data, [1, 2], [1, 2],
+                          None, PRIORITY_MEDIUM, [0.5, -0.01])
+
+    def test_load_sums_window_rounding_errors(self):
+        window = _LoadSumsWindow(0, [0], [0.0])
+        for difficulty in (0.34, 0.0, 0.0, 0.58):
+            window.add_review(0, difficulty)
+        window.remove_review(0, 0.34)
+        window.add_review(0, 0.0)
+        window.remove_review(0, 0.0)
+        window.remove_review(0, 0.58)
+
+        self.assertEquals(([2], [0.0]), window._columns())
+
     def test__find_last_zero_workload_ind_wrong_workloads(self):
         self.assertRaises(AssertionError, self._algorithm._find_last_zero_workload_ind, [0, -1])
     
@@ -282,6 +382,86 @@ class TestSSRFAlgorithm (TestCase):
         self.assertRaises(AssertionError, self._algorithm.schedule, 5)
         self._global_data.get_avg_difficulties.assert_called_once_with(date_from, date_to, None)
 
+    def test_schedule_uses_load_profile(self):
+        now = datetime(2013, 5, 1, 12, 30)
+        global_data = _LoadProfileGlobalData(LoadProfile([5, 3, 2, 4, 8], [2.5, 0.3, 0.1, 1.1, 0.8]))
+
+        next_review, alg_data = SSRFAlgorithm(global_data).schedule(grade=5, now=now)
+
+        self.assertEquals(date(2013, 5, 6), next_review.date())
+        self.assertEquals([(date(2013, 5, 5), date(2013, 5, 9), None)], global_data.calls)
+
+        SSRFAlgorithm(global_data).schedule_many([(5, None, PRIORITY_MEDIUM)], now=now)
+        self.assertEquals(2, len(global_data.calls))
+
+    def test_schedule_many_fetches_union_window_once(self):
+        now = datetime.utcnow()
+        date_from = now.date() + timedelta(1)
+        date_to = now.date() + timedelta(8)
+        self._global_data.get_workloads.return_value = [3, 2, 1, 4, 5, 6, 7, 8]
+        self._global_data.get_avg_difficulties.return_value = [1.0, 0.5, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7]
+
+        results = self._algorithm.schedule_many([(2, None, PRIORITY_MEDIUM), (5, None, PRIORITY_MEDIUM),
+                                                 (3, None, PRIORITY_MEDIUM)], now=now)
+
+        self.assertEquals(3, len(results))
+        self._global_data.get_workloads.assert_called_once_with(date_from, date_to, None)
+        self._global_data.get_avg_difficulties.assert_called_once_with(date_from, date_to, None)
+
+    def test_schedule_many_same_as_consecutive_schedule(self):
+        now = datetime(2013, 5, 1, 12, 30)
+        workloads = [(i * 7) % 5 if i < 3 else 1 + (i * 7) % 5 for i in range(200)]
+        avg_difficulties = [(i % 3) / 2.0 if workloads[i] else 0.0 for i in range(200)]
+        items = [(5, dict(num_reviews=3, avg_grade=3.7, difficulty=0.41), PRIORITY_LOW),
+                 (3, None, PRIORITY_MEDIUM),
+                 (0, dict(num_reviews=2, avg_grade=1.0, difficulty=1.2), PRIORITY_HIGH),
+                 (4, dict(num_reviews=5, avg_grade=4.2, difficulty=0.3,
+                          last_review=now - timedelta(hours=2), next_review=now + timedelta(3)), PRIORITY_MEDIUM),
+                 (4, dict(num_reviews=5, avg_grade=4.2, difficulty=0.3,
+                          last_review=now - timedelta(hours=2), next_review=now + timedelta(hours=1)), PRIORITY_MEDIUM),
+                 (1, dict(num_reviews=2, avg_grade=3.0, difficulty=0.5,
+                          last_review=now - timedelta(3), next_review=now), PRIORITY_MEDIUM),
+                 (5, dict(num_reviews=3, avg_grade=3.7, difficulty=0.41), PRIORITY_LOW),
+                 (2, dict(num_reviews=4, avg_grade=2.5, difficulty=1.0), PRIORITY_LOW)]
+
+        expected_global_data = _RecordingGlobalData(now.date(), workloads[:], avg_difficulties[:])
+        algorithm = SSRFAlgorithm(expected_global_data, record_placements=True)
+        expected = [algorithm.schedule(grade, alg_data, priority, now=now) for grade, alg_data, priority in items]
+
+        global_data = _RecordingGlobalData(now.date(), workloads[:], avg_difficulties[:])
+        results = SSRFAlgorithm(global_data).schedule_many(items, now=now)
+
+        self.assertEquals(expected, results)
+        self.assertEquals(workloads, global_data.workloads)
+
+        global_data = _RecordingGlobalData(now.date(), workloads[:], avg_difficulties[:])
+        SSRFAlgorithm(global_data, record_placements=True).schedule_many(items, now=now)
+
+        self.assertEquals(expected_global_data.workloads, global_data.workloads)
+        self.assertEquals(expected_global_data.avg_difficulties, global_data.avg_difficulties)
+
+    def test_schedule_records_placements(self):
+        now = datetime(2013, 5, 1, 12, 30)
+        self._global_data.get_workloads.return_value = [0]
+        algorithm = SSRFAlgorithm(self._global_data, record_placements=True)
+
+        next_review, alg_data = algorithm.schedule(0, now=now)
+        self._global_data.add_review.assert_called_once_with(date(2013, 5, 2), alg_data['difficulty'], None)
+
+        algorithm.schedule(0, alg_data, now=now + timedelta(hours=1))
+        self._global_data.move_review.assert_called_once_with(date(2013, 5, 2), alg_data['difficulty'],
+                                                              date(2013, 5, 2), alg_data['difficulty'], None)
+
+        algorithm.schedule(0, alg_data, now=now + timedelta(2), estimated=True)
+        self.assertEquals(1, self._global_data.move_review.call_count)
+
+    def test_schedule_many_estimated_does_not_use_global_data(self):
+        now = datetime.utcnow()
+        results = self._algorithm.schedule_many([(5, None, PRIORITY_MEDIUM)], now=now, estimated=True)
+
+        self.assertEquals(now.date() + timedelta(8), results[0].next_review.date())
+        self.assertFalse(self._global_data.get_workloads.called)
+
     def _assert_interval(self, exp_interval, interval):
         self.assertAlmostEquals(exp_interval, interval, 2)
         
@@ -298,3 +478,418 @@ class TestSSRFAlgorithm (TestCase):
         self.assertEquals(exp_num_reviews, alg_data['num_reviews'])
         self.assertAlmostEquals(exp_avg_grade, alg_data['avg_grade'], 2)
         self._assert_difficulty(exp_difficulty, alg_data['difficulty'])
+
+
+class TestSSRFAlgorithmValidation (TestCase):
+    def setUp(self):
+        self._global_data = Mock()
+        self._global_data.get_workloads.return_value = [5, 3, 2, 4, 8]
+        self._global_data.get_avg_difficulties.return_value = [2.5, 0.3, 0.1, 1.1, 0.8]
+
+    def test_boundary_validation_checks_schedule_input(self):
+        algorithm = SSRFAlgorithm(self._global_data, validation=VALIDATION_BOUNDARY)
+
+        self.assertRaises(AssertionError, algorithm.schedule, 6)
+        self.assertRaises(AssertionError, algorithm.schedule, 5, priority=3)
+        self.assertRaises(AssertionError, algorithm.schedule, 5, dict(num_reviews=0))
+        self.assertRaises(AssertionError, algorithm.schedule_many, [(5, dict(avg_grade=5.01), PRIORITY_LOW)])
+
+        self._global_data.get_workloads.return_value = [0, 0, 0, 0]
+        self.assertRaises(AssertionError, algorithm.schedule, 5)
+
+    def test_boundary_validation_skips_inner_checks(self):
+        algorithm = SSRFAlgorithm(self._global_data, validation=VALIDATION_BOUNDARY)
+
+        algorithm._calculate_interval(0, 0.0, 0, PRIORITY_MEDIUM)
+        algorithm._calculate_load_coeffs([0, 1], [0.0, -0.01])
+        algorithm._find_last_zero_workload_ind([0, -1])
+
+    def test_validation_off(self):
+        algorithm = SSRFAlgorithm(self._global_data, validation=VALIDATION_OFF)
+
+        algorithm.schedule(5, dict(num_reviews=1, avg_grade=5.01, difficulty=0.0))
+        self._global_data.get_workloads.return_value = [0, 0, 0, 0]
+        algorithm.schedule(5)
+
+    def test_same_results_for_all_validations(self):
+        results = []
+        for validation in VALIDATIONS:
+            algorithm = SSRFAlgorithm(self._global_data, validation=validation)
+            results.append(algorithm.schedule(5, dict(num_reviews=1, avg_grade=2.5, difficulty=0.0),
+                                              now=datetime(2013, 5, 1)))
+        self.assertEquals([results[0]] * len(VALIDATIONS), results)
+
+    def test_wrong_validation(self):
+        self.assertRaises(ValueError, SSRFAlgorithm, self._global_data, validation='partial')
+
+    def test_boundary_validation_kept_with_optimizations(self):
+        code = ("from ssrf.algorithm import *\n"
+                "try:\n"
+                "    SSRFAlgorithm(None, validation=VALIDATION_BOUNDARY).schedule(6, estimated=True)\n"
+                "except AssertionError:\n"
+                "    raise SystemExit(0)\n"
+                "raise SystemExit(1)\n")
+        self.assertEquals(0, subprocess.call([sys.executable, '-O', '-c', code],
+                                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+@skipUnless(numpy is not None, "NumPy is not installed")
+class TestSSRFAlgorithmVectorized (TestCase):
+    def setUp(self):
+        self._algorithm = SSRFAlgorithm(Mock(), vectorized=False)
+        self._vectorized_algorithm = SSRFAlgorithm(Mock(), vectorized=True)
+        # Score narrow windows with NumPy too
+        self._vectorized_algorithm._MIN_VECTORIZED_DAYS = 0
+
+    def test__find_max_load_reduction_ind_same_as_pure_python(self):
+        rnd = random.Random(1)
+        for _ in range(200):
+            alg_data = dict(num_reviews=rnd.randint(1, 30), avg_grade=rnd.uniform(0.0, 5.0), difficulty=0.0)
+            priority = rnd.choice(PRIORITIES)
+            grade = rnd.choice(GRADES)
+            intervals = range(self._algorithm._calculate_interval(alg_data['num_reviews'], alg_data['avg_grade'],
+                                                                  grade - 1, priority),
+                              self._algorithm._calculate_interval(alg_data['num_reviews'], alg_data['avg_grade'],
+                                                                  grade, priority) + 1)
+            workloads = [rnd.randint(0, 5) for _ in intervals]
+            avg_difficulties = [rnd.choice((0.0, 0.5, 1.0, rnd.uniform(0.0, 3.0))) if workload else 0.0
+                                for workload in workloads]
+
+            self.assertEquals(
+                self._algorithm._find_max_load_reduction_ind(alg_data, intervals, workloads,
+                                                             avg_difficulties, priority),
+                self._vectorized_algorithm._find_max_load_reduction_ind(alg_data, intervals, workloads,
+                                                                        avg_difficulties, priority))
+
+    def test__find_max_load_reduction_ind_with_difficulty_sums_same_as_pure_python(self):
+        rnd = random.Random(4)
+        for _ in range(200):
+            alg_data = dict(num_reviews=rnd.randint(1, 30), avg_grade=rnd.uniform(0.0, 5.0), difficulty=0.0)
+            priority = rnd.choice(PRIORITIES)
+            grade = rnd.choice(GRADES)
+            intervals = range(self._algorithm._calculate_interval(alg_data['num_reviews'], alg_data['avg_grade'],
+                                                                  grade - 1, priority),
+                              self._algorithm._calculate_interval(alg_data['num_reviews'], alg_data['avg_grade'],
+                                                                  grade, priority) + 1)
+            workloads = [rnd.randint(0, 5) for _ in intervals]
+            difficulty_sums = [rnd.uniform(0.0, 6.0) if workload else 0.0 for workload in workloads]
+
+            self.assertEquals(
+                self._algorithm._find_max_load_reduction_ind(alg_data, intervals, workloads,
+                                                             None, priority, difficulty_sums),
+                self._vectorized_algorithm._find_max_load_reduction_ind(alg_data, intervals, workloads,
+                                                                        None, priority, difficulty_sums))
+
+    def test__find_max_load_reduction_ind_narrow_window_in_pure_python(self):
+        algorithm = SSRFAlgorithm(Mock(), vectorized=True)
+        algorithm._find_max_load_reduction_ind_vectorized = Mock()
+        alg_data = algorithm._fill_initial_algorithm_data()
+        self.assertEquals(1, algorithm._find_max_load_reduction_ind(alg_data, [1, 2], [1, 1], [0.0, 0.0],
+                                                                    PRIORITY_MEDIUM))
+        self.assertFalse(algorithm._find_max_load_reduction_ind_vectorized.called)
+
+    def test__calculate_load_coeffs_same_as_pure_python(self):
+        workloads = [63, 40, 33, 20, 18, 50, 0]
+        avg_difficulties = [6.0, 2.2, 1.5, 1.6, 3.5, 5.1, 0.0]
+        load_coeffs = self._vectorized_algorithm._calculate_load_coeffs_vectorized(
+            numpy.array(workloads, dtype=float), numpy.array(avg_difficulties))
+        self.assertEquals(self._algorithm._calculate_load_coeffs(workloads, avg_difficulties), list(load_coeffs))
+
+
+def _list_based_max_load_reduction_ind(algorithm, alg_data, intervals, workloads, avg_difficulties, priority):
+    """ Reference implementation of the load reduction search computing whole lists of coefficients. """
+    load_coeffs = algorithm._calculate_load_coeffs(workloads, avg_difficulties)
+    new_workloads = [workload + 1 for workload in workloads]
+    new_avg_difficulties = [(workload * avg_difficulty +
+                             algorithm._calculate_difficulty(alg_data['num_reviews'], priority, interval)) / new_workload
+                            for interval, workload, avg_difficulty, new_workload
+                            in zip(intervals, workloads, avg_difficulties, new_workloads)]
+    new_load_coeffs = algorithm._calculate_load_coeffs(new_workloads, new_avg_difficulties)
+    load_coeff_rel = [coeff1 / coeff2 if coeff2 != 0 else sys.maxsize
+                      for coeff1, coeff2 in zip(new_load_coeffs, load_coeffs)]
+    load_coeff_rel.reverse()
+    return (len(load_coeff_rel) - 1) - load_coeff_rel.index(min(load_coeff_rel))
+
+class _FreeDayGlobalData (SSRFAlgorithmGlobalData):
+    def __init__(self, free_day):
+        self.free_day = free_day
+        self.fetched = []
+
+    def find_last_free_day(self, from_date, to_date, user_data):
+        return self.free_day
+
+    def get_workloads(self, from_date, to_date, user_data):
+        self.fetched.append('get_workloads')
+        return [1] * ((to_date - from_date).days + 1)
+
+    def get_avg_difficulties(self, from_date, to_date, user_data):
+        self.fetched.append('get_avg_difficulties')
+        return [1.0] * ((to_date - from_date).days + 1)
+
+class _LoadProfileGlobalData (SSRFAlgorithmGlobalData):
+    """ Global data implementing only ``get_load_profile``. """
+
+    def __init__(self, load_profile):
+        self.load_profile = load_profile
+        self.calls = []
+
+    def get_load_profile(self, from_date, to_date, user_data):
+        self.calls.append((from_date, to_date, user_data))
+        return self.load_profile
+
+
+class _LoadSumsGlobalData (SSRFAlgorithmGlobalData):
+    """ Global data implementing only ``get_load_sums``. """
+
+    def __init__(self, load_sums):
+        self.load_sums = load_sums
+        self.calls = []
+
+    def get_load_sums(self, from_date, to_date, user_data):
+        self.calls.append((from_date, to_date, user_data))
+        return self.load_sums
+
+
+class _RecordingGlobalData (SSRFAlgorithmGlobalData):
+    """ Global data of a single user kept in lists indexed by days from ``today``. """
+
+    def __init__(self, today, workloads, avg_difficulties):
+        self.today = today
+        self.workloads = workloads
+        self.avg_difficulties = avg_difficulties
+
+    def get_workloads(self, from_date, to_date, user_data):
+        return self.workloads[(from_date - self.today).days:(to_date - self.today).days + 1]
+
+    def get_avg_difficulties(self, from_date, to_date, user_data):
+        return self.avg_difficulties[(from_date - self.today).days:(to_date - self.today).days + 1]
+
+    def add_review(self, review_date, difficulty, user_data):
+        ind = (review_date - self.today).days
+        workload = self.workloads[ind]
+        self.avg_difficulties[ind] = (workload * self.avg_difficulties[ind] + difficulty) / (workload + 1)
+        self.workloads[ind] = workload + 1
+
+    def remove_review(self, review_date, difficulty, user_data):
+        ind = (review_date - self.today).days
+        workload = self.workloads[ind]
+        self.avg_difficulties[ind] = (workload * self.avg_difficulties[ind] - difficulty) / (workload - 1) \
+            if workload > 1 else 0.0
+        self.workloads[ind] = workload - 1
+
+def _epoch_seconds(value):
+    return int((value - datetime(1970, 1, 1)).total_seconds())
+
+class TestSSRFAlgorithmEpoch (TestCase):
+    def setUp(self):
+        self._now = datetime(2013, 5, 1, 12, 30)
+        self._epoch_now = _epoch_seconds(self._now)
+
+    def test_schedule_epoch_same_as_schedule(self):
+        calendar = WorkloadCalendar()
+        algorithm = SSRFAlgorithm(calendar, record_placements=True)
+        epoch_calendar = WorkloadCalendar(epoch_days=True)
+        epoch_algorithm = SSRFAlgorithm(epoch_calendar, record_placements=True)
+        rnd = random.Random(0)
+        states = {}
+        epoch_states = {}
+        now = self._now
+        for _ in range(200):
+            now += timedelta(minutes=rnd.randint(0, 600))
+            lu_id, grade, priority = rnd.randint(0, 9), rnd.choice(GRADES), rnd.choice(PRIORITIES)
+            next_review, states[lu_id] = algorithm.schedule(grade, states.get(lu_id), priority, now=now,
+                                                            user_data='user')
+            epoch_next_review, epoch_states[lu_id] = epoch_algorithm.schedule_epoch(
+                grade, epoch_states.get(lu_id), priority, now=_epoch_seconds(now), user_data='user')
+            self.assertEquals(_epoch_seconds(next_review), epoch_next_review)
+
+        for lu_id, alg_data in states.items():
+            epoch_alg_data = dict(alg_data, last_review=_epoch_seconds(alg_data['last_review']),
+                                  next_review=_epoch_seconds(alg_data['next_review']))
+            self.assertEquals(epoch_alg_data, epoch_states[lu_id])
+        first_day = self._now.date()
+        last_day = first_day + timedelta(3650)
+        self.assertEquals(calendar.get_load_sums(first_day, last_day, 'user'),
+                          epoch_calendar.get_load_sums(_epoch_seconds(self._now) // 86400,
+                                                       _epoch_seconds(self._now) // 86400 + 3650, 'user'))
+
+    def test_epoch_global_data_gets_epoch_days(self):
+        global_data = Mock(epoch_days=True)
+        global_data.get_workloads.side_effect = \
+            lambda first_day, last_day, user_data: [2] * (last_day - first_day + 1)
+        global_data.get_avg_difficulties.side_effect = \
+            lambda first_day, last_day, user_data: [0.5] * (last_day - first_day + 1)
+        algorithm = SSRFAlgorithm(global_data, record_placements=True)
+
+        next_review, alg_data = algorithm.schedule_epoch(5, now=self._epoch_now)
+
+        today = self._epoch_now // 86400
+        first_day, last_day, _ = global_data.get_workloads.call_args[0]
+        self.assertEquals((today + 4, today + 8), (first_day, last_day))
+        global_data.add_review.assert_called_once_with(next_review // 86400, alg_data['difficulty'], None)
+        self.assertEquals(self._epoch_now, alg_data['last_review'])
+        self.assertEquals(0, (next_review - self._epoch_now) % 86400)
+
+    def test_schedule_epoch_with_date_global_data(self):
+        global_data = Mock()
+        global_data.get_workloads.side_effect = \
+            lambda date_from, date_to, user_data: [2] * ((date_to - date_from).days + 1)
+        global_data.get_avg_difficulties.side_effect = \
+            lambda date_from, date_to, user_data: [0.5] * ((date_to - date_from).days + 1)
+        algorithm = SSRFAlgorithm(global_data)
+
+        next_review, _ = algorithm.schedule_epoch(5, now=self._epoch_now)
+
+        self.assertEquals((date(2013, 5, 5), date(2013, 5, 9), None), global_data.get_workloads.call_args[0])
+        self.assertEquals(_epoch_seconds(SSRFAlgorithm(global_data).schedule(5, now=self._now).next_review),
+                          next_review)
+
+    def test_schedule_epoch_reviewed_within_24h(self):
+        algorithm = SSRFAlgorithm(Mock())
+        alg_data = dict(num_reviews=3, avg_grade=4.0, difficulty=0.5, last_review=self._epoch_now - 3600,
+                        next_review=self._epoch_now + 600)
+
+        next_review, new_alg_data = algorithm.schedule_epoch(0, alg_data, now=self._epoch_now)
+
+        self.assertEquals(self._epoch_now + 86400, next_review)
+        self.assertEquals(3, new_alg_data['num_reviews'])
+        self.assertEquals(self._epoch_now, new_alg_data['last_review'])
+        self.assertEquals([], algorithm.global_data.method_calls)
+
+class TestSSRFAlgorithmLogging (TestCase):
+    def setUp(self):
+        self._logger = logging.getLogger('ssrf.algorithm')
+        self._level = self._logger.level
+        self._global_data = Mock()
+        self._global_data.get_workloads.side_effect = \
+            lambda date_from, date_to, user_data: [2] * ((date_to - date_from).days + 1)
+        self._global_data.get_avg_difficulties.side_effect = \
+            lambda date_from, date_to, user_data: [0.5] * ((date_to - date_from).days + 1)
+        self._algorithm = SSRFAlgorithm(self._global_data)
+
+    def tearDown(self):
+        self._logger.setLevel(self._level)
+
+    def test_no_debug_calls_when_disabled(self):
+        self._logger.setLevel(logging.INFO)
+        alg_data = {'num_reviews': 5, 'avg_grade': 4.0, 'difficulty': 0.5}
+        with patch.object(self._logger, 'debug') as debug:
+            self._algorithm.schedule(5, alg_data, PRIORITY_MEDIUM)
+        self.assertFalse(debug.called)
+
+    def test_debug_calls_when_enabled(self):
+        self._logger.setLevel(logging.DEBUG)
+        alg_data = {'num_reviews': 5, 'avg_grade': 4.0, 'difficulty': 0.5}
+        with patch.object(self._logger, 'debug') as debug:
+            self._algorithm.schedule(5, alg_data, PRIORITY_MEDIUM)
+        self.assertTrue(debug.called)
+
+class TestSSRFAlgorithmPreview (TestCase):
+    def setUp(self):
+        self._global_data = Mock()
+        self._algorithm = SSRFAlgorithm(self._global_data)
+        self._now = datetime(2013, 5, 1, 12, 30)
+
+    def test_preview_same_as_estimated_schedule(self):
+        for alg_data in (None, dict(num_reviews=4, avg_grade=3.2, difficulty=0.7,
+                                    last_review=self._now - timedelta(3), next_review=self._now)):
+            for priority in PRIORITIES:
+                expected = tuple((self._algorithm.schedule(grade, alg_data, priority, now=self._now,
+                                                           estimated=True).next_review - self._now).days
+                                 for grade in GRADES)
+                self.assertEquals(expected, self._algorithm.preview(alg_data, priority))
+        self.assertEquals([], self._global_data.method_calls)
+
+    def test_preview_windows(self):
+        alg_data = dict(num_reviews=4, avg_grade=3.2, difficulty=0.7)
+        windows = self._algorithm.preview(alg_data, PRIORITY_HIGH, windows=True)
+        self.assertEquals(len(GRADES), len(windows))
+        for grade, (min_interval, max_interval) in zip(GRADES, windows):
+            self.assertEquals(self._algorithm._calculate_interval(4, 3.2, grade - 1, PRIORITY_HIGH), min_interval)
+            self.assertEquals(self._algorithm._calculate_interval(4, 3.2, grade, PRIORITY_HIGH), max_interval)
+        self.assertEquals(dict(num_reviews=4, avg_grade=3.2, difficulty=0.7), alg_data)
+
+    def test_preview_many(self):
+        items = [(None, PRIORITY_LOW), (dict(num_reviews=2, avg_grade=4.5, difficulty=0.1), PRIORITY_MEDIUM)]
+        self.assertEquals([self._algorithm.preview(alg_data, priority) for alg_data, priority in items],
+                          self._algorithm.preview_many(items))
+
+    def test_preview_wrong_input(self):
+        self.assertRaises(AssertionError, self._algorithm.preview, None, 5)
+        self.assertRaises(AssertionError, self._algorithm.preview, dict(num_reviews=0, avg_grade=3.0))
+
+class TestSSRFParameters (TestCase):
+    def setUp(self):
+        self._now = datetime(2013, 5, 1, 12, 30)
+
+    def test_default_parameters(self):
+        for num_reviews in (1, 7, 100, 101, 250):
+            for avg_grade in (0.0, 2.5, 3.7, 5, 5.0):
+                for grade in (MIN_GRADE - 1,) + GRADES:
+                    for priority, value in ((PRIORITY_LOW, 2.0), (PRIORITY_MEDIUM, 3.0), (PRIORITY_HIGH, 4.0)):
+                        self.assertEquals(1 + int(round(num_reviews ** (avg_grade / 2.0) * math.exp(grade - value))),
+                                          DEFAULT_PARAMETERS.interval(num_reviews, avg_grade, grade, priority))
+        self.assertEquals(2.5, SSRFAlgorithm(Mock())._fill_initial_algorithm_data()['avg_grade'])
+
+    def test_float_num_reviews(self):
+        for num_reviews in (3, 2.5, 150.0):
+            self.assertEquals(1 + int(round(num_reviews ** (MAX_GRADE / 2.0) * math.exp(MAX_GRADE - 3.0))),
+                              DEFAULT_PARAMETERS.interval(float(num_reviews), MAX_GRADE, MAX_GRADE, PRIORITY_MEDIUM))
+        alg_data = dict(num_reviews=3, avg_grade=MAX_GRADE, difficulty=0.0)
+        self.assertEquals(SSRFAlgorithm(Mock()).schedule(5, alg_data, now=self._now, estimated=True),
+                          SSRFAlgorithm(Mock()).schedule(5, dict(alg_data, num_reviews=3.0), now=self._now,
+                                                         estimated=True))
+
+    def test_custom_parameters(self):
+        parameters = SSRFParameters(priority_values={'rare': 1.5, 'common': 3.5}, default_avg_grade=3.0,
+                                    overlearning_interval=2, grades=(1, 2, 3, 4))
+        algorithm = SSRFAlgorithm(Mock(), parameters=parameters)
+
+        self.assertEquals(2 + int(round(1 ** 1.5 * math.exp(4 - 1.5))), algorithm.preview(None, 'rare')[-1])
+        self.assertEquals(((2, 2), (2, 2), (2, 3), (3, 4)), algorithm.preview(None, 'common', windows=True))
+        next_review, alg_data = algorithm.schedule(4, None, 'rare', now=self._now, estimated=True)
+        self.assertEquals(3.5, alg_data['avg_grade'])
+        self.assertEquals(0.0, alg_data['difficulty'])
+        self.assertRaises(AssertionError, algorithm.schedule, 0, None, 'rare', now=self._now, estimated=True)
+        self.assertRaises(AssertionError, algorithm.schedule, 3, None, PRIORITY_MEDIUM, now=self._now,
+                          estimated=True)
+
+    def test_profiles_coexist(self):
+        global_data = Mock()
+        global_data.get_workloads.side_effect = lambda date_from, date_to, user_data: \
+            [1] * ((date_to - date_from).days + 1)
+        global_data.get_avg_difficulties.side_effect = lambda date_from, date_to, user_data: \
+            [0.5] * ((date_to - date_from).days + 1)
+        alg_data = dict(num_reviews=5, avg_grade=4.2, difficulty=0.3)
+        default_result = SSRFAlgorithm(global_data).schedule(5, alg_data, now=self._now)
+        other_result = SSRFAlgorithm(global_data, parameters=SSRFParameters(
+            priority_values={PRIORITY_MEDIUM: 4.0})).schedule(5, alg_data, now=self._now)
+
+        self.assertTrue(other_result.next_review < default_result.next_review)
+        self.assertEquals(default_result, SSRFAlgorithm(global_data).schedule(5, alg_data, now=self._now))
+
+    def test_immutable(self):
+        priority_values = {PRIORITY_MEDIUM: 3.0}
+        parameters = SSRFParameters(priority_values)
+        priority_values[PRIORITY_MEDIUM] = 1.0
+        parameters.priority_values[PRIORITY_MEDIUM] = 1.0
+
+        self.assertEquals({PRIORITY_MEDIUM: 3.0}, parameters.priority_values)
+        self.assertRaises(AttributeError, setattr, parameters, 'default_avg_grade', 3.0)
+        self.assertRaises(AttributeError, delattr, parameters, 'grades')
+
+    def test_equality_and_pickling(self):
+        parameters = SSRFParameters(default_avg_grade=3.0)
+
+        self.assertEquals(SSRFParameters(default_avg_grade=3.0), parameters)
+        self.assertEquals(hash(SSRFParameters(default_avg_grade=3.0)), hash(parameters))
+        self.assertNotEquals(DEFAULT_PARAMETERS, parameters)
+        self.assertEquals(parameters, pickle.loads(pickle.dumps(parameters)))
+
+    def test_wrong_parameters(self):
+        self.assertRaises(ValueError, SSRFParameters, priority_values={})
+        self.assertRaises(ValueError, SSRFParameters, grades=(0, 1, 3))
+        self.assertRaises(ValueError, SSRFParameters, grades=(0,))
+        self.assertRaises(ValueError, SSRFParameters, default_avg_grade=5.5)
+        self.assertRaises(ValueError, SSRFParameters, overlearning_interval=0)
+        self.assertRaises(ValueError, SSRFParameters, max_num_reviews=-1)
@@ -0,0 +1,110 @@
+import sys
+from unittest import TestCase, skipUnless
+from datetime import date, datetime, timedelta
+from ssrf.algorithm import *
+from ssrf.global_data import WorkloadCalendar
+from ssrf.locking import StripedLocks
+
+# The module is imported by test discovery on all supported versions; async syntax requires Python 3.5+
+# and the tests run the coroutines with asyncio.run
+_ASYNCIO_RUN = sys.version_info >= (3, 7)
+if _ASYNCIO_RUN:
+    import asyncio
+    from ssrf.async_algorithm import AsyncSSRFAlgorithm
+
+class _AsyncWorkloadCalendar (object):
+    """ Awaitable facade of ``WorkloadCalendar`` which tracks the number of concurrent calls. """
+
+    def __init__(self):
+        self.calendar = WorkloadCalendar()
+        self.running = 0
+        self.max_running = 0
+
+    def _call(self, method, *args):
+        """ Returns a future resolved with the result of the method in the next iteration of the event loop. """
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        def resolve():
+            self.running -= 1
+            future.set_result(method(*args))
+        loop.call_soon(resolve)
+        return future
+
+    def get_workloads(self, from_date, to_date, user_data):
+        return self._call(self.calendar.get_workloads, from_date, to_date, user_data)
+
+    def get_avg_difficulties(self, from_date, to_date, user_data):
+        return self._call(self.calendar.get_avg_difficulties, from_date, to_date, user_data)
+
+    def add_review(self, review_date, difficulty, user_data):
+        return self._call(self.calendar.add_review, review_date, difficulty, user_data)
+
+    def move_review(self, old_date, old_difficulty, new_date, new_difficulty, user_data):
+        return self._call(self.calendar.move_review, old_date, old_difficulty, new_date, new_difficulty, user_data)
+
+
+@skipUnless(_ASYNCIO_RUN, "requires Python 3.7+")
+class TestAsyncSSRFAlgorithm (TestCase):
+    def setUp(self):
+        self._now = datetime(2013, 5, 1, 12, 30)
+        self._global_data = _AsyncWorkloadCalendar()
+        self._algorithm = AsyncSSRFAlgorithm(self._global_data, record_placements=True)
+        self._calendar = WorkloadCalendar()
+        self._sync_algorithm = SSRFAlgorithm(self._calendar, record_placements=True)
+
+    def test_schedule_same_as_sync(self):
+        alg_data = sync_alg_data = None
+        for grade in (5, 3, 4, 0, 5, 5, 2, 5):
+            for _ in range(3):
+                next_review, alg_data = asyncio.run(self._algorithm.schedule(grade, now=self._now, user_data='u'))
+                sync_next_review, sync_alg_data = self._sync_algorithm.schedule(grade, now=self._now,
+                                                                               user_data='u')
+                self.assertEquals(sync_next_review, next_review)
+                self.assertEquals(sync_alg_data, alg_data)
+
+        self.assertEquals(self._calendar.get_workloads(self._now.date(), self._now.date() + timedelta(30), 'u'),
+                          self._global_data.calendar.get_workloads(self._now.date(),
+                                                                   self._now.date() + timedelta(30), 'u'))
+
+    def test_schedule_many_same_as_sync(self):
+        items = [(grade, None, PRIORITY_MEDIUM) for grade in (5, 5, 4, 3, 5, 1)]
+
+        results = asyncio.run(self._algorithm.schedule_many(items, now=self._now, user_data='u'))
+
+        self.assertEquals(self._sync_algorithm.schedule_many(items, now=self._now, user_data='u'), results)
+
+    def test_schedule_users_bounded_concurrency(self):
+        users_items = [('user %d' % user, [(grade, None, PRIORITY_MEDIUM) for grade in (5, 4, 5)])
+                       for user in range(20)]
+
+        results = asyncio.run(self._algorithm.schedule_users(users_items, now=self._now, concurrency=3))
+
+        self.assertEquals(20, len(results))
+        self.assertEquals(3, self._global_data.max_running)
+        for (user_data, items), user_results in zip(users_items, results):
+            self.assertEquals(self._sync_algorithm.schedule_many(items, now=self._now, user_data=user_data),
+                              user_results)
+
+    def test_schedule_users_wrong_concurrency(self):
+        self.assertRaises(ValueError, asyncio.run, self._algorithm.schedule_users([], concurrency=0))
+
+    def test_schedule_with_sync_global_data(self):
+        algorithm = AsyncSSRFAlgorithm(WorkloadCalendar())
+
+        next_review, alg_data = asyncio.run(algorithm.schedule(5, now=self._now))
+
+        self.assertEquals(date(2013, 5, 9), next_review.date())
+
+    def test_schedule_epoch_same_as_sync(self):
+        epoch_now = int((self._now - datetime(1970, 1, 1)).total_seconds())
+        algorithm = AsyncSSRFAlgorithm(WorkloadCalendar(epoch_days=True))
+
+        next_review, alg_data = asyncio.run(algorithm.schedule_epoch(5, now=epoch_now))
+
+        self.assertEquals(self._sync_algorithm.schedule_epoch(5, now=epoch_now), (next_review, alg_data))
+
+    def test_user_locks_not_supported(self):
+        self.assertRaises(ValueError, AsyncSSRFAlgorithm, WorkloadCalendar(), record_placements=True,
+                          user_locks=StripedLocks())
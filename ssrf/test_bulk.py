@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+from datetime import datetime, timedelta
+from ssrf.algorithm import *
+from ssrf.bulk import BulkRescheduler, BulkProgress
+from ssrf.global_data import WorkloadCalendar
+
+class TestBulkRescheduler (TestCase):
+    def setUp(self):
+        self._now = datetime(2013, 5, 1, 12, 30)
+        self._users_items = [('user %d' % user, [('lu %d' % lu, lu % 6, self._alg_data(lu), PRIORITIES[lu % 3])
+                                                 for lu in range(30 + user)])
+                             for user in range(6)]
+        self._dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_reschedule_in_process(self):
+        results = dict(BulkRescheduler(processes=0).reschedule(self._users_items, now=self._now))
+
+        self.assertEquals(self._expected_results(), results)
+
+    def test_reschedule_in_pool(self):
+        progress = []
+        rescheduler = BulkRescheduler(processes=2, progress=progress.append,
+                                      algorithm_options=dict(validation=VALIDATION_BOUNDARY))
+
+        results = dict(rescheduler.reschedule(self._users_items, now=self._now))
+
+        self.assertEquals(self._expected_results(), results)
+        self.assertEquals(6, len(progress))
+        self.assertEquals((6, sum(len(items) for _, items in self._users_items)), progress[-1][:2])
+        self.assertTrue(isinstance(progress[-1], BulkProgress))
+
+    def test_reschedule_resumes_from_checkpoint(self):
+        checkpoint_path = os.path.join(self._dir, 'checkpoint')
+        rescheduler = BulkRescheduler(processes=0, checkpoint_path=checkpoint_path)
+
+        user_results = rescheduler.reschedule(self._users_items, now=self._now)
+        first_users = [next(user_results)[0], next(user_results)[0]]
+        del user_results
+
+        rescheduler = BulkRescheduler(processes=0, checkpoint_path=checkpoint_path)
+        resumed_users = [user_data for user_data, _ in rescheduler.reschedule(self._users_items, now=self._now)]
+
+        # results of the second user weren't confirmed by resuming the generator
+        self.assertEquals(['user 0', 'user 1'], first_users)
+        self.assertEquals(['user %d' % user for user in range(1, 6)], resumed_users)
+
+    def test_reschedule_reads_bounded_number_of_users_ahead(self):
+        read_users = []
+        max_pending_read = threading.Event()
+        def users_items():
+            for user_data, items in self._users_items * 5:
+                read_users.append(user_data)
+                if len(read_users) == 3:
+                    max_pending_read.set()
+                yield user_data, items
+        rescheduler = BulkRescheduler(processes=2, max_pending=3)
+
+        user_results = rescheduler.reschedule(users_items(), now=self._now)
+        next(user_results)
+        # The fourth user can't be read until the consumed result is confirmed by resuming the generator
+        self.assertTrue(max_pending_read.wait(10))
+        self.assertEquals(3, len(read_users))
+        user_results.close()
+
+        self.assertEquals(30, len(list(rescheduler.reschedule(users_items(), now=self._now))))
+
+    def test_wrong_processes(self):
+        self.assertRaises(ValueError, BulkRescheduler, processes=-1)
+        self.assertRaises(ValueError, BulkRescheduler, max_pending=0)
+
+    def _alg_data(self, lu):
+        if lu % 4 == 0:
+            return None
+        return dict(num_reviews=1 + lu % 5, avg_grade=(lu % 11) / 2.0, difficulty=(lu % 7) / 3.0,
+                    last_review=self._now - timedelta(lu % 9 + 1), next_review=self._now + timedelta(lu % 13))
+
+    def _expected_results(self):
+        expected = {}
+        for user_data, items in self._users_items:
+            calendar = WorkloadCalendar()
+            for _, _, alg_data, _ in items:
+                if alg_data is not None:
+                    calendar.add_review(alg_data['next_review'].date(), alg_data['difficulty'], user_data)
+            algorithm = SSRFAlgorithm(calendar, record_placements=True)
+            expected[user_data] = [(lu_id, algorithm.schedule(grade, alg_data, priority, now=self._now,
+                                                              user_data=user_data))
+                                   for lu_id, grade, alg_data, priority in items]
+        return expected
@@ -0,0 +1,202 @@
+from unittest import TestCase
+from datetime import date, datetime, timedelta
+from ssrf.algorithm import *
+from ssrf.cache import IntervalCache, SessionCache
+from ssrf.global_data import WorkloadCalendar
+
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+class TestIntervalCache (TestCase):
+    def setUp(self):
+        self._cache = IntervalCache(max_size=2)
+        self._algorithm = SSRFAlgorithm(Mock(), interval_cache=self._cache)
+        self._uncached_algorithm = SSRFAlgorithm(Mock())
+
+    def test_get_interval_same_as_uncached(self):
+        for num_reviews in (1, 5, 10, 11, 50):
+            for avg_grade in (0.0, 2.3, 3.7, 5.0):
+                for grade in (MIN_GRADE - 1,) + GRADES:
+                    for priority in PRIORITIES:
+                        self.assertEquals(
+                            self._uncached_algorithm._calculate_interval(num_reviews, avg_grade, grade, priority),
+                            self._algorithm._calculate_interval(num_reviews, avg_grade, grade, priority))
+
+    def test_get_interval_ideal_not_cached(self):
+        for num_reviews in range(1, 11):
+            self._algorithm._calculate_difficulty(num_reviews, PRIORITY_MEDIUM, 1)
+        self.assertEquals((0, 0, 0, 2), self._cache.info())
+
+    def test_get_interval_shared_by_parameters(self):
+        parameters = SSRFParameters(priority_values={PRIORITY_MEDIUM: 2.0})
+        algorithm = SSRFAlgorithm(Mock(), interval_cache=self._cache, parameters=parameters)
+        uncached_algorithm = SSRFAlgorithm(Mock(), parameters=parameters)
+        for num_reviews in (5, 11):
+            for avg_grade in (3.7, MAX_GRADE):
+                self.assertEquals(uncached_algorithm._calculate_interval(num_reviews, avg_grade, MAX_GRADE,
+                                                                         PRIORITY_MEDIUM),
+                                  algorithm._calculate_interval(num_reviews, avg_grade, MAX_GRADE, PRIORITY_MEDIUM))
+                self.assertEquals(self._uncached_algorithm._calculate_interval(num_reviews, avg_grade, MAX_GRADE,
+                                                                               PRIORITY_MEDIUM),
+                                  self._algorithm._calculate_interval(num_reviews, avg_grade, MAX_GRADE,
+                                                                      PRIORITY_MEDIUM))
+
+    def test_get_interval_float_num_reviews(self):
+        for num_reviews in (3.0, 2.5):
+            self.assertEquals(self._uncached_algorithm._calculate_interval(num_reviews, MAX_GRADE, MAX_GRADE,
+                                                                           PRIORITY_MEDIUM),
+                              self._algorithm._calculate_interval(num_reviews, MAX_GRADE, MAX_GRADE, PRIORITY_MEDIUM))
+        self.assertEquals((0, 1, 1, 2), self._cache.info())
+
+    def test_get_interval_above_max_num_reviews_uses_lru(self):
+        self._algorithm._calculate_interval(101, MAX_GRADE, MAX_GRADE, PRIORITY_MEDIUM)
+        self._algorithm._calculate_interval(101, MAX_GRADE, MAX_GRADE, PRIORITY_MEDIUM)
+        self.assertEquals((1, 1, 1, 2), self._cache.info())
+
+    def test_get_interval_evicts_least_recently_used(self):
+        self._algorithm._calculate_interval(3, 2.5, 3, PRIORITY_LOW)
+        self._algorithm._calculate_interval(3, 2.6, 3, PRIORITY_LOW)
+        self._algorithm._calculate_interval(3, 2.5, 3, PRIORITY_LOW)
+        self._algorithm._calculate_interval(3, 2.7, 3, PRIORITY_LOW)
+        self.assertEquals((1, 3, 2, 2), self._cache.info())
+
+        self._algorithm._calculate_interval(3, 2.5, 3, PRIORITY_LOW)
+        self._algorithm._calculate_interval(3, 2.6, 3, PRIORITY_LOW)
+        self.assertEquals((2, 4, 2, 2), self._cache.info())
+
+    def test_get_interval_wrong_parameters_not_cached(self):
+        self.assertRaises(AssertionError, self._algorithm._calculate_interval, 0, 2.5, 3, PRIORITY_LOW)
+        self.assertRaises(AssertionError, self._algorithm._calculate_interval, 1, 5.0, 5, 3)
+        self.assertEquals(0, self._cache.info().size)
+
+    def test_wrong_options(self):
+        self.assertRaises(ValueError, IntervalCache, max_size=0)
+
+    def test_not_used_without_full_validation(self):
+        algorithm = SSRFAlgorithm(Mock(), interval_cache=self._cache, validation=VALIDATION_BOUNDARY)
+        self.assertEquals(self._uncached_algorithm._calculate_interval(3, 2.5, 3, PRIORITY_LOW),
+                          algorithm._calculate_interval(3, 2.5, 3, PRIORITY_LOW))
+        self.assertEquals((0, 0, 0, 2), self._cache.info())
+
+    def test_clear(self):
+        self._algorithm._calculate_interval(3, 2.5, 3, PRIORITY_LOW)
+        self._cache.clear()
+        self.assertEquals((0, 0, 0, 2), self._cache.info())
+
+class _CountingCalendar (WorkloadCalendar):
+    def __init__(self):
+        WorkloadCalendar.__init__(self)
+        self.fetched_days = 0
+
+    def get_load_profile(self, from_date, to_date, user_data):
+        self.fetched_days += (to_date - from_date).days + 1
+        return WorkloadCalendar.get_load_profile(self, from_date, to_date, user_data)
+
+    def get_load_sums(self, from_date, to_date, user_data):
+        self.fetched_days += (to_date - from_date).days + 1
+        return WorkloadCalendar.get_load_sums(self, from_date, to_date, user_data)
+
+class _ReadOnlyGlobalData (SSRFAlgorithmGlobalData):
+    def get_workloads(self, from_date, to_date, user_data):
+        return [1] * ((to_date - from_date).days + 1)
+
+    def get_avg_difficulties(self, from_date, to_date, user_data):
+        return [0.5] * ((to_date - from_date).days + 1)
+
+class TestSessionCache (TestCase):
+    def setUp(self):
+        self._now = datetime(2013, 1, 1, 9, 0)
+        self._time = 0.0
+        self._calendar = _CountingCalendar()
+        self._cache = SessionCache(self._calendar, max_users=2, ttl=60.0, clock=lambda: self._time)
+        self._algorithm = SSRFAlgorithm(self._cache, record_placements=True)
+
+    def test_schedule_same_as_uncached(self):
+        algorithm = SSRFAlgorithm(WorkloadCalendar(), record_placements=True)
+        alg_data = [None] * 5
+        cached_alg_data = [None] * 5
+        for day, grade in enumerate((5, 4, 5, 3, 5, 5, 4, 2, 5, 5) * 3):
+            now = self._now + timedelta(day * 2)
+            for lu_id in range(5):
+                result = algorithm.schedule(grade, alg_data[lu_id], now=now, user_data='user')
+                cached_result = self._algorithm.schedule(grade, cached_alg_data[lu_id], now=now, user_data='user')
+                self.assertEquals(result, cached_result)
+                alg_data[lu_id], cached_alg_data[lu_id] = result.alg_data, cached_result.alg_data
+        self.assertTrue(self._cache.info().hits > 0)
+
+    def test_fetches_only_missing_days(self):
+        self._cache.get_workloads(date(2013, 1, 5), date(2013, 1, 10), 'user')
+        self._cache.get_workloads(date(2013, 1, 6), date(2013, 1, 9), 'user')
+        self.assertEquals(6, self._calendar.fetched_days)
+        self._cache.get_workloads(date(2013, 1, 3), date(2013, 1, 12), 'user')
+        self.assertEquals(10, self._calendar.fetched_days)
+        self.assertEquals((1, 2, 1, 2), self._cache.info())
+
+    def test_placements_applied_in_place(self):
+        self._cache.get_workloads(date(2013, 1, 1), date(2013, 1, 10), 'user')
+        self._cache.add_review(date(2013, 1, 2), 1.0, 'user')
+        self._cache.add_review(date(2013, 1, 2), 0.5, 'user')
+        self._cache.move_review(date(2013, 1, 2), 1.0, date(2013, 1, 3), 2.0, 'user')
+
+        self.assertEquals([0, 1, 1, 0], self._cache.get_workloads(date(2013, 1, 1), date(2013, 1, 4), 'user'))
+        self.assertEquals([0.0, 0.5, 2.0, 0.0],
+                          self._cache.get_avg_difficulties(date(2013, 1, 1), date(2013, 1, 4), 'user'))
+        self.assertEquals([0, 1, 1, 0], self._calendar.get_workloads(date(2013, 1, 1), date(2013, 1, 4), 'user'))
+        self.assertEquals(10, self._calendar.fetched_days)
+
+    def test_epoch_days_global_data(self):
+        calendar = WorkloadCalendar()
+        algorithm = SSRFAlgorithm(calendar, record_placements=True)
+        epoch_calendar = WorkloadCalendar(epoch_days=True)
+        cached_algorithm = SSRFAlgorithm(SessionCache(epoch_calendar), record_placements=True)
+        alg_data = cached_alg_data = None
+        for day, grade in enumerate((5, 4, 5, 3, 5)):
+            now = self._now + timedelta(day * 3)
+            result = algorithm.schedule(grade, alg_data, now=now, user_data='user')
+            cached_result = cached_algorithm.schedule(grade, cached_alg_data, now=now, user_data='user')
+            self.assertEquals(result, cached_result)
+            alg_data, cached_alg_data = result.alg_data, cached_result.alg_data
+
+        first_day = (self._now.date() - date(1970, 1, 1)).days
+        self.assertEquals(calendar.get_workloads(self._now.date(), self._now.date() + timedelta(100), 'user'),
+                          epoch_calendar.get_workloads(first_day, first_day + 100, 'user'))
+
+    def test_read_only_global_data(self):
+        cache = SessionCache(_ReadOnlyGlobalData())
+        cache.add_review(date(2013, 1, 2), 0.5, 'user')
+        cache.get_workloads(date(2013, 1, 1), date(2013, 1, 3), 'user')
+        cache.add_review(date(2013, 1, 2), 2.0, 'user')
+
+        self.assertEquals([1, 2, 1], cache.get_workloads(date(2013, 1, 1), date(2013, 1, 3), 'user'))
+        self.assertEquals([0.5, 1.25, 0.5], cache.get_avg_difficulties(date(2013, 1, 1), date(2013, 1, 3), 'user'))
+
+    def test_ttl(self):
+        self._cache.get_workloads(date(2013, 1, 1), date(2013, 1, 10), 'user')
+        self._calendar.add_review(date(2013, 1, 5), 1.0, 'user')
+        self._time = 59.0
+        self.assertEquals(0, self._cache.get_workloads(date(2013, 1, 5), date(2013, 1, 5), 'user')[0])
+        self._time = 60.0
+        self.assertEquals(1, self._cache.get_workloads(date(2013, 1, 5), date(2013, 1, 5), 'user')[0])
+
+    def test_invalidate(self):
+        self._cache.get_workloads(date(2013, 1, 1), date(2013, 1, 10), 'user')
+        self._calendar.add_review(date(2013, 1, 5), 1.0, 'user')
+        self._cache.invalidate('user')
+        self.assertEquals(1, self._cache.get_workloads(date(2013, 1, 5), date(2013, 1, 5), 'user')[0])
+        self._cache.invalidate()
+        self.assertEquals(0, self._cache.info().size)
+
+    def test_lru_eviction(self):
+        for user in ('a', 'b', 'a', 'c'):
+            self._cache.get_workloads(date(2013, 1, 1), date(2013, 1, 10), user)
+        self.assertEquals(30, self._calendar.fetched_days)
+        self._cache.get_workloads(date(2013, 1, 1), date(2013, 1, 10), 'a')
+        self.assertEquals(30, self._calendar.fetched_days)
+        self._cache.get_workloads(date(2013, 1, 1), date(2013, 1, 10), 'b')
+        self.assertEquals(40, self._calendar.fetched_days)
+
+    def test_wrong_options(self):
+        self.assertRaises(ValueError, SessionCache, self._calendar, max_users=0)
+        self.assertRaises(ValueError, SessionCache, self._calendar, ttl=0)
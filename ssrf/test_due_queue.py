@@ -0,0 +1,81 @@
+import random
+from unittest import TestCase
+from datetime import datetime, timedelta
+from ssrf.algorithm import *
+from ssrf.due_queue import DueQueue
+from ssrf.global_data import WorkloadCalendar
+
+class TestDueQueue (TestCase):
+    def setUp(self):
+        self._queue = DueQueue()
+        self._now = datetime(2013, 5, 1, 12, 30)
+
+    def test_pop_due_most_overdue_first(self):
+        self._queue.push('a', self._now + timedelta(1))
+        self._queue.push('b', self._now - timedelta(2))
+        self._queue.push('c', self._now)
+        self._queue.push('d', self._now - timedelta(1))
+
+        self.assertEquals([('b', self._now - timedelta(2)), ('d', self._now - timedelta(1))],
+                          self._queue.pop_due(self._now, limit=2))
+        self.assertEquals([('c', self._now)], self._queue.pop_due(self._now))
+        self.assertEquals([], self._queue.pop_due(self._now))
+        self.assertEquals(1, len(self._queue))
+        self.assertEquals(('a', self._now + timedelta(1)), self._queue.peek())
+
+    def test_push_updates_queued_lu(self):
+        self._queue.push('a', self._now - timedelta(1))
+        self._queue.push('a', self._now + timedelta(1))
+
+        self.assertEquals([], self._queue.pop_due(self._now))
+        self.assertEquals(1, len(self._queue))
+        self.assertEquals(self._now + timedelta(1), self._queue.get_next_review('a'))
+
+    def test_remove(self):
+        self._queue.push('a', self._now)
+        self._queue.push('b', self._now)
+        self._queue.remove('a')
+
+        self.assertFalse('a' in self._queue)
+        self.assertEquals([('b', self._now)], self._queue.pop_due(self._now))
+        self.assertRaises(KeyError, self._queue.remove, 'a')
+        self.assertEquals(None, self._queue.peek())
+
+    def test_compacts_removed_entries(self):
+        for lu in range(1000):
+            self._queue.push(lu % 10, self._now + timedelta(lu))
+
+        self.assertEquals(10, len(self._queue))
+        self.assertTrue(len(self._queue._heap) <= 2 * 10 + 16)
+        self.assertEquals([(lu, self._now + timedelta(990 + lu)) for lu in range(10)],
+                          self._queue.pop_due(self._now + timedelta(1000)))
+
+    def test_same_order_as_sorting(self):
+        rnd = random.Random(1)
+        next_reviews = {}
+        for _ in range(500):
+            lu_id = rnd.randint(0, 100)
+            if lu_id in next_reviews and rnd.random() < 0.2:
+                self._queue.remove(lu_id)
+                del next_reviews[lu_id]
+            else:
+                next_reviews[lu_id] = self._now + timedelta(hours=rnd.randint(-100, 100))
+                self._queue.push(lu_id, next_reviews[lu_id])
+
+        due = self._queue.pop_due(self._now)
+        self.assertEquals(sorted(next_review for next_review in next_reviews.values() if next_review <= self._now),
+                          [next_review for _, next_review in due])
+
+    def test_reviewed_again_within_24h_is_not_due(self):
+        algorithm = SSRFAlgorithm(WorkloadCalendar())
+        result = algorithm.schedule(0, now=self._now)
+        self._queue.push_result('a', result)
+        now = result.next_review
+        self.assertEquals([('a', result.next_review)], self._queue.pop_due(now))
+
+        self._queue.push_result('a', algorithm.schedule(0, result.alg_data, now=now))
+        result = algorithm.schedule(0, result.alg_data, now=now + timedelta(hours=1))
+        self._queue.push_result('a', result)
+
+        self.assertEquals([], self._queue.pop_due(now + timedelta(hours=24)))
+        self.assertEquals([('a', now + timedelta(hours=25))], self._queue.pop_due(now + timedelta(hours=25)))
@@ -0,0 +1,68 @@
+import random
+from unittest import TestCase, skipUnless
+from datetime import datetime, timedelta
+from ssrf.algorithm import *
+from ssrf.algorithm import numpy
+from ssrf.forecast import forecast_workloads
+
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+class TestForecast (TestCase):
+    def setUp(self):
+        self._now = datetime(2013, 1, 1, 9, 0)
+        rnd = random.Random(1)
+        self._states = [None] * 20 + [dict(num_reviews=rnd.randint(1, 8), avg_grade=rnd.uniform(2.0, 5.0),
+                                           difficulty=0.5, next_review=self._now + timedelta(rnd.randint(-3, 40)))
+                                      for _ in range(200)]
+
+    def _assert_same_as_schedule(self, vectorized):
+        global_data = Mock()
+        algorithm = SSRFAlgorithm(global_data, vectorized=vectorized)
+        forecast = forecast_workloads(algorithm, self._states, 120, now=self._now,
+                                      grade_weights=(0, 0, 0, 0, 1, 0), runs=3)
+
+        expected = [0] * 120
+        for alg_data in self._states:
+            now = self._now
+            if alg_data is not None and alg_data['next_review'] > now:
+                now = alg_data['next_review']
+            while (now.date() - self._now.date()).days < 120:
+                expected[(now.date() - self._now.date()).days] += 1
+                alg_data = algorithm.schedule(4, alg_data, now=now, estimated=True).alg_data
+                now = alg_data['next_review']
+        self.assertEquals([float(count) for count in expected], forecast)
+        self.assertEquals([], global_data.method_calls)
+
+    def test_same_as_schedule(self):
+        self._assert_same_as_schedule(False)
+
+    @skipUnless(numpy is not None, "NumPy is not installed")
+    def test_same_as_schedule_vectorized(self):
+        self._assert_same_as_schedule(True)
+
+    def test_reproducible(self):
+        algorithm = SSRFAlgorithm(None, vectorized=False)
+        forecast = forecast_workloads(algorithm, self._states, 90, now=self._now, seed=3)
+        self.assertEquals(forecast, forecast_workloads(algorithm, self._states, 90, now=self._now, seed=3))
+        self.assertNotEquals(forecast, forecast_workloads(algorithm, self._states, 90, now=self._now, seed=4))
+        self.assertEquals(sum(1 for alg_data in self._states
+                              if alg_data is None or alg_data['next_review'].date() <= self._now.date()),
+                          forecast[0])
+        self.assertEquals(90, len(forecast))
+
+    @skipUnless(numpy is not None, "NumPy is not installed")
+    def test_vectorized_close_to_pure_python(self):
+        forecast = forecast_workloads(SSRFAlgorithm(None, vectorized=False), self._states, 60, now=self._now,
+                                      runs=50)
+        vectorized_forecast = forecast_workloads(SSRFAlgorithm(None, vectorized=True), self._states, 60,
+                                                 now=self._now, runs=50)
+        self.assertAlmostEquals(sum(forecast), sum(vectorized_forecast), delta=0.05 * sum(forecast))
+
+    def test_wrong_arguments(self):
+        algorithm = SSRFAlgorithm(None)
+        self.assertRaises(ValueError, forecast_workloads, algorithm, [], 10, grade_weights=(1.0,))
+        self.assertRaises(ValueError, forecast_workloads, algorithm, [], 10, priority=5)
+        self.assertRaises(ValueError, forecast_workloads, algorithm, [], 10, runs=0)
@@ -0,0 +1,208 @@
+import random
+from unittest import TestCase
+from datetime import date, datetime, timedelta
+from ssrf.algorithm import *
+from ssrf.global_data import WorkloadCalendar
+
+class TestWorkloadCalendar (TestCase):
+    def setUp(self):
+        self._calendar = WorkloadCalendar()
+        self._today = date(2013, 5, 1)
+
+    def test_empty_calendar(self):
+        self.assertEquals([0, 0, 0], self._calendar.get_workloads(self._today, self._day(2), 'user'))
+        self.assertEquals([0.0, 0.0, 0.0], self._calendar.get_avg_difficulties(self._today, self._day(2), 'user'))
+        self.assertEquals(0, self._calendar.get_total_workload(self._today, self._day(2), 'user'))
+        self.assertEquals(0.0, self._calendar.get_total_difficulty(self._today, self._day(2), 'user'))
+
+    def test_add_review(self):
+        self._calendar.add_review(self._day(1), 1.0, 'user')
+        self._calendar.add_review(self._day(1), 2.0, 'user')
+        self._calendar.add_review(self._day(3), 0.5, 'user')
+        self._calendar.add_review(self._day(2), 0.5, 'other user')
+
+        self.assertEquals([0, 2, 0, 1], self._calendar.get_workloads(self._today, self._day(3), 'user'))
+        self.assertEquals([0.0, 1.5, 0.0, 0.5], self._calendar.get_avg_difficulties(self._today, self._day(3), 'user'))
+        self.assertEquals(2, self._calendar.get_total_workload(self._today, self._day(2), 'user'))
+        self.assertEquals(3.5, self._calendar.get_total_difficulty(self._today, self._day(3), 'user'))
+        self.assertEquals([0, 0, 1, 0], self._calendar.get_workloads(self._today, self._day(3), 'other user'))
+
+    def test_remove_review(self):
+        self._calendar.add_review(self._day(1), 1.0, 'user')
+        self._calendar.add_review(self._day(1), 0.1, 'user')
+        self._calendar.remove_review(self._day(1), 1.0, 'user')
+        self._calendar.remove_review(self._day(1), 0.1, 'user')
+
+        self.assertEquals([0], self._calendar.get_workloads(self._day(1), self._day(1), 'user'))
+        self.assertEquals([0.0], self._calendar.get_avg_difficulties(self._day(1), self._day(1), 'user'))
+        self.assertEquals(0.0, self._calendar.get_total_difficulty(self._today, self._day(1), 'user'))
+
+    def test_remove_unknown_review(self):
+        self._calendar.remove_review(self._day(1), 0.1, 'user')
+        self._calendar.add_review(self._day(2), 0.5, 'user')
+        self._calendar.remove_review(self._day(1), 0.1, 'user')
+        self._calendar.remove_review(self._day(-500), 0.1, 'user')
+
+        self.assertEquals([0, 0, 1], self._calendar.get_workloads(self._today, self._day(2), 'user'))
+        self.assertEquals(0.5, self._calendar.get_total_difficulty(self._today, self._day(2), 'user'))
+
+        # Rescheduling a LU whose next review wasn't added to the calendar
+        algorithm = SSRFAlgorithm(self._calendar, record_placements=True)
+        alg_data = dict(num_reviews=3, avg_grade=4.0, difficulty=0.5, last_review=datetime(2013, 4, 20),
+                        next_review=datetime(2013, 5, 1))
+        next_review, _ = algorithm.schedule(5, alg_data, now=datetime(2013, 5, 1, 9, 0), user_data='user')
+        self.assertEquals(2, self._calendar.get_total_workload(self._today, self._day(100), 'user'))
+        self.assertEquals(1, self._calendar.get_total_workload(next_review.date(), next_review.date(), 'user'))
+
+    def test_difficulty_sum_rounding_errors(self):
+        for difficulty, add in ((0.34, True), (0.0, True), (0.0, True), (0.58, True), (0.34, False),
+                                (0.0, True), (0.0, False), (0.58, False)):
+            if add:
+                self._calendar.add_review(self._day(1), difficulty, 'user')
+            else:
+                self._calendar.remove_review(self._day(1), difficulty, 'user')
+
+        workloads, difficulty_sums = self._calendar.get_load_sums(self._day(1), self._day(1), 'user')
+        self.assertEquals([2], list(workloads))
+        self.assertEquals([0.0], list(difficulty_sums))
+
+        # Fetched with the other days of the window, which have no free day
+        for day in (0, 2, 3, 4):
+            self._calendar.add_review(self._day(day), 0.5, 'user')
+        SSRFAlgorithm(self._calendar).schedule(5, dict(num_reviews=1, avg_grade=5.0, difficulty=0.0),
+                                               now=datetime(2013, 4, 27, 9, 0), user_data='user')
+
+    def test_get_load_profile(self):
+        self._calendar.add_review(self._day(1), 1.0, 'user')
+        self._calendar.add_review(self._day(1), 2.0, 'user')
+
+        workloads, avg_difficulties = self._calendar.get_load_profile(self._today, self._day(2), 'user')
+        self.assertEquals([0, 2, 0], list(workloads))
+        self.assertEquals([0.0, 1.5, 0.0], list(avg_difficulties))
+        workloads, avg_difficulties = self._calendar.get_load_profile(self._today, self._day(2), 'other user')
+        self.assertEquals([0, 0, 0], list(workloads))
+        self.assertEquals([0.0, 0.0, 0.0], list(avg_difficulties))
+
+    def test_get_load_sums(self):
+        self._calendar.add_review(self._day(1), 1.0, 'user')
+        self._calendar.add_review(self._day(1), 2.0, 'user')
+        self._calendar.add_review(self._day(2), 0.5, 'user')
+        self._calendar.remove_review(self._day(2), 0.5, 'user')
+
+        workloads, difficulty_sums = self._calendar.get_load_sums(self._today, self._day(2), 'user')
+        self.assertEquals([0, 2, 0], list(workloads))
+        self.assertEquals([0.0, 3.0, 0.0], list(difficulty_sums))
+        workloads, difficulty_sums = self._calendar.get_load_sums(self._today, self._day(2), 'other user')
+        self.assertEquals([0, 0, 0], list(workloads))
+        self.assertEquals([0.0, 0.0, 0.0], list(difficulty_sums))
+
+    def test_move_review(self):
+        self._calendar.add_review(self._day(1), 1.0, 'user')
+        self._calendar.move_review(self._day(1), 1.0, self._day(5), 2.0, 'user')
+
+        self.assertEquals([0, 0, 0, 0, 1], self._calendar.get_workloads(self._day(1), self._day(5), 'user'))
+        self.assertEquals(2.0, self._calendar.get_total_difficulty(self._today, self._day(5), 'user'))
+
+    def test_discard_user(self):
+        self._calendar.add_review(self._day(1), 1.0, 'user')
+        self._calendar.add_review(self._day(1), 1.0, 'other user')
+        self._calendar.discard_user('user')
+
+        self.assertEquals([0], self._calendar.get_workloads(self._day(1), self._day(1), 'user'))
+        self.assertEquals([1], self._calendar.get_workloads(self._day(1), self._day(1), 'other user'))
+
+    def test_load_user(self):
+        self._calendar.add_review(self._day(10), 1.0, 'user')
+        self._calendar.load_user(self._day(1), [2, 0, 1], [3.0, 0.0, 0.5], 'user')
+
+        self.assertEquals([0, 2, 0, 1, 0], self._calendar.get_workloads(self._today, self._day(4), 'user'))
+        self.assertEquals([1.5, 0.0, 0.5], self._calendar.get_avg_difficulties(self._day(1), self._day(3), 'user'))
+        self.assertEquals(3, self._calendar.get_total_workload(self._today, self._day(20), 'user'))
+        self.assertEquals(self._day(4), self._calendar.find_last_free_day(self._day(1), self._day(4), 'user'))
+        self._calendar.add_review(self._day(5), 1.0, 'user')
+        self.assertEquals(4, self._calendar.get_total_workload(self._today, self._day(20), 'user'))
+        self.assertRaises(ValueError, self._calendar.load_user, self._day(1), [1], [], 'user')
+
+    def test_grows_in_both_directions(self):
+        self._calendar.add_review(self._today, 1.0, 'user')
+        self._calendar.add_review(self._day(1000), 2.0, 'user')
+        self._calendar.add_review(self._day(-1000), 3.0, 'user')
+
+        self.assertEquals(3, self._calendar.get_total_workload(self._day(-2000), self._day(2000), 'user'))
+        self.assertEquals(1, self._calendar.get_total_workload(self._day(-1), self._day(1), 'user'))
+        self.assertEquals([1, 0], self._calendar.get_workloads(self._day(1000), self._day(1001), 'user'))
+        self.assertEquals([0, 3.0], self._calendar.get_avg_difficulties(self._day(-1001), self._day(-1000), 'user'))
+
+    def test_range_queries_match_daily_values(self):
+        rnd = random.Random(1)
+        for _ in range(500):
+            self._calendar.add_review(self._day(rnd.randint(0, 200)), rnd.uniform(0.0, 2.0), 'user')
+        workloads = self._calendar.get_workloads(self._today, self._day(200), 'user')
+        for _ in range(50):
+            first, last = sorted((rnd.randint(0, 200), rnd.randint(0, 200)))
+            self.assertEquals(sum(workloads[first:last + 1]),
+                              self._calendar.get_total_workload(self._day(first), self._day(last), 'user'))
+
+    def test_find_last_free_day(self):
+        self.assertEquals(self._day(5), self._calendar.find_last_free_day(self._today, self._day(5), 'user'))
+        rnd = random.Random(2)
+        for _ in range(150):
+            self._calendar.add_review(self._day(rnd.randint(0, 100)), 1.0, 'user')
+        for _ in range(50):
+            self._calendar.remove_review(self._day(rnd.choice([day for day in range(101)
+                if self._calendar.get_total_workload(self._day(day), self._day(day), 'user')])), 1.0, 'user')
+        for _ in range(100):
+            first, last = sorted((rnd.randint(-50, 150), rnd.randint(-50, 150)))
+            workloads = self._calendar.get_workloads(self._day(first), self._day(last), 'user')
+            free_inds = [ind for ind, workload in enumerate(workloads) if workload == 0]
+            expected = self._day(first + free_inds[-1]) if free_inds else None
+            self.assertEquals(expected, self._calendar.find_last_free_day(self._day(first), self._day(last), 'user'))
+
+    def test_find_last_free_day_all_busy(self):
+        for days in range(5):
+            self._calendar.add_review(self._day(days), 1.0, 'user')
+        self.assertEquals(None, self._calendar.find_last_free_day(self._today, self._day(4), 'user'))
+        self.assertEquals(self._day(-1), self._calendar.find_last_free_day(self._day(-1), self._day(4), 'user'))
+
+    def test_schedule_records_placements(self):
+        algorithm = SSRFAlgorithm(self._calendar, record_placements=True)
+        now = datetime(2013, 5, 1, 12, 30)
+
+        next_reviews = [algorithm.schedule(5, now=now, user_data='user').next_review for _ in range(8)]
+
+        self.assertEquals(8, self._calendar.get_total_workload(self._today, self._day(8), 'user'))
+        self.assertEquals([self._day(interval) for interval in (8, 7, 6, 5, 4)],
+                          [next_review.date() for next_review in next_reviews[:5]])
+        review_dates = [next_review.date() for next_review in next_reviews]
+        self.assertEquals([review_dates.count(self._day(interval)) for interval in range(4, 9)],
+                          self._calendar.get_workloads(self._day(4), self._day(8), 'user'))
+
+    def test_schedule_many_same_as_consecutive_schedule(self):
+        now = datetime(2013, 5, 1, 12, 30)
+        items = [(grade, None, priority) for grade in (5, 3, 4, 2) for priority in PRIORITIES] * 4
+        expected_calendar = WorkloadCalendar()
+        algorithm = SSRFAlgorithm(expected_calendar, record_placements=True)
+        expected = [algorithm.schedule(grade, alg_data, priority, now=now, user_data='user')
+                    for grade, alg_data, priority in items]
+
+        results = SSRFAlgorithm(self._calendar, record_placements=True).schedule_many(items, now=now,
+                                                                                       user_data='user')
+
+        self.assertEquals(expected, results)
+        self.assertEquals(expected_calendar.get_load_sums(self._today, self._day(30), 'user'),
+                          self._calendar.get_load_sums(self._today, self._day(30), 'user'))
+
+    def test_epoch_days(self):
+        calendar = WorkloadCalendar(epoch_days=True)
+        calendar.add_review(15826, 1.0, 'user')
+        calendar.add_review(15826, 2.0, 'user')
+        calendar.move_review(15826, 2.0, 15828, 0.5, 'user')
+
+        self.assertEquals([1, 0, 1], calendar.get_workloads(15826, 15828, 'user'))
+        self.assertEquals([1.0, 0.0, 0.5], calendar.get_avg_difficulties(15826, 15828, 'user'))
+        self.assertEquals(15827, calendar.find_last_free_day(15825, 15828, 'user'))
+        self.assertEquals(None, calendar.find_last_free_day(15826, 15826, 'user'))
+        self.assertEquals(1.5, calendar.get_total_difficulty(15800, 15900, 'user'))
+
+    def _day(self, days):
+        return self._today + timedelta(days)
@@ -0,0 +1,73 @@
+import threading
+from unittest import TestCase
+from datetime import datetime, timedelta
+from ssrf.algorithm import *
+from ssrf.global_data import WorkloadCalendar
+from ssrf.locking import StripedLocks
+from time import sleep
+
+class _SlowCalendar (WorkloadCalendar):
+    """ Calendar yielding to other threads between reading and recording the load. """
+
+    def get_load_sums(self, from_date, to_date, user_data):
+        load_sums = WorkloadCalendar.get_load_sums(self, from_date, to_date, user_data)
+        sleep(0.001)
+        return load_sums
+
+    def get_load_profile(self, from_date, to_date, user_data):
+        profile = WorkloadCalendar.get_load_profile(self, from_date, to_date, user_data)
+        sleep(0.001)
+        return profile
+
+    def find_last_free_day(self, from_date, to_date, user_data):
+        free_day = WorkloadCalendar.find_last_free_day(self, from_date, to_date, user_data)
+        sleep(0.001)
+        return free_day
+
+class TestStripedLocks (TestCase):
+    def test_lock_for(self):
+        locks = StripedLocks(stripes=4)
+        self.assertTrue(locks.lock_for('user') is locks.lock_for('user'))
+        self.assertEquals(4, len(set(id(locks.lock_for(user)) for user in range(4))))
+        self.assertRaises(ValueError, StripedLocks, 0)
+
+    def test_requires_record_placements(self):
+        self.assertRaises(ValueError, SSRFAlgorithm, WorkloadCalendar(), user_locks=StripedLocks())
+
+class TestConcurrentScheduling (TestCase):
+    def setUp(self):
+        self._now = datetime(2013, 1, 1, 9, 0)
+        self._users = ('user 1', 'user 2', 'user 3')
+        self._threads_per_user = 4
+        self._schedules_per_thread = 10
+
+    def _schedule_concurrently(self, algorithm):
+        errors = []
+        def grade(user):
+            try:
+                for _ in range(self._schedules_per_thread):
+                    algorithm.schedule(5, None, now=self._now, user_data=user)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=grade, args=(user,))
+                   for user in self._users for _ in range(self._threads_per_user)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEquals([], errors)
+
+    def test_calendar_balanced_under_parallel_load(self):
+        calendar = _SlowCalendar()
+        self._schedule_concurrently(SSRFAlgorithm(calendar, record_placements=True, user_locks=StripedLocks()))
+
+        # Identical LUs scheduled one after another give the reference load
+        sequential_calendar = WorkloadCalendar()
+        algorithm = SSRFAlgorithm(sequential_calendar, record_placements=True)
+        for _ in range(self._threads_per_user * self._schedules_per_thread):
+            algorithm.schedule(5, None, now=self._now, user_data='user')
+
+        date_from, date_to = self._now.date(), self._now.date() + timedelta(30)
+        expected_workloads = sequential_calendar.get_workloads(date_from, date_to, 'user')
+        for user in self._users:
+            self.assertEquals(expected_workloads, calendar.get_workloads(date_from, date_to, user))
@@ -0,0 +1,84 @@
+import random
+from unittest import TestCase
+from datetime import datetime, timedelta
+from ssrf.algorithm import *
+from ssrf.global_data import WorkloadCalendar
+from ssrf.planner import JointPlanner
+from ssrf.state import LearningUnitState
+
+class TestJointPlanner (TestCase):
+    def setUp(self):
+        self._now = datetime(2013, 1, 1, 9, 0)
+        rnd = random.Random(1)
+        self._items = [(rnd.choice((3, 4, 5)),
+                        dict(num_reviews=rnd.randint(1, 6), avg_grade=rnd.uniform(2.5, 5.0), difficulty=0.3),
+                        rnd.choice(PRIORITIES))
+                       for _ in range(500)]
+
+    def _plan(self, items, calendar=None):
+        calendar = calendar if calendar is not None else WorkloadCalendar()
+        algorithm = SSRFAlgorithm(calendar, record_placements=True)
+        return algorithm, calendar, JointPlanner(algorithm).plan(items, now=self._now, user_data='user')
+
+    def _horizon(self):
+        return self._now.date(), self._now.date() + timedelta(100000)
+
+    def test_results_within_acceptable_intervals(self):
+        algorithm, _, results = self._plan(self._items)
+        for (grade, alg_data, priority), result in zip(self._items, results):
+            interval = (result.next_review.date() - self._now.date()).days
+            self.assertTrue(algorithm._calculate_interval(alg_data['num_reviews'], alg_data['avg_grade'],
+                                                          grade - 1, priority)
+                            <= interval <=
+                            algorithm._calculate_interval(alg_data['num_reviews'], alg_data['avg_grade'],
+                                                          grade, priority))
+            self.assertEquals(self._now.time(), result.next_review.time())
+            self.assertEquals(alg_data['num_reviews'] + 1, result.alg_data['num_reviews'])
+            self.assertEquals(algorithm._calculate_difficulty(alg_data['num_reviews'], priority, interval),
+                              result.alg_data['difficulty'])
+
+    def test_independent_of_order(self):
+        _, calendar, _ = self._plan(self._items)
+        shuffled_items = list(self._items)
+        random.Random(2).shuffle(shuffled_items)
+        _, shuffled_calendar, _ = self._plan(shuffled_items)
+
+        self.assertEquals(calendar.get_workloads(*(self._horizon() + ('user',))),
+                          shuffled_calendar.get_workloads(*(self._horizon() + ('user',))))
+
+    def test_lower_load_than_greedy(self):
+        algorithm, calendar, _ = self._plan(self._items)
+        greedy_calendar = WorkloadCalendar()
+        SSRFAlgorithm(greedy_calendar, record_placements=True).schedule_many(self._items, now=self._now,
+                                                                             user_data='user')
+
+        def total_load_coeff(calendar):
+            from_date, to_date = self._now.date() + timedelta(1), self._now.date() + timedelta(30)
+            return sum(algorithm._calculate_load_coeffs(calendar.get_workloads(from_date, to_date, 'user'),
+                                                        calendar.get_avg_difficulties(from_date, to_date, 'user')))
+
+        self.assertTrue(total_load_coeff(calendar) < total_load_coeff(greedy_calendar))
+        self.assertEquals(len(self._items), calendar.get_total_workload(*(self._horizon() + ('user',))))
+
+    def test_moves_current_repetitions(self):
+        calendar = WorkloadCalendar()
+        algorithm = SSRFAlgorithm(calendar, record_placements=True)
+        states = [algorithm.schedule(5, None, now=self._now, user_data='user').alg_data for _ in range(10)]
+        now = self._now + timedelta(10)
+        items = [(4, LearningUnitState.from_dict(alg_data), PRIORITY_MEDIUM) for alg_data in states]
+        self._now = now
+        _, _, results = self._plan(items, calendar)
+
+        self.assertEquals(10, calendar.get_total_workload(*(self._horizon() + ('user',))))
+        self.assertTrue(all(isinstance(result.alg_data, LearningUnitState) for result in results))
+
+    def test_reviewed_within_24h(self):
+        alg_data = dict(num_reviews=3, avg_grade=4.0, difficulty=0.5, last_review=self._now - timedelta(hours=2),
+                        next_review=self._now + timedelta(hours=10))
+        calendar = WorkloadCalendar()
+        calendar.add_review(alg_data['next_review'].date(), alg_data['difficulty'], 'user')
+        _, _, results = self._plan([(5, alg_data, PRIORITY_MEDIUM)], calendar)
+
+        self.assertEquals([SSRFAlgorithm(None).schedule(5, alg_data, now=self._now)], results)
+        self.assertEquals(1, calendar.get_total_workload(results[0].next_review.date(),
+                                                         results[0].next_review.date(), 'user'))
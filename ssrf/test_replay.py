@@ -0,0 +1,111 @@
+import random
+from unittest import TestCase
+from datetime import date, datetime, timedelta
+from ssrf.algorithm import *
+from ssrf.global_data import WorkloadCalendar
+from ssrf.replay import ReviewLogReplayer
+
+class TestReviewLogReplayer (TestCase):
+    def setUp(self):
+        self._start = datetime(2013, 5, 1, 9, 0)
+        rnd = random.Random(0)
+        self._log = []
+        reviewed_at = self._start
+        for _ in range(300):
+            reviewed_at += timedelta(minutes=rnd.randint(0, 300))
+            self._log.append(('lu %d' % rnd.randint(0, 19), reviewed_at, rnd.choice(GRADES), rnd.choice(PRIORITIES)))
+
+    def test_replay_same_as_schedule(self):
+        calendar = WorkloadCalendar()
+        algorithm = SSRFAlgorithm(calendar, record_placements=True)
+        states = {}
+        for lu_id, reviewed_at, grade, priority in self._log:
+            states[lu_id] = algorithm.schedule(grade, states.get(lu_id), priority, now=reviewed_at,
+                                               user_data='user').alg_data
+
+        replayer = ReviewLogReplayer(user_data='user')
+
+        self.assertEquals(300, replayer.replay(iter(self._log)))
+        self.assertEquals(states, replayer.states)
+        last_day = self._start.date() + timedelta(3650)
+        self.assertEquals(calendar.get_load_sums(self._start.date(), last_day, 'user'),
+                          replayer.calendar.get_load_sums(self._start.date(), last_day, 'user'))
+
+    def test_calendar_contains_current_next_reviews(self):
+        replayer = ReviewLogReplayer()
+        replayer.replay(self._log)
+
+        next_review_days = [alg_data['next_review'].date() for alg_data in replayer.states.values()]
+        first_day, last_day = min(next_review_days), max(next_review_days)
+        self.assertEquals(len(replayer.states), replayer.calendar.get_total_workload(date(2013, 1, 1), last_day, None))
+        self.assertEquals([next_review_days.count(first_day + timedelta(day))
+                           for day in range((last_day - first_day).days + 1)],
+                          replayer.calendar.get_workloads(first_day, last_day, None))
+
+    def test_replay_in_chunks(self):
+        replayer = ReviewLogReplayer()
+        replayer.replay(self._log)
+        chunked_replayer = ReviewLogReplayer()
+        chunked_replayer.replay(self._log[:120])
+        chunked_replayer.replay(self._log[120:])
+
+        self.assertEquals(replayer.states, chunked_replayer.states)
+        self.assertEquals(300, chunked_replayer.count)
+        self.assertEquals(self._log[-1][1], chunked_replayer.last_reviewed_at)
+
+    def test_reviewed_within_24h(self):
+        replayer = ReviewLogReplayer()
+        replayer.replay([('lu', self._start, 5, PRIORITY_MEDIUM)])
+        next_review, num_reviews = replayer.states['lu']['next_review'], replayer.states['lu']['num_reviews']
+        replayer.replay([('lu', self._start + timedelta(hours=3), 0, PRIORITY_MEDIUM)])
+
+        self.assertEquals(next_review, replayer.states['lu']['next_review'])
+        self.assertEquals(num_reviews, replayer.states['lu']['num_reviews'])
+        self.assertEquals(self._start + timedelta(hours=3), replayer.states['lu']['last_review'])
+
+    def test_replay_with_initial_states(self):
+        alg_data = dict(num_reviews=3, avg_grade=4.0, difficulty=0.5,
+                        last_review=self._start - timedelta(5), next_review=self._start + timedelta(2))
+        replayer = ReviewLogReplayer(states={'lu': alg_data})
+
+        self.assertEquals([1], replayer.calendar.get_workloads(date(2013, 5, 3), date(2013, 5, 3), None))
+        replayer.replay([('lu', self._start, 5, PRIORITY_MEDIUM)])
+
+        self.assertEquals(4, replayer.states['lu']['num_reviews'])
+        self.assertEquals([0], replayer.calendar.get_workloads(date(2013, 5, 3), date(2013, 5, 3), None))
+        self.assertEquals(1, replayer.calendar.get_total_workload(date(2013, 5, 1), date(2014, 5, 1), None))
+
+    def test_replay_with_initial_states_same_as_schedule(self):
+        alg_data = dict(num_reviews=8, avg_grade=4.0, difficulty=0.5,
+                        last_review=self._start - timedelta(100), next_review=self._start + timedelta(200))
+        calendar = WorkloadCalendar()
+        calendar.add_review(alg_data['next_review'].date(), alg_data['difficulty'], None)
+        algorithm = SSRFAlgorithm(calendar, record_placements=True)
+        states = {'old lu': alg_data}
+        for lu_id, reviewed_at, grade, priority in self._log:
+            states[lu_id] = algorithm.schedule(grade, states.get(lu_id), priority, now=reviewed_at).alg_data
+
+        replayer = ReviewLogReplayer(states={'old lu': alg_data})
+        replayer.replay(self._log)
+
+        self.assertEquals(states, replayer.states)
+        last_day = self._start.date() + timedelta(3650)
+        self.assertEquals(calendar.get_load_sums(self._start.date(), last_day, None),
+                          replayer.calendar.get_load_sums(self._start.date(), last_day, None))
+
+    def test_out_of_order_log(self):
+        replayer = ReviewLogReplayer()
+        log = [('a', self._start, 5, PRIORITY_MEDIUM), ('b', self._start, 4, PRIORITY_MEDIUM),
+               ('c', self._start - timedelta(minutes=1), 4, PRIORITY_MEDIUM)]
+
+        self.assertRaises(ValueError, replayer.replay, log)
+        self.assertEquals(['a', 'b'], sorted(replayer.states))
+        self.assertEquals(2, replayer.count)
+        self.assertRaises(ValueError, replayer.replay, [log[2]])
+
+    def test_algorithm_options(self):
+        replayer = ReviewLogReplayer(algorithm_options=dict(validation=VALIDATION_OFF, record_placements=False))
+
+        self.assertEquals(VALIDATION_OFF, replayer.algorithm.validation)
+        self.assertTrue(replayer.algorithm.record_placements)
+        self.assertRaises(ValueError, ReviewLogReplayer, algorithm_options=dict(tracer=object()))
@@ -0,0 +1,51 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from ssrf.algorithm import *
+from ssrf.simulator import DEFAULT_GRADE_WEIGHTS, simulate, main
+
+class TestSimulator (TestCase):
+    def test_simulate_reproducible(self):
+        report = simulate(users=2, deck_size=50, new_per_day=10, days=30, seed=3)
+        same_report = simulate(users=2, deck_size=50, new_per_day=10, days=30, seed=3)
+        other_report = simulate(users=2, deck_size=50, new_per_day=10, days=30, seed=4)
+
+        self.assertEquals(report['daily_workload'], same_report['daily_workload'])
+        self.assertEquals(report['schedules'], same_report['schedules'])
+        self.assertNotEquals(report['daily_workload'], other_report['daily_workload'])
+
+    def test_simulate_report(self):
+        report = simulate(users=2, deck_size=50, new_per_day=10, days=30, validation=VALIDATION_OFF,
+                          trace_memory=True)
+
+        self.assertTrue(report['schedules'] >= 100)
+        self.assertAlmostEquals(report['schedules'] / 60.0, report['daily_workload']['mean'])
+        self.assertTrue(report['latency']['p50'] <= report['latency']['p90'] <= report['latency']['p99']
+                        <= report['latency']['max'])
+        self.assertTrue(report['peak_memory'] > 0)
+
+    def test_simulate_wrong_grade_weights(self):
+        self.assertRaises(ValueError, simulate, grade_weights=(1.0,))
+
+    def test_simulate_with_parameters(self):
+        parameters = SSRFParameters(priority_values={PRIORITY_MEDIUM: 2.0}, default_avg_grade=2.0,
+                                    grades=(0, 1, 2, 3))
+        report = simulate(users=1, deck_size=20, new_per_day=10, days=10, grade_weights=(0.0, 0.0, 0.0, 1.0),
+                          parameters=parameters)
+
+        self.assertTrue(report['schedules'] >= 20)
+        self.assertRaises(ValueError, simulate, grade_weights=DEFAULT_GRADE_WEIGHTS, parameters=parameters)
+        self.assertRaises(ValueError, simulate, priority=PRIORITY_HIGH, grade_weights=(0.0, 0.0, 0.0, 1.0),
+                          parameters=parameters)
+
+    def test_main_writes_json(self):
+        directory = tempfile.mkdtemp()
+        try:
+            output = os.path.join(directory, 'report.json')
+            self.assertEquals(0, main(['--users', '1', '--deck-size', '20', '--days', '10', '--output', output]))
+            with open(output) as report:
+                self.assertEquals(1, json.load(report)['config']['users'])
+        finally:
+            shutil.rmtree(directory)
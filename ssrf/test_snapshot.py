@@ -0,0 +1,116 @@
+import io
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+from unittest import TestCase, skipUnless
+from datetime import datetime, timedelta
+from ssrf.algorithm import *
+from ssrf.global_data import WorkloadCalendar
+from ssrf.snapshot import StateWriter, MappedStates, write_states, read_store, _NATIVE_ORDER, _extend_column
+from ssrf.state import LearningUnitState, LearningUnitStore
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+class TestSnapshot (TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._path = os.path.join(self._dir, 'states.bin')
+        now = datetime(2013, 5, 1, 12, 30, 15)
+        self._states = [None, dict(num_reviews=3, avg_grade=3.7, difficulty=0.41)]
+        algorithm = SSRFAlgorithm(WorkloadCalendar(), record_placements=True)
+        for lu_id in range(20):
+            self._states.append(algorithm.schedule(lu_id % 6, None, now=now + timedelta(hours=lu_id)).alg_data)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _expected_states(self):
+        return [LearningUnitState.from_dict(state) if state is not None else LearningUnitState()
+                for state in self._states]
+
+    def test_round_trip(self):
+        with open(self._path, 'wb') as snapshot:
+            self.assertEquals(22, write_states(snapshot, self._states, block_size=5))
+
+        store = read_store(self._path)
+        self.assertEquals(self._expected_states(), list(store))
+
+    def test_round_trip_other_byte_order(self):
+        with patch('ssrf.snapshot._NATIVE_ORDER', b'>' if _NATIVE_ORDER == b'<' else b'<'):
+            with open(self._path, 'wb') as snapshot:
+                write_states(snapshot, self._states, block_size=5)
+
+        self.assertEquals(self._expected_states(), list(read_store(self._path)))
+        self.assertRaises(ValueError, MappedStates, self._path)
+
+    def test_extend_column_with_other_item_size(self):
+        column = array('i', [7])
+        buffer = b'\0' * 3 + struct.pack('<2q', 5, -3) + struct.pack('>q', 9)
+
+        _extend_column(column, b'<', 2, 'q', buffer, 3)
+        _extend_column(column, b'>', 1, 'q', buffer, 19)
+        self.assertEquals([7, 5, -3, 9], column.tolist())
+
+    @skipUnless(hasattr(memoryview, 'cast'), "requires Python 3.3+")
+    def test_mapped_round_trip(self):
+        with open(self._path, 'wb') as snapshot:
+            write_states(snapshot, self._states, block_size=5)
+
+        with MappedStates(self._path) as states:
+            self.assertEquals(22, len(states))
+            self.assertEquals([5, 5, 5, 5, 2], [len(block[0]) for block in states.blocks()])
+            self.assertEquals(self._expected_states(), list(states))
+            self.assertEquals(self._expected_states()[-1], states[-1])
+            self.assertRaises(IndexError, states.__getitem__, 22)
+
+    def test_write_store(self):
+        store = LearningUnitStore()
+        store.extend(self._states)
+        with open(self._path, 'wb') as snapshot:
+            with StateWriter(snapshot, block_size=8) as writer:
+                writer.write(self._states[3])
+                writer.write_store(store)
+            self.assertEquals(23, writer.count)
+
+        self.assertEquals(self._expected_states()[3:4] + self._expected_states(), list(read_store(self._path)))
+
+    def test_round_trip_schedules_same(self):
+        now = datetime(2013, 6, 1, 9, 0)
+        with open(self._path, 'wb') as snapshot:
+            write_states(snapshot, self._states)
+
+        algorithm = SSRFAlgorithm(WorkloadCalendar())
+        for alg_data, state in zip(self._states, read_store(self._path)):
+            self.assertEquals(algorithm.schedule(4, alg_data, now=now).next_review,
+                              algorithm.schedule(4, state, now=now).next_review)
+
+    def test_empty(self):
+        with open(self._path, 'wb') as snapshot:
+            self.assertEquals(0, write_states(snapshot, []))
+        self.assertEquals(0, len(read_store(self._path)))
+
+    @skipUnless(hasattr(memoryview, 'cast'), "requires Python 3.3+")
+    def test_mapped_empty(self):
+        with open(self._path, 'wb') as snapshot:
+            write_states(snapshot, [])
+        with MappedStates(self._path) as states:
+            self.assertEquals([], list(states))
+
+    def test_invalid(self):
+        with open(self._path, 'wb') as snapshot:
+            snapshot.write(b'not a snapshot')
+        self.assertRaises(ValueError, read_store, self._path)
+
+        with open(self._path, 'wb') as snapshot:
+            write_states(snapshot, self._states)
+        with open(self._path, 'r+b') as snapshot:
+            snapshot.truncate(os.path.getsize(self._path) - 1)
+        self.assertRaises(ValueError, read_store, self._path)
+        self.assertRaises(ValueError, MappedStates, self._path)
+
+    def test_wrong_block_size(self):
+        self.assertRaises(ValueError, StateWriter, io.BytesIO(), 0)
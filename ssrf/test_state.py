@@ -0,0 +1,95 @@
+import math
+import pickle
+from unittest import TestCase
+from datetime import datetime, timedelta
+from ssrf.algorithm import *
+from ssrf.global_data import WorkloadCalendar
+from ssrf.state import LearningUnitState, LearningUnitStore, NO_TIME
+
+class TestLearningUnitState (TestCase):
+    def test_defaults_same_as_initial_alg_data(self):
+        algorithm = SSRFAlgorithm(None)
+        state = algorithm._fill_initial_algorithm_data(LearningUnitState())
+        self.assertEquals(algorithm._fill_initial_algorithm_data(), state.to_dict())
+
+    def test_default_avg_grade_of_parameters(self):
+        now = datetime(2013, 5, 1, 12, 30)
+        algorithm = SSRFAlgorithm(WorkloadCalendar(), parameters=SSRFParameters(default_avg_grade=4.0))
+
+        next_review, new_state = algorithm.schedule(5, LearningUnitState(num_reviews=3), now=now)
+
+        self.assertEquals(algorithm.schedule(5, dict(num_reviews=3), now=now).next_review, next_review)
+        self.assertEquals(None, LearningUnitState().avg_grade)
+        self.assertFalse('avg_grade' in LearningUnitState().to_dict())
+
+    def test_dict_interop(self):
+        alg_data = dict(num_reviews=3, avg_grade=3.7, difficulty=1.70, next_review=datetime(2013, 5, 1))
+        state = LearningUnitState.from_dict(alg_data)
+
+        self.assertEquals(alg_data, state.to_dict())
+        self.assertEquals(3, state['num_reviews'])
+        self.assertEquals(None, state.get('last_review'))
+        self.assertFalse('last_review' in state)
+        self.assertRaises(KeyError, state.__getitem__, 'last_review')
+        self.assertRaises(KeyError, state.__setitem__, 'grade', 1)
+
+    def test_schedule_returns_state(self):
+        now = datetime(2013, 5, 1, 12, 30)
+        algorithm = SSRFAlgorithm(WorkloadCalendar())
+        alg_data = dict(num_reviews=3, avg_grade=3.7, difficulty=0.41)
+        state = LearningUnitState.from_dict(alg_data)
+
+        next_review, new_state = algorithm.schedule(5, state, PRIORITY_LOW, now=now)
+        expected_next_review, expected_alg_data = algorithm.schedule(5, alg_data, PRIORITY_LOW, now=now)
+
+        self.assertTrue(isinstance(new_state, LearningUnitState))
+        self.assertEquals(expected_next_review, next_review)
+        self.assertEquals(expected_alg_data, new_state.to_dict())
+        self.assertEquals(LearningUnitState.from_dict(alg_data), state)
+
+        # reviewing again within 24h
+        next_review, new_state = algorithm.schedule(0, new_state, PRIORITY_LOW, now=now + timedelta(hours=1))
+        self.assertEquals(expected_next_review, next_review)
+
+    def test_pickle(self):
+        state = LearningUnitState(2, 3.5, 0.7, datetime(2013, 5, 1), datetime(2013, 5, 3))
+        self.assertEquals(state, pickle.loads(pickle.dumps(state, 2)))
+
+
+class TestLearningUnitStore (TestCase):
+    def test_append_and_get(self):
+        store = LearningUnitStore()
+        state = LearningUnitState(2, 3.5, 0.7, datetime(2013, 5, 1, 12, 30, 15), datetime(2013, 5, 3, 12, 30, 15))
+
+        self.assertEquals(0, store.append())
+        self.assertEquals(1, store.append(state))
+        self.assertEquals(2, store.append(state.to_dict()))
+
+        self.assertEquals(3, len(store))
+        self.assertEquals(LearningUnitState(), store[0])
+        self.assertEquals(state, store[1])
+        self.assertEquals(state, store[2])
+        self.assertEquals(NO_TIME, store.next_review[0])
+        self.assertEquals(None, store[0].avg_grade)
+        self.assertTrue(math.isnan(store.avg_grade[0]))
+        self.assertEquals(1367411415, store.last_review[1])
+
+    def test_datetimes_stored_with_second_precision(self):
+        store = LearningUnitStore()
+        store.append(LearningUnitState(last_review=datetime(2013, 5, 1, 12, 30, 15, 999)))
+
+        self.assertEquals(datetime(2013, 5, 1, 12, 30, 15), store[0].last_review)
+
+    def test_schedule_store(self):
+        now = datetime(2013, 5, 1, 12, 30)
+        algorithm = SSRFAlgorithm(WorkloadCalendar(), record_placements=True)
+        store = LearningUnitStore()
+        store.extend([None] * 10)
+
+        for grade in (5, 3, 4):
+            for ind in range(len(store)):
+                store[ind] = algorithm.schedule(grade, store[ind], now=now).alg_data
+            now += timedelta(10)
+
+        self.assertEquals([4] * 10, list(store.num_reviews))
+        self.assertEquals(list(store), [store[ind] for ind in range(10)])
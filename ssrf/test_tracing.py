@@ -0,0 +1,62 @@
+from unittest import TestCase
+from datetime import datetime, timedelta
+from ssrf.algorithm import *
+from ssrf.global_data import WorkloadCalendar
+from ssrf.tracing import *
+
+class TestAggregatingTracer (TestCase):
+    def setUp(self):
+        self._tracer = AggregatingTracer()
+        self._algorithm = SSRFAlgorithm(WorkloadCalendar(), tracer=self._tracer, record_placements=True)
+        self._now = datetime(2013, 1, 1, 9, 0)
+
+    def test_schedule_phases_and_paths(self):
+        result = self._algorithm.schedule(5, None, now=self._now)
+        self._algorithm.schedule(5, result.alg_data, now=self._now + timedelta(hours=1))
+        self._algorithm.schedule(3, None, now=self._now, estimated=True)
+        report = self._tracer.report()
+
+        self.assertEquals(3, report['phases'][PHASE_SCHEDULE]['count'])
+        self.assertEquals(3, report['phases'][PHASE_VALIDATION]['count'])
+        self.assertEquals(1, report['phases']['find_last_free_day']['count'])
+        self.assertFalse('get_load_profile' in report['phases'])
+        self.assertEquals(1, report['phases']['add_review']['count'])
+        self.assertEquals({PATH_ZERO_WORKLOAD: 1, PATH_REVIEWED_WITHIN_24H: 1, PATH_ESTIMATED: 1}, report['paths'])
+        self.assertEquals(1, report['windows']['count'])
+        self.assertEquals(sum(report['phases'][PHASE_SCHEDULE]['buckets'].values()), 3)
+
+    def test_balanced_path_and_window(self):
+        calendar = self._algorithm.global_data
+        for day in range(30):
+            calendar.add_review(self._now.date() + timedelta(day), 0.5, None)
+        self._algorithm.schedule(5, None, now=self._now)
+        report = self._tracer.report()
+
+        self.assertEquals({PATH_BALANCED: 1}, report['paths'])
+        self.assertEquals(1, report['phases'][PHASE_SCORING]['count'])
+        min_interval = int(self._algorithm._calculate_interval(1, 2.5, 4, PRIORITY_MEDIUM))
+        max_interval = int(self._algorithm._calculate_interval(1, 2.5, 5, PRIORITY_MEDIUM))
+        self.assertEquals(max_interval - min_interval + 1, report['windows']['max'])
+
+    def test_schedule_many(self):
+        self._algorithm.schedule_many([(5, None, PRIORITY_MEDIUM), (4, None, PRIORITY_HIGH)], now=self._now)
+        report = self._tracer.report()
+
+        self.assertEquals(1, report['phases'][PHASE_SCHEDULE_MANY]['count'])
+        self.assertEquals(2, sum(report['paths'].values()))
+
+    def test_reset(self):
+        self._algorithm.schedule(5, None, now=self._now)
+        self._tracer.reset()
+        self.assertEquals({'phases': {}, 'paths': {}, 'windows': Histogram().report()}, self._tracer.report())
+
+class TestHistogram (TestCase):
+    def test_buckets(self):
+        histogram = Histogram()
+        for value in (0, 1, 2, 3, 4, 100):
+            histogram.add(value)
+        report = histogram.report()
+        self.assertEquals({1: 1, 2: 1, 4: 2, 8: 1, 128: 1}, report['buckets'])
+        self.assertEquals(0, report['min'])
+        self.assertEquals(100, report['max'])
+        self.assertEquals(6, report['count'])
@@ -0,0 +1,115 @@
+""" Instrumentation of ``SSRFAlgorithm``.
+
+Pass a ``Tracer`` to the algorithm to receive durations of scheduling phases,
+widths of acceptable interval windows and scheduling paths::
+
+    tracer = AggregatingTracer()
+    algorithm = SSRFAlgorithm(global_data, tracer=tracer)
+    ...
+    report = tracer.report()
+
+Without a tracer the algorithm doesn't measure anything.
+"""
+from collections import defaultdict
+
+#: Whole ``schedule`` and ``schedule_many`` calls
+PHASE_SCHEDULE = 'schedule'
+PHASE_SCHEDULE_MANY = 'schedule_many'
+#: Validation of the input of ``schedule`` and ``schedule_many``
+PHASE_VALIDATION = 'validation'
+#: Search for the interval with the maximum load reduction
+PHASE_SCORING = 'scoring'
+# Calls of the global data are reported with phases named after their methods,
+# e.g. ``get_workloads`` or ``get_avg_difficulties``.
+
+#: A LU reviewed again within 24h keeps its schedule
+PATH_REVIEWED_WITHIN_24H = 'reviewed_within_24h'
+#: The maximum acceptable interval is used without balancing
+PATH_ESTIMATED = 'estimated'
+#: The latest day without workload is chosen
+PATH_ZERO_WORKLOAD = 'zero_workload'
+#: The day with the maximum load reduction is chosen
+PATH_BALANCED = 'balanced'
+
+
+class Tracer (object):
+    """ Receives measurements of the algorithm; the default implementation ignores them. """
+
+    def on_phase(self, phase, duration):
+        """ Called with a phase name and its duration in seconds. """
+        pass
+
+    def on_window(self, width):
+        """ Called with the number of days between min. and max. acceptable interval (both inclusive). """
+        pass
+
+    def on_path(self, path):
+        """ Called with the path the algorithm took to choose the interval of a LU. """
+        pass
+
+
+class Histogram (object):
+    """ Histogram of non-negative values with power of two buckets.
+
+    A value ``v`` scaled with ``scale`` falls into the bucket ``int(v * scale).bit_length()``,
+    i.e. bucket ``b`` holds scaled values from ``2 ** (b - 1)`` to ``2 ** b - 1``.
+    """
+
+    def __init__(self, scale=1):
+        self.scale = scale
+        self.buckets = defaultdict(int)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.buckets[int(value * self.scale).bit_length()] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def report(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': float(self.total) / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            # upper bounds (exclusive) of scaled values in buckets
+            'buckets': dict((2 ** bucket, count) for bucket, count in sorted(self.buckets.items())),
+        }
+
+
+class AggregatingTracer (Tracer):
+    """ Collects histograms of phase durations (in microseconds) and window widths
+    and counts of scheduling paths.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.phases = defaultdict(lambda: Histogram(scale=1e6))
+        self.windows = Histogram()
+        self.paths = defaultdict(int)
+
+    def on_phase(self, phase, duration):
+        self.phases[phase].add(duration)
+
+    def on_window(self, width):
+        self.windows.add(width)
+
+    def on_path(self, path):
+        self.paths[path] += 1
+
+    def report(self):
+        """ Returns a dict with all collected measurements. """
+        return {
+            'phases': dict((phase, histogram.report()) for phase, histogram in self.phases.items()),
+            'windows': self.windows.report(),
+            'paths': dict(self.paths),
+        }